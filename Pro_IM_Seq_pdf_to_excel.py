@@ -1,22 +1,39 @@
-import pdfplumber
 import sys
 import os
-# Streamlit 환경에서는 tkinter를 사용하지 않음
-try:
-    import tkinter as tk
-    from tkinter import filedialog, messagebox, ttk
-    TKINTER_AVAILABLE = True
-except ImportError:
-    TKINTER_AVAILABLE = False
-import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill
 import re
 import subprocess
 import platform
 import threading
 import time
 import json
+import progress
+import timing
+import parse_quality
+import metrics
+
+# 무거운 라이브러리는 실제로 쓰는 함수 안에서 불러옴 (모듈 import를 가볍게 유지)
+#   pdfplumber - PDF 읽기 (run, process_pdf_to_excel)
+#   openpyxl   - 엑셀 생성 (create_excel_file)
+#   tkinter    - GUI (진행 창, 파일 선택 대화상자) → _load_tkinter()
+tk = filedialog = messagebox = ttk = None
+
+def _load_tkinter():
+    """
+    tkinter를 처음 필요할 때 불러오는 함수
+    화면이 없는 리눅스 서버(Streamlit 등)나 tkinter가 없는 환경에서는 False를 반환합니다.
+    """
+    global tk, filedialog, messagebox, ttk
+    if tk is not None:
+        return True
+    if sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')):
+        return False
+    try:
+        import tkinter
+        from tkinter import filedialog as _filedialog, messagebox as _messagebox, ttk as _ttk
+    except ImportError:
+        return False
+    tk, filedialog, messagebox, ttk = tkinter, _filedialog, _messagebox, _ttk
+    return True
 
 def get_config_file_path():
     """
@@ -83,7 +100,7 @@ class ProgressWindow:
     프로그래스바를 표시하는 GUI 클래스
     """
     def __init__(self):
-        if not TKINTER_AVAILABLE:
+        if not _load_tkinter():
             return
         
         self.root = tk.Tk()
@@ -145,7 +162,7 @@ class ProgressWindow:
             value (int): 프로그래스 값 (0-100)
             status_text (str): 상태 텍스트
         """
-        if not TKINTER_AVAILABLE:
+        if not _load_tkinter():
             return
         
         self.progress['value'] = value
@@ -159,25 +176,26 @@ class ProgressWindow:
         
     def close(self):
         """프로그래스바 창 닫기"""
-        if not TKINTER_AVAILABLE:
+        if not _load_tkinter():
             return
         
         self.root.destroy()
         
     def show(self):
         """프로그래스바 창 표시"""
-        if not TKINTER_AVAILABLE:
+        if not _load_tkinter():
             return
         
         self.root.update()
 
-def extract_data_from_first_page(lines):
+def extract_data_from_first_page(lines, counters=None):
     """
     첫 번째 페이지의 특정 줄에서 데이터를 추출하는 함수
     8번째 줄에서 Seq No.와 Date 추출, 13~30번째 줄에서 데이터 처리
     
     Args:
         lines (list): 페이지의 모든 줄들
+        counters (parse_quality.PageCounters): 파싱 품질 카운터 (None이면 기록하지 않음)
         
     Returns:
         tuple: (base_seq_no, date, extracted_data, test_counter)
@@ -216,6 +234,8 @@ def extract_data_from_first_page(lines):
     # 13번째 줄부터 30번째 줄까지 처리 (인덱스 12부터 29까지)
     start_line = 12  # 13번째 줄 (0-based index)
     end_line = min(30, len(lines))  # 30번째 줄까지 또는 페이지 끝까지
+    if counters is None:
+        counters = parse_quality.PageCounters()
     
     i = start_line
     while i < end_line:
@@ -237,9 +257,12 @@ def extract_data_from_first_page(lines):
             i += 1
             continue
         
+        counters.lines += 1
+        
         # Test Name과 Result 패턴 처리 (개선된 정규식 패턴)
         # 정규식 패턴: +로 시작할 수 있고, 대문자로 시작하는 영문/숫자/하이픈 조합
         if re.match(r'^[\+]?[A-Z][A-Z0-9\-]+', line) or line.startswith('+'):
+            counters.candidates += 1
             # "+" 존재 여부 확인
             has_plus = line.startswith('+')
             
@@ -387,16 +410,22 @@ def extract_data_from_first_page(lines):
                         'rerun': current_row_data.get('rerun', 'N'),
                         'date': date,
                         'has_rerun': current_row_data.get('has_rerun', False),
-                        'r_nr': r_nr_value
+                        'r_nr': r_nr_value,
+                        'line': line  # 원본 Test 줄 (PDF 검토용)
                     }
                     extracted_data.append(row_data)
                     current_row_data = {}  # 다음 데이터를 위해 초기화
+                else:
+                    counters.reject("empty_next_line")
+            else:
+                counters.reject("page_end")
         
         i += 1
     
+    counters.finish(base_seq_no, extracted_data, lines, end_line)
     return base_seq_no, date, extracted_data, test_counter
 
-def extract_data_from_other_pages(lines, global_test_counter=0):
+def extract_data_from_other_pages(lines, global_test_counter=0, counters=None):
     """
     두 번째 페이지부터의 특정 줄에서 데이터를 추출하는 함수
     5번째 줄에서 Seq No.와 Date 추출, 10번째 줄부터 30번째 줄까지 데이터 처리
@@ -404,6 +433,7 @@ def extract_data_from_other_pages(lines, global_test_counter=0):
     Args:
         lines (list): 페이지의 모든 줄들
         global_test_counter (int): 전역 테스트 카운터 (페이지 간 연속성 유지)
+        counters (parse_quality.PageCounters): 파싱 품질 카운터 (None이면 기록하지 않음)
         
     Returns:
         tuple: (base_seq_no, date, extracted_data, updated_counter)
@@ -462,6 +492,8 @@ def extract_data_from_other_pages(lines, global_test_counter=0):
     # 10번째 줄부터 30번째 줄까지 처리 (인덱스 9부터 29까지)
     start_line = 9  # 10번째 줄 (0-based index)
     end_line = min(30, len(lines))  # 30번째 줄까지 또는 페이지 끝까지
+    if counters is None:
+        counters = parse_quality.PageCounters()
     
     i = start_line
     while i < end_line:
@@ -483,9 +515,12 @@ def extract_data_from_other_pages(lines, global_test_counter=0):
             i += 1
             continue
         
+        counters.lines += 1
+        
         # Test Name과 Result 패턴 처리 (개선된 정규식 패턴)
         # 정규식 패턴: +로 시작할 수 있고, 대문자로 시작하는 영문/숫자/하이픈 조합
         if re.match(r'^[\+]?[A-Z][A-Z0-9\-]+', line) or line.startswith('+'):
+            counters.candidates += 1
             # "+" 존재 여부 확인
             has_plus = line.startswith('+')
             
@@ -633,16 +668,22 @@ def extract_data_from_other_pages(lines, global_test_counter=0):
                         'rerun': current_row_data.get('rerun', 'N'),
                         'date': date,
                         'has_rerun': current_row_data.get('has_rerun', False),
-                        'r_nr': r_nr_value
+                        'r_nr': r_nr_value,
+                        'line': line  # 원본 Test 줄 (PDF 검토용)
                     }
                     extracted_data.append(row_data)
                     current_row_data = {}  # 다음 데이터를 위해 초기화
+                else:
+                    counters.reject("empty_next_line")
+            else:
+                counters.reject("page_end")
         
         i += 1
     
+    counters.finish(base_seq_no, extracted_data, lines, end_line)
     return base_seq_no, date, extracted_data, test_counter
 
-def create_excel_file(pdf_filename, extracted_data, output_path, terminal_logs=None, pdf_lines=None):
+def create_excel_file(pdf_filename, extracted_data, output_path, terminal_logs=None, pdf_lines=None, timer=None):
     """
     추출된 데이터로 엑셀 파일을 생성하는 함수
     
@@ -652,7 +693,13 @@ def create_excel_file(pdf_filename, extracted_data, output_path, terminal_logs=N
         output_path (str): 출력 엑셀 파일 경로
         terminal_logs (list): 터미널 로그 리스트
         pdf_lines (list): PDF의 모든 줄 데이터 리스트
+        timer (timing.Timer): 단계별 시간 측정 (timer.sheet이면 "Timing" 시트 추가)
     """
+    timer = timer or timing.NULL_TIMER
+    build_started = time.perf_counter()
+    
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill
     
     # 워크북 생성
     wb = Workbook()
@@ -793,8 +840,13 @@ def create_excel_file(pdf_filename, extracted_data, output_path, terminal_logs=N
         # 컬럼 너비 조정
         log_ws.column_dimensions['A'].width = 100
     
+    timer.add("excel_build", time.perf_counter() - build_started)
+    if timer.sheet:
+        timing.add_timing_sheet(wb, timer)
+    
     # 파일 저장
-    wb.save(output_path)
+    with timer.span("excel_save"):
+        wb.save(output_path)
     # 이 print는 create_excel_file 함수 내부이므로 여기서는 그대로 유지
     print(f"엑셀 파일이 저장되었습니다: {output_path}")
 
@@ -808,7 +860,7 @@ def select_save_location(pdf_filename):
     Returns:
         str: 선택된 저장 경로, 취소시 None
     """
-    if not TKINTER_AVAILABLE:
+    if not _load_tkinter():
         return None
     
     # tkinter 윈도우 생성 (숨김)
@@ -891,6 +943,7 @@ def process_pdf_to_excel(pdf_path, progress_window=None):
         if progress_window:
             progress_window.update_progress(5, "Opening PDF file...")
         
+        import pdfplumber
         with pdfplumber.open(pdf_path) as pdf:
             total_pages = len(pdf.pages)
             if total_pages == 0:
@@ -949,11 +1002,12 @@ def process_pdf_to_excel(pdf_path, progress_window=None):
             log_and_print(f"\n첫 번째 페이지에서 추출된 데이터: {len(first_page_data)}개")
             
             # 두 번째 페이지부터 처리
+            reporter = progress.ProgressReporter(
+                total_pages, progress.window_progress(progress_window) if progress_window else None
+            )
             for page_num in range(1, total_pages):
-                # 진행률 계산 (30%부터 60%까지)
-                if progress_window and total_pages > 1:
-                    progress = 30 + int((page_num / (total_pages - 1)) * 30)
-                    progress_window.update_progress(progress, f"Processing page {page_num + 1}/{total_pages}...")
+                # 진행률 표시 (30%부터 60%까지, 처리한 페이지 기준)
+                reporter.update(page_num, len(all_extracted_data))
                 
                 page = pdf.pages[page_num]
                 text = page.extract_text()
@@ -1042,7 +1096,7 @@ def select_pdf_file():
     Returns:
         str: 선택된 PDF 파일의 경로, 취소시 None
     """
-    if not TKINTER_AVAILABLE:
+    if not _load_tkinter():
         return None
     
     # tkinter 윈도우 생성 (숨김)
@@ -1071,13 +1125,21 @@ def select_pdf_file():
     
     return pdf_path if pdf_path else None
 
-def run(pdf_path:str) -> str:
+def run(pdf_path:str, annotated_pdf_path:str=None, flagged_pdf_path:str=None, sample_filter=None,
+        output_path:str=None, progress_callback=None, timer=None, quality=None) -> str:
     """
     Entrypoint: converts PDF to Excel and returns output path
     Streamlit 환경에서 호출될 때는 파일 저장 대화상자를 표시하지 않고 임시 파일에 저장합니다.
     
     Args:
         pdf_path (str): PDF 파일 경로
+        annotated_pdf_path (str): 검토용 주석 PDF 저장 경로 (None이면 생성하지 않음)
+        flagged_pdf_path (str): 플래그 샘플 페이지만 모은 PDF 저장 경로 (None이면 생성하지 않음)
+        sample_filter (list): 플래그 PDF에 추가로 포함할 Sample ID / Seq No. 목록
+        output_path (str): 엑셀 저장 경로 (지정하면 저장 위치를 묻지 않음, CLI 등)
+        progress_callback (callable): 페이지 진행 상황 콜백 callback(progress.PageProgress)
+        timer (timing.Timer): 단계별 시간 측정 (None이면 측정하지 않음, 측정 시 JSON 기록을 로그에 남김)
+        quality (parse_quality.ParseQuality): 페이지별 파싱 카운터 (None이면 새로 만듦, 경고는 로그와 메트릭 파일에 기록)
         
     Returns:
         str: 생성된 Excel 파일 경로
@@ -1094,21 +1156,39 @@ def run(pdf_path:str) -> str:
         terminal_logs.append(msg)
         print(msg)
     
+    timer = timer or timing.NULL_TIMER
+    # 명령행에서 직접 실행해도(__main__) 같은 모듈 이름으로 기록
+    module_name = os.path.splitext(os.path.basename(__file__))[0]
+    if quality is None:
+        quality = parse_quality.ParseQuality(module_name, os.path.basename(pdf_path))
+    started = time.perf_counter()
+    
+    def record_metrics(status, pages=0, rows=0, exception=None):
+        # 예열처럼 기록하지 않는 변환(quality.record=False)은 처리량 메트릭에서도 제외
+        if quality.record:
+            metrics.record_conversion(module_name, status, time.perf_counter() - started, pages, rows, exception)
+    
     # 입력 파일 체크
     if not os.path.exists(pdf_path):
         log_and_print(f"오류: 파일을 찾을 수 없습니다: {pdf_path}")
+        record_metrics("failed", exception="FileNotFoundError")
         return None
 
     try:
         # PDF 열기
-        with pdfplumber.open(pdf_path) as pdf:
+        import pdfplumber
+        with timer.span("open"):
+            pdf = pdfplumber.open(pdf_path)
             total_pages = len(pdf.pages)
+        with pdf:
             if total_pages == 0:
                 log_and_print("PDF에 페이지가 없습니다.")
+                record_metrics("empty")
                 return None
+            reporter = progress.ProgressReporter(total_pages, progress_callback)
 
             # 첫 페이지 추출
-            lines = pdf.pages[0].extract_text().split('\n')
+            lines = timer.extract_page(1, pdf.pages[0]).split('\n')
             
             # PDF 줄별 데이터 수집 (첫 번째 페이지)
             pdf_lines.append({
@@ -1116,12 +1196,17 @@ def run(pdf_path:str) -> str:
                 'lines': [line.strip() for line in lines if line.strip()]
             })
             
-            base_seq_no, date, extracted, test_counter = extract_data_from_first_page(lines)
+            with timer.span("parse"):
+                base_seq_no, date, extracted, test_counter = extract_data_from_first_page(lines, counters=quality.page(1))
+            
+            for row in extracted:
+                row['page'] = 1
+            reporter.update(1, len(extracted))
 
             # 이후 페이지 추출
             global_test_counter = test_counter  # 전역 테스트 카운터
             for i, page in enumerate(pdf.pages[1:], start=1):
-                lines = page.extract_text().split('\n')
+                lines = timer.extract_page(i + 1, page).split('\n')
                 
                 # PDF 줄별 데이터 수집 (다른 페이지들)
                 pdf_lines.append({
@@ -1129,15 +1214,28 @@ def run(pdf_path:str) -> str:
                     'lines': [line.strip() for line in lines if line.strip()]
                 })
                 
-                _, _, data, global_test_counter = extract_data_from_other_pages(lines, global_test_counter)
+                with timer.span("parse"):
+                    _, _, data, global_test_counter = extract_data_from_other_pages(lines, global_test_counter, counters=quality.page(i + 1))
+                
+                for row in data:
+                    row['page'] = i + 1
                 extracted.extend(data)
+                reporter.update(i + 1, len(extracted))
+
+        # 파싱 이상 징후 (보고서 형식 변경 등) - 로그와 메트릭 파일에 기록
+        for warning in parse_quality.save_metrics(quality):
+            log_and_print(f"파싱 경고: {warning}")
 
         if not extracted:
             log_and_print("추출된 데이터가 없습니다.")
+            record_metrics("empty", total_pages)
             return None
 
+        if output_path:
+            # 저장 경로가 지정된 경우 (CLI 등) 그대로 사용
+            os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
         # Streamlit 환경에서는 임시 파일에 저장
-        if is_streamlit:
+        elif is_streamlit:
             import tempfile
             pdf_filename = os.path.basename(pdf_path)
             base_name = os.path.splitext(pdf_filename)[0]
@@ -1166,18 +1264,54 @@ def run(pdf_path:str) -> str:
                 return None
 
         # 엑셀 생성 (PDF 줄별 데이터 포함)
-        create_excel_file(os.path.basename(pdf_path), extracted, output_path, terminal_logs, pdf_lines)
+        create_excel_file(os.path.basename(pdf_path), extracted, output_path, terminal_logs, pdf_lines, timer)
+        
+        # 검토용 주석 PDF 생성 (Data Alarm / Rerun / COI Reac 줄 하이라이트)
+        if annotated_pdf_path:
+            try:
+                import pdf_review
+                with timer.span("annotated_pdf"):
+                    annot_count = pdf_review.annotate_pdf(pdf_path, extracted, annotated_pdf_path)
+                log_and_print(f"검토용 PDF 생성 완료: {annotated_pdf_path} (주석 {annot_count}개)")
+            except Exception as e:
+                log_and_print(f"검토용 PDF 생성 중 오류 발생: {e}")
+        
+        # 플래그 샘플 페이지만 모은 PDF 생성 (이미 추출한 페이지 정보 사용)
+        if flagged_pdf_path:
+            try:
+                import pdf_review
+                with timer.span("flagged_pdf"):
+                    page_count = pdf_review.export_flagged_pages(pdf_path, extracted, flagged_pdf_path, sample_filter)
+                log_and_print(f"플래그 페이지 PDF 생성 완료: {flagged_pdf_path} ({page_count}페이지)")
+            except Exception as e:
+                log_and_print(f"플래그 페이지 PDF 생성 중 오류 발생: {e}")
+        if timer.enabled:
+            timer.finish()
+            timing.log_record(timer.to_record(
+                module=module_name, pdf=os.path.basename(pdf_path), rows=len(extracted),
+                parse=quality.totals(),
+            ))
+        record_metrics("ok", total_pages, len(extracted))
         return output_path
 
     except Exception as e:
         log_and_print(f"PDF 처리 중 오류 발생: {e}")
+        record_metrics("failed", exception=type(e).__name__)
         return None
 
 def main():
     """
     메인 함수: GUI로 PDF 파일을 선택받아 엑셀로 변환합니다.
+    명령행에 PDF와 엑셀 경로를 모두 주면 GUI 없이 변환합니다 (텍스트 진행 막대 표시).
     """
     
+    if len(sys.argv) > 2:
+        timer = timing.Timer(os.path.basename(sys.argv[1]), sheet=True) if os.environ.get("REAF_TIMING") == "1" else None
+        output_path = run(sys.argv[1], output_path=sys.argv[2], progress_callback=progress.text_progress_bar(), timer=timer)
+        print(f"출력 파일: {output_path}" if output_path else "변환에 실패했습니다.")
+        metrics.write_textfile()  # REAF_METRICS_FILE이 있으면 처리량 메트릭 기록
+        return
+    
     if len(sys.argv) > 1:
         # 명령행 인수로 파일 경로가 제공된 경우
         pdf_path = sys.argv[1]
@@ -2,213 +2,87 @@ import streamlit as st
 import importlib
 import tempfile
 import os
+import shutil
 import sys
-import csv
-import openpyxl
+import uuid
 from datetime import datetime
-import shutil
-import win32com.client
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Add local directory to Python module search path so module files load correctly
 # ─────────────────────────────────────────────────────────────────────────────
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
+import job_queue
+import metrics
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Linearity_ED2 processing functions
 # ─────────────────────────────────────────────────────────────────────────────
-def get_csv_data(all_data, row_num, col_idx, as_number=False):
-    """CSV 데이터를 안전하게 가져오는 함수"""
-    try:
-        value = all_data[row_num - 1][col_idx]
-        if as_number:
-            try:
-                return float(value.replace(',', ''))
-            except (ValueError, TypeError):
-                return 0.0
-        return value
-    except IndexError:
-        return 0.0 if as_number else ""
-
-def count_valid_columns(all_csv_data):
-    """CSV에서 유효한 열 개수를 세는 함수"""
-    if not all_csv_data or len(all_csv_data) < 2:
-        return 0
-    
-    num_cols = len(all_csv_data[0])
-    valid_count = 0
-    
-    for col_idx in range(2, num_cols):
-        check_value = get_csv_data(all_csv_data, 2, col_idx).strip()
-        if check_value:
-            valid_count += 1
-        else:
-            break
-    
-    return valid_count
+def process_linearity_files(excel_template_path, csv_data_path, save_directory, template=None, workers=1, excel_workers=1,
+                            native_pdf=False, incremental=True, on_output=None, on_start=None):
+    """
+    Linearity_ED2 파일 처리 메인 함수
 
-def export_excel_to_pdf(excel_file_path, pdf_file_path):
-    """Excel 파일의 첫 3개 시트를 PDF로 변환하는 함수"""
-    try:
-        # Excel 애플리케이션 시작
-        excel_app = win32com.client.DispatchEx("Excel.Application")
-        excel_app.Visible = False
-        excel_app.DisplayAlerts = False
-        
-        # Excel 파일 열기
-        workbook = excel_app.Workbooks.Open(os.path.abspath(excel_file_path))
-        
-        # 첫 3개 시트 선택
-        if workbook.Worksheets.Count >= 3:
-            # 첫 번째 시트 선택
-            workbook.Worksheets(1).Select()
-            # 2, 3번째 시트 추가 선택
-            for i in range(2, 4):
-                if i <= workbook.Worksheets.Count:
-                    workbook.Worksheets(i).Select(False)
-            
-            # PDF로 내보내기
-            excel_app.ActiveSheet.ExportAsFixedFormat(
-                Type=0,  # xlTypePDF
-                Filename=os.path.abspath(pdf_file_path)
-            )
-            
-            success = True
-        else:
-            success = False
-        
-        # Excel 정리
-        workbook.Close(SaveChanges=False)
-        excel_app.Quit()
-        
-        return success
-        
-    except Exception as e:
-        print(f"PDF 변환 오류: {e}")
-        try:
-            if 'workbook' in locals():
-                workbook.Close(SaveChanges=False)
-            if 'excel_app' in locals():
-                excel_app.Quit()
-        except:
-            pass
-        return False
-
-def process_linearity_files(excel_template_path, csv_data_path, save_directory):
-    """Linearity_ED2 파일 처리 메인 함수"""
+    Args:
+        template: 미리 불러온 LinearityTemplate (없으면 excel_template_path에서 새로 불러옴)
+        workers (int): 워크북을 동시에 채우고 저장할 프로세스 수
+        excel_workers (int): PDF 변환에 사용할 Excel 인스턴스 수
+        native_pdf (bool): True이면 Excel 없이 PyMuPDF로 PDF 보고서 생성
+        incremental (bool): True이면 입력이 바뀌지 않은 분석 항목은 다시 만들지 않음 (저장 폴더의 매니페스트 기준)
+        on_output (callable): 결과 파일이 준비될 때마다 경로를 받는 함수 (예: OutputBundle.add_file)
+        on_start (callable): CSV를 읽은 뒤 분석 항목 수를 받는 함수 (진행률 계산용, CSV는 여기서 한 번만 읽음)
+
+    Returns:
+        dict: linearity_batch.process_linearity_batch()의 결과 + "timer" (단계별 시간, timing.Timer)
+    """
     log = []
     
     try:
-        # CSV 파일 읽기
-        all_csv_data = []
-        with open(csv_data_path, mode='r', encoding='utf-8-sig') as f:
-            reader = csv.reader(f)
-            all_csv_data = list(reader)
-        
-        if not all_csv_data:
-            return {"success": False, "error": "CSV 파일이 비어있습니다.", "log": log, "files_created": 0}
+        import linearity_csv
+        import linearity_workbook
+        import linearity_batch
+        import excel_com
+        import timing
+
+        timer = timing.Timer(os.path.basename(csv_data_path))
+
+        # 템플릿은 배치당 한 번만 파싱 (채우기 계획도 템플릿당 한 번만 컴파일)
+        with timer.span("template"):
+            if template is None:
+                template = linearity_workbook.LinearityTemplate.from_path(excel_template_path)
+            fill_plan = template.fill_plan
         
-        # 처리할 파일 개수 계산
-        total_files = count_valid_columns(all_csv_data)
+        # CSV 파일 읽기 (분석 항목별 레코드로 한 번에 변환, 숫자 칸 검증)
+        with timer.span("csv"):
+            linearity_data = linearity_csv.read_linearity_csv(csv_data_path, fill_plan)
         
-        if total_files == 0:
+        if not linearity_data.records:
             return {"success": False, "error": "처리할 데이터가 없습니다.", "log": log, "files_created": 0}
         
-        log.append(f"총 {total_files}개의 파일을 생성합니다.")
-        
-        num_cols = len(all_csv_data[0])
-        file_counter = 1
+        log.append(f"총 {len(linearity_data)}개의 파일을 생성합니다.")
+        if on_start:
+            on_start(len(linearity_data))
+        if template.fill_plan.missing_sheets:
+            log.append(f"! 템플릿에 없는 시트는 건너뜁니다: {', '.join(template.fill_plan.missing_sheets)}")
         
-        # C열부터 반복 처리
-        for col_idx in range(2, num_cols):
-            check_value = get_csv_data(all_csv_data, 2, col_idx).strip()
-            
-            if not check_value:
-                break
-            
-            log.append(f"{file_counter}번째 파일 생성 중... (CSV {chr(65+col_idx)}열)")
-            
-            try:
-                # 엑셀 템플릿 불러오기
-                wb = openpyxl.load_workbook(excel_template_path, keep_vba=True)
-                
-                # 파일명에 사용할 값
-                e19_value_str = get_csv_data(all_csv_data, 2, col_idx)
-                
-                # Instructions 시트
-                if "Instructions" in wb.sheetnames:
-                    ws_inst = wb["Instructions"]
-                    ws_inst['E18'] = get_csv_data(all_csv_data, 6, col_idx)
-                    ws_inst['E19'] = e19_value_str
-                    ws_inst['E20'] = get_csv_data(all_csv_data, 3, col_idx)
-                    ws_inst['E21'] = get_csv_data(all_csv_data, 5, col_idx)
-                
-                # Linearity 시트
-                if "Linearity" in wb.sheetnames:
-                    ws_lin = wb["Linearity"]
-                    ws_lin['E4'] = get_csv_data(all_csv_data, 5, col_idx)
-                    ws_lin['E5'] = get_csv_data(all_csv_data, 7, col_idx)
-                
-                # Data Entry 시트
-                if "Data Entry" in wb.sheetnames:
-                    ws_data = wb["Data Entry"]
-                    ws_data['F11'] = get_csv_data(all_csv_data, 15, col_idx, as_number=True)
-                    ws_data['I13'] = get_csv_data(all_csv_data, 7, col_idx)
-                    
-                    # 데이터 블럭
-                    cells_32 = ['E32', 'F32', 'G32', 'H32', 'I32']
-                    rows_32 = [37, 38, 39, 40, 41]
-                    for cell, row in zip(cells_32, rows_32):
-                        ws_data[cell] = get_csv_data(all_csv_data, row, col_idx, as_number=True)
-                    
-                    cells_33 = ['E33', 'F33', 'G33', 'H33', 'I33']
-                    rows_33 = [42, 43, 44, 45, 46]
-                    for cell, row in zip(cells_33, rows_33):
-                        ws_data[cell] = get_csv_data(all_csv_data, row, col_idx, as_number=True)
-                    
-                    # 평균값 수식 입력
-                    ws_data['E19'] = '=AVERAGE(E32, E33)'
-                    ws_data['F19'] = '=AVERAGE(F32, F33)'
-                    ws_data['G19'] = '=AVERAGE(G32, G33)'
-                    ws_data['H19'] = '=AVERAGE(H32, H33)'
-                    ws_data['I19'] = '=AVERAGE(I32, I33)'
-                
-                # 파일명 생성
-                today_str = datetime.now().strftime("%Y%m%d")
-                safe_e19_value = e19_value_str.replace('/', '_').replace('\\', '_').replace(':', '_').replace('*', '_').replace('?', '_').replace('"', '_').replace('<', '_').replace('>', '_').replace('|', '_').strip()
-                
-                # 임시로 _P 접미사 사용 (실제 검증은 Excel COM이 필요)
-                final_filename = f"{today_str}_Linearity_{safe_e19_value}_P.xlsm"
-                final_save_path = os.path.join(save_directory, final_filename)
-                
-                # 파일 저장
-                wb.save(final_save_path)
-                log.append(f"✔ 엑셀 파일 저장 완료: {final_filename}")
-                
-                # PDF 파일 생성
-                pdf_filename = f"{today_str}_Linearity_{safe_e19_value}_P.pdf"
-                pdf_save_path = os.path.join(save_directory, pdf_filename)
-                
-                log.append(f"  - PDF 파일 생성 중...")
-                if export_excel_to_pdf(final_save_path, pdf_save_path):
-                    log.append(f"✔ PDF 파일 저장 완료: {pdf_filename}")
-                else:
-                    log.append(f"! PDF 파일 생성 실패: {pdf_filename}")
-                
-                file_counter += 1
-                
-            except Exception as e:
-                log.append(f"! {file_counter}번째 파일 처리 중 오류: {e}")
-                continue
-        
-        return {
-            "success": True, 
-            "error": None, 
-            "log": log, 
-            "files_created": file_counter - 1
-        }
+        # 분석 항목별 생성 (PDF 변환은 Pass인 파일만, Excel 작업자 풀에서)
+        result = linearity_batch.process_linearity_batch(
+            template, linearity_data, save_directory,
+            workers=workers, export_pdf=excel_com.export_excel_to_pdf,
+            excel_workers=excel_workers, native_pdf=native_pdf, incremental=incremental,
+            on_output=on_output, timer=timer
+        )
+        result["log"] = log + result["log"]
+        timer.finish()
+        timing.log_record(timer.to_record(
+            module="linearity", analytes=len(linearity_data),
+            files_created=result["files_created"], files_skipped=result.get("files_skipped", 0),
+        ))
+        result["timer"] = timer
+        return result
         
     except Exception as e:
+        metrics.FAILURES.inc(source="linearity", exception=type(e).__name__)
         return {
             "success": False, 
             "error": str(e), 
@@ -216,6 +90,98 @@ def process_linearity_files(excel_template_path, csv_data_path, save_directory):
             "files_created": 0
         }
 
+@st.cache_resource(max_entries=4, show_spinner=False)
+def load_linearity_template(content_hash, _template_bytes):
+    """업로드된 템플릿을 내용 해시 기준으로 캐시하는 함수 (세션 간 공유, 파싱은 한 번만)"""
+    import linearity_workbook
+    metrics.CACHE_MISSES.inc(cache="linearity_template")
+    return linearity_workbook.LinearityTemplate(_template_bytes)
+
+def get_linearity_template(template_bytes):
+    """캐시된 템플릿 가져오기 (캐시 조회 수를 메트릭에 기록, 적중률 = 1 - 미스/조회)"""
+    import linearity_workbook
+    metrics.CACHE_REQUESTS.inc(cache="linearity_template")
+    return load_linearity_template(linearity_workbook.hash_bytes(template_bytes), template_bytes)
+
+@st.cache_resource(show_spinner=False)
+def start_prewarm():
+    """
+    서버에서 한 번만 실행: 메트릭 내보내기 시작, 작업 스레드를 미리 띄우고 변환기 예열 작업 등록
+    (REAF_PREWARM=0 이면 예열은 건너뜀, 걸린 시간은 서버 로그에 출력)
+    """
+    metrics.start_exporters()
+    manager = job_queue.get_job_manager()
+    manager.start()
+    if os.environ.get("REAF_PREWARM", "1") == "0":
+        return None
+    import prewarm
+    return manager.submit(lambda job: prewarm.prewarm_converters(), label="prewarm")
+
+@st.fragment(run_every=1.0)
+def show_job_progress(job_id):
+    """백그라운드 작업 진행 상태 표시 (1초마다 갱신, 끝나면 전체 화면을 다시 그림)"""
+    job = job_queue.get_job_manager().get(job_id)
+    if job is None or job.finished:
+        st.rerun()
+    if job.status == "queued":
+        position = job_queue.get_job_manager().queue_position(job_id)
+        st.info(f"⏳ Waiting in queue, position {position or 1}... (대기 중, {position or 1}번째) - {job.label}")
+        return
+    text = f"{job.message or 'Running... (실행 중)'} - {job.label} ({job.elapsed:.0f}s)"
+    if job.progress is None:
+        st.progress(0, text=text)
+    else:
+        st.progress(job.progress, text=f"{text} {job.progress * 100:.0f}%")
+
+@st.fragment(run_every=2.0)
+def show_job_stats():
+    """사이드바: 공용 작업 실행기의 대기열 길이와 사용률 (2초마다 갱신)"""
+    stats = job_queue.get_job_manager().stats()
+    st.caption("Conversion queue (변환 대기열)")
+    st.progress(
+        stats["utilization"],
+        text=f"Workers busy (실행 중): {stats['running']}/{stats['max_workers']}",
+    )
+    st.caption(f"Waiting (대기): {stats['queued']}/{stats['max_queue']}")
+
+def show_timing(timer):
+    """단계별 시간 요약 표 (접이식, 느린 페이지 포함)"""
+    if timer is None or not timer.stages:
+        return
+    with st.expander(f"⏱️ Stage timings (단계별 시간) - {timer.total or 0:.2f}s"):
+        st.dataframe(timer.summary_rows(), hide_index=True, width="stretch")
+        slow = timer.slow_pages()
+        if slow:
+            st.caption("Slow pages (느린 페이지)")
+            st.dataframe(
+                [{"page": page, "seconds": round(seconds, 3), "chars": chars} for page, seconds, chars in slow],
+                hide_index=True, width="stretch",
+            )
+
+def show_parse_warnings(quality):
+    """파싱 이상 징후 경고 (보고서 형식 변경으로 행이 빠졌을 수 있는 경우)"""
+    if quality is None:
+        return
+    warnings = quality.warnings()
+    if warnings:
+        st.warning(
+            "⚠️ Parse warnings - please check the report layout (파싱 경고 - 보고서 형식을 확인하세요)\n\n"
+            + "\n".join(f"- {warning}" for warning in warnings)
+        )
+
+def submit_job(target, label):
+    """
+    현재 세션 이름으로 작업 등록 (대기열이 가득 차면 안내 메시지를 표시하고 None 반환)
+    """
+    try:
+        return job_queue.get_job_manager().submit(target, label=label, owner=st.session_state.job_owner)
+    except job_queue.JobRejected as e:
+        st.warning(f"⏳ {e}")
+        return None
+
+# 변환기 예열 (첫 세션이 열릴 때 한 번, 로그인 화면과 동시에 백그라운드에서 진행)
+start_prewarm()
+
 # Simple user credentials (username:password)
 USERS = {
     "bmserv": "nakakojo",
@@ -228,6 +194,12 @@ if "skip_login" not in st.session_state:
     st.session_state.skip_login = False
 if "username" not in st.session_state:
     st.session_state.username = None
+if "job_owner" not in st.session_state:
+    st.session_state.job_owner = uuid.uuid4().hex
+if "pdf_job_id" not in st.session_state:
+    st.session_state.pdf_job_id = None
+if "linearity_job_id" not in st.session_state:
+    st.session_state.linearity_job_id = None
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Login screen
@@ -255,6 +227,9 @@ if st.session_state.logged_in:
 else:
     st.sidebar.info("👤 Using without login (로그인 없이 사용 중)")
 
+with st.sidebar:
+    show_job_stats()
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Main UI
 # ─────────────────────────────────────────────────────────────────────────────
@@ -307,16 +282,25 @@ pdf_file = st.file_uploader("Upload PDF File (PDF 파일 업로드)", type=["pdf
 device = st.selectbox("Select Analyzer (장비 선택)", ["cobas Pro CC (c503, c703)", "cobas Pro IM (e801)"])
 mode_options = ["Barcode mode (Barcode 모드)", "Sequence mode (Sequence 모드)"]
 mode = st.selectbox("Select Mode (모드 선택)", mode_options)
+annotate_review_pdf = st.checkbox("📝 Create annotated review PDF (검토용 주석 PDF 생성)", value=False)
+flagged_pages_pdf = st.checkbox("📑 Create flagged-samples PDF (Alarm/Rerun 샘플 페이지만 PDF로 저장)", value=False)
+sample_filter_text = ""
+if flagged_pages_pdf:
+    sample_filter_text = st.text_input("Additional Sample IDs / Seq No. (추가 포함할 샘플, 쉼표로 구분)", "")
+timing_sheet = st.checkbox("⏱️ Add Timing sheet to Excel (엑셀에 단계별 시간 시트 추가)", value=False)
 
 # Start conversion button
 if st.button("🔄 Start Conversion (변환 시작)"):
     if pdf_file is None:
         st.error("Please upload a PDF file. (PDF 파일을 업로드 해주세요.)")
     else:
-        # Save uploaded PDF to temp file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+        # Save uploaded PDF to a work directory for this conversion
+        # (결과 지우기 / 보관 시간이 지나면 폴더째 삭제, 남은 폴더도 24시간 뒤 정리)
+        import output_bundle
+        work_dir = output_bundle.create_work_directory("pdf")
+        tmp_path = os.path.join(work_dir, "input.pdf")
+        with open(tmp_path, "wb") as tmp:
             tmp.write(pdf_file.getbuffer())
-            tmp_path = tmp.name
 
         # Map to module names (without file extension)
         module_map = {
@@ -327,6 +311,7 @@ if st.button("🔄 Start Conversion (변환 시작)"):
         }
         mod_name = module_map.get((device, mode))
         if not mod_name:
+            shutil.rmtree(work_dir, ignore_errors=True)
             st.error("Unsupported analyzer/mode combination. (지원하지 않는 장비/모드 조합입니다.)")
             st.stop()
 
@@ -334,35 +319,135 @@ if st.button("🔄 Start Conversion (변환 시작)"):
         try:
             mod = importlib.import_module(mod_name)
         except Exception as e:
+            shutil.rmtree(work_dir, ignore_errors=True)
             st.error(f"Failed to load module: {mod_name} (모듈 불러오기 실패)\n{str(e)}")
             st.stop()
 
-        # Convert PDF to Excel
-        with st.spinner("Converting... please wait. (변환 중입니다. 잠시만 기다려주세요...)"):
+        # Annotated review PDF path (Data Alarm / Rerun / COI Reac highlights)
+        annotated_path = None
+        if annotate_review_pdf:
+            annotated_path = os.path.join(work_dir, "annotated.pdf")
+
+        # Flagged-samples PDF path (alarm / rerun / listed samples only)
+        flagged_path = None
+        sample_filter = [s.strip() for s in sample_filter_text.split(",") if s.strip()]
+        if flagged_pages_pdf:
+            flagged_path = os.path.join(work_dir, "flagged.pdf")
+
+        # PDF 파일명과 동일한 이름으로 기본값 설정 (확장자만 .xlsx로 변경)
+        base_name = os.path.splitext(os.path.basename(pdf_file.name))[0]
+
+        # 단계별 시간 측정 (결과 화면 표와 서버 로그, 선택 시 엑셀 Timing 시트)
+        import timing
+        timer = timing.Timer(pdf_file.name, sheet=timing_sheet)
+        # 페이지별 파싱 카운터 (이상 징후는 결과 화면 경고와 메트릭 파일로)
+        import parse_quality
+        quality = parse_quality.ParseQuality(mod_name, pdf_file.name)
+
+        def convert_pdf(job, mod=mod, work_dir=work_dir, tmp_path=tmp_path, annotated_path=annotated_path,
+                        flagged_path=flagged_path, sample_filter=sample_filter, base_name=base_name, timer=timer,
+                        quality=quality):
+            # 결과 파일(엑셀/주석 PDF/플래그 PDF)은 작업이 정리될 때 폴더째 삭제
+            job.cleanup_paths.append(work_dir)
+            job.update(message="Converting... (변환 중)")
+
+            def on_progress(info):
+                # 페이지 추출이 변환 시간의 대부분 - 나머지(엑셀/PDF 저장)는 마지막 10%
+                job.update(info.fraction * 0.9, info.describe())
+                if info.finished:
+                    job.update(message="Writing Excel... (엑셀 저장 중)")
+
             try:
-                output_path = mod.run(tmp_path)
-            except Exception as e:
-                st.error(f"Error during PDF conversion: {str(e)} (PDF 변환 중 오류 발생)")
-                st.stop()
-
-        # Provide download link for the generated Excel file with filename input
-        if output_path and os.path.exists(output_path):
-            with open(output_path, "rb") as f:
-                data = f.read()
-            # PDF 파일명과 동일한 이름으로 기본값 설정 (확장자만 .xlsx로 변경)
-            pdf_filename = os.path.basename(pdf_file.name)
-            base_name = os.path.splitext(pdf_filename)[0]
-            default_name = f"{base_name}.xlsx"
-            save_name = st.text_input("Save as (저장 이름)", default_name)
-            st.success("✅ Conversion completed! (변환이 완료되었습니다!)")
+                output_path = mod.run(
+                    tmp_path,
+                    annotated_pdf_path=annotated_path,
+                    flagged_pdf_path=flagged_path,
+                    sample_filter=sample_filter,
+                    output_path=os.path.join(work_dir, "output.xlsx"),
+                    progress_callback=on_progress,
+                    timer=timer,
+                    quality=quality,
+                )
+            finally:
+                # 업로드한 PDF는 변환이 끝나면 필요 없음
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            return {
+                "output_path": output_path,
+                "annotated_path": annotated_path,
+                "flagged_path": flagged_path,
+                "base_name": base_name,
+                "timer": timer,
+                "quality": quality,
+            }
+
+        # Convert PDF to Excel in the background (결과는 세션에 보관)
+        job = submit_job(convert_pdf, pdf_file.name)
+        if job is not None:
+            # 이전 변환 결과는 더 이상 표시하지 않으므로 파일과 함께 정리
+            if st.session_state.pdf_job_id:
+                job_queue.get_job_manager().discard(st.session_state.pdf_job_id)
+            st.session_state.pdf_job_id = job.job_id
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+# Conversion status and results (kept across reruns)
+pdf_job = job_queue.get_job_manager().get(st.session_state.pdf_job_id) if st.session_state.pdf_job_id else None
+if pdf_job is not None and not pdf_job.finished:
+    show_job_progress(pdf_job.job_id)
+elif pdf_job is not None and pdf_job.status == "failed":
+    st.error(f"Error during PDF conversion: {pdf_job.error} (PDF 변환 중 오류 발생)")
+elif pdf_job is not None:
+    result = pdf_job.result
+    output_path = result["output_path"]
+    base_name = result["base_name"]
+
+    # Provide download link for the generated Excel file with filename input
+    if output_path and os.path.exists(output_path):
+        with open(output_path, "rb") as f:
+            data = f.read()
+        save_name = st.text_input("Save as (저장 이름)", f"{base_name}.xlsx", key=f"save_name_{pdf_job.job_id}")
+        st.success(f"✅ Conversion completed! (변환이 완료되었습니다!) - {pdf_job.label}, {pdf_job.elapsed:.1f}s")
+        st.download_button(
+            label="📥 Download Excel (Excel 다운로드)",
+            data=data,
+            file_name=save_name,
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+        annotated_path = result["annotated_path"]
+        flagged_path = result["flagged_path"]
+        if annotated_path and os.path.exists(annotated_path):
+            with open(annotated_path, "rb") as f:
+                annotated_data = f.read()
             st.download_button(
-                label="📥 Download Excel (Excel 다운로드)",
-                data=data,
-                file_name=save_name,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                label="📥 Download Annotated PDF (검토용 PDF 다운로드)",
+                data=annotated_data,
+                file_name=f"{base_name}_annotated.pdf",
+                mime="application/pdf"
             )
-        else:
-            st.error("Failed to generate Excel file. (엑셀 파일을 생성하지 못했습니다.)")
+        if flagged_path and os.path.exists(flagged_path):
+            with open(flagged_path, "rb") as f:
+                flagged_data = f.read()
+            st.download_button(
+                label="📥 Download Flagged-Samples PDF (플래그 샘플 PDF 다운로드)",
+                data=flagged_data,
+                file_name=f"{base_name}_flagged.pdf",
+                mime="application/pdf"
+            )
+        elif flagged_path:
+            st.info("No alarm/rerun samples found for the flagged PDF. (플래그된 샘플이 없습니다.)")
+        show_parse_warnings(result.get("quality"))
+        show_timing(result.get("timer"))
+    else:
+        st.error("Failed to generate Excel file. (엑셀 파일을 생성하지 못했습니다.)")
+        show_parse_warnings(result.get("quality"))
+
+    if st.button("🗑️ Clear result (결과 지우기)", key="clear_pdf_job"):
+        job_queue.get_job_manager().discard(pdf_job.job_id)
+        st.session_state.pdf_job_id = None
+        st.rerun()
 
 # Linearity_ED2 워크북 자동 입력 기능 for bmserv user
 if st.session_state.logged_in and st.session_state.username == "bmserv":
@@ -376,7 +461,7 @@ if st.session_state.logged_in and st.session_state.username == "bmserv":
         1. **Linearity_ED2 워크북 자동 입력 실행**: 버튼을 클릭하여 자동화 기능을 실행합니다
         2. **Linearity_ED2_WB 파일을 선택합니다**
         3. **데이터 입력이 완료된 CSV 파일을 선택합니다**
-        4. **평가보고서를 저장할 폴더를 선택합니다**
+        4. **실행이 끝나면 생성된 평가보고서(엑셀/PDF)를 ZIP 파일 하나로 내려받습니다**
         5. **평가 결과가 모두 "Pass" 인 경우, 자동으로 PDF가 생성되며 "Fail"인 경우 엑셀 파일만 생성되므로 보고서 확인 후 개별적으로 수정하면 됩니다**
         
         ---
@@ -385,7 +470,7 @@ if st.session_state.logged_in and st.session_state.username == "bmserv":
         1. **Execute Linearity_ED2 Workbook Auto Input**: Click the button to run the automation function
         2. **Select Linearity_ED2_WB file**
         3. **Select the CSV file with completed data input**
-        4. **Select the folder to save the evaluation report**
+        4. **When finished, download all generated reports (Excel/PDF) as a single ZIP file**
         5. **If all evaluation results are "Pass", a PDF will be automatically generated. If "Fail", only an Excel file will be created, so you can check the report and modify it individually**
         """)
 
@@ -406,137 +491,239 @@ if st.session_state.logged_in and st.session_state.username == "bmserv":
             type=["csv"],
             key="csv_data"
         )
-    
-    # 저장 폴더 선택
-    st.markdown("#### 저장 폴더 선택")
-    
-    # 세션 상태 초기화
-    if "selected_folder" not in st.session_state:
-        st.session_state.selected_folder = ""
-    
-    col1, col2 = st.columns([3, 1])
-    
-    with col1:
-        # 현재 선택된 폴더 표시
-        if st.session_state.selected_folder:
-            st.text_input(
-                "선택된 저장 폴더:", 
-                value=st.session_state.selected_folder,
-                disabled=True,
-                key="display_folder"
+
+    # 사전 점검 (워크북 생성 전, CSV 통계 미리 보기 - Pass/Fail은 템플릿이 있을 때 템플릿 수식으로만 판정)
+    if csv_data and st.button("🔎 사전 점검 (Precheck)", key="linearity_precheck"):
+        import csv
+        import time
+        import linearity_csv
+        import linearity_stats
+        try:
+            start_time = time.perf_counter()
+            linearity_data = linearity_csv.parse_linearity_csv(
+                list(csv.reader(csv_data.getvalue().decode('utf-8-sig').splitlines()))
             )
-        else:
-            st.text_input(
-                "저장 폴더를 선택해주세요", 
-                value="",
-                disabled=True,
-                placeholder="폴더 선택 버튼을 클릭하세요"
+            table = linearity_stats.precheck_table(linearity_data)
+
+            # 템플릿이 있으면 템플릿 수식으로 판정
+            if excel_template and len(table):
+                import linearity_eval
+                template = get_linearity_template(excel_template.getvalue())
+                verdicts = []
+                for record in linearity_data.records:
+                    if record["issues"]:
+                        verdicts.append("Invalid")
+                        continue
+                    cells = template.fill_cells(record)
+                    is_valid, _ = linearity_eval.validate_linearity_cells(
+                        template.formula_model, cells, template.template_cell_value
+                    )
+                    verdicts.append("Pass" if is_valid else "Fail")
+                table["Result"] = verdicts
+
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+            def color_result(value):
+                if value == "Pass":
+                    return "background-color: #C6EFCE"
+                if value == "Fail":
+                    return "background-color: #FFC7CE"
+                if value == "Invalid":
+                    return "background-color: #FFEB9C"
+                return ""
+
+            result_cols = [c for c in ("CSV", "Result") if c in table.columns]
+            st.dataframe(
+                table.style.map(color_result, subset=result_cols).format(precision=2),
+                hide_index=True
             )
-    
-    with col2:
-        if st.button("📁 폴더 선택", key="select_folder_btn"):
-            # tkinter를 사용한 실제 폴더 선택 다이얼로그
-            try:
-                import tkinter as tk
-                from tkinter import filedialog
-                
-                # tkinter 루트 창 생성 (숨김)
-                root = tk.Tk()
-                root.withdraw()
-                root.attributes('-topmost', True)
-                
-                # 폴더 선택 다이얼로그 열기
-                selected_folder = filedialog.askdirectory(
-                    title="저장할 폴더를 선택하세요"
+            invalid_count = int((table["CSV"] == "Invalid").sum())
+            if "Result" in table.columns:
+                pass_count = int((table["Result"] == "Pass").sum())
+                st.caption(
+                    f"{len(table)}개 항목: Pass {pass_count} / Fail {len(table) - pass_count - invalid_count} "
+                    f"/ Invalid {invalid_count} ({elapsed_ms:.0f} ms) - Result는 업로드한 템플릿 수식으로 계산한 판정입니다."
                 )
-                
-                root.destroy()
-                
-                if selected_folder:
-                    st.session_state.selected_folder = selected_folder
-                    st.success("폴더가 선택되었습니다!")
-                    st.rerun()
-                else:
-                    st.info("폴더 선택이 취소되었습니다.")
-                    
-            except Exception as e:
-                st.error(f"폴더 선택 중 오류가 발생했습니다: {e}")
-    
-    # 바탕화면 선택 버튼
-    col_desktop, col_spacer = st.columns([1, 3])
-    with col_desktop:
-        if st.button("🏠 바탕화면 선택", key="desktop_folder"):
-            desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
-            if os.path.exists(desktop_path):
-                st.session_state.selected_folder = desktop_path
-                st.success("바탕화면이 선택되었습니다!")
-                st.rerun()
             else:
-                st.error("바탕화면 폴더를 찾을 수 없습니다.")
-    
-    # 선택된 폴더 정보 표시
-    if st.session_state.selected_folder:
-        st.success(f"✅ 선택된 폴더: `{st.session_state.selected_folder}`")
-        
-        # 폴더 내용 미리보기 (선택사항)
-        try:
-            files_in_folder = os.listdir(st.session_state.selected_folder)
-            file_count = len(files_in_folder)
-            st.info(f"📊 폴더 정보: {file_count}개 항목")
-        except:
-            pass
-    
-    save_folder = st.session_state.selected_folder
+                st.caption(
+                    f"{len(table)}개 항목 / Invalid {invalid_count} ({elapsed_ms:.0f} ms) - "
+                    f"CSV 통계만 표시합니다. 템플릿을 업로드하면 템플릿 수식으로 Pass/Fail도 판정합니다."
+                )
+            if linearity_data.issues:
+                st.warning(
+                    f"⚠️ CSV에 잘못된 값이 {len(linearity_data.issues)}개 있습니다. "
+                    f"해당 항목(Invalid)은 파일을 생성하지 않습니다."
+                )
+                with st.expander("CSV 검증 결과 (Invalid cells)", expanded=False):
+                    st.text("\n".join(linearity_csv.format_issue(issue) for issue in linearity_data.issues))
+        except Exception as e:
+            st.error(f"사전 점검 중 오류가 발생했습니다: {e}")
+
+    # 서버 작업 폴더 (세션마다 하나, 결과는 ZIP으로 내려받음)
+    if "linearity_work_dir" not in st.session_state or not os.path.isdir(st.session_state.linearity_work_dir):
+        import output_bundle
+        st.session_state.linearity_work_dir = output_bundle.create_work_directory("linearity")
+    save_folder = st.session_state.linearity_work_dir
+
+    # 동시 작업 수
+    import linearity_batch
+    col_workers, col_excel = st.columns(2)
+    with col_workers:
+        linearity_workers = st.number_input(
+            "동시 생성 프로세스 수 (Parallel workers)",
+            min_value=1,
+            max_value=max(1, os.cpu_count() or 1),
+            value=1,
+            step=1,
+            help=f"분석 항목(CSV 열)별 워크북을 여러 프로세스에서 동시에 생성합니다. (권장: {linearity_batch.default_worker_count()})",
+            key="linearity_workers"
+        )
+    with col_excel:
+        linearity_excel_workers = st.number_input(
+            "Excel 인스턴스 수 (Excel instances)",
+            min_value=1,
+            max_value=4,
+            value=1,
+            step=1,
+            help="PDF 변환에 동시에 사용할 Excel 인스턴스 수입니다. 인스턴스마다 메모리를 사용하므로 1~2개를 권장합니다.",
+            key="linearity_excel_workers"
+        )
+
+    # PDF 생성 방식
+    linearity_pdf_mode = st.radio(
+        "PDF 생성 방식 (PDF renderer)",
+        ["Excel", "내장 렌더러 (Built-in, Excel 불필요)"],
+        index=0 if sys.platform == "win32" else 1,
+        horizontal=True,
+        help="내장 렌더러는 템플릿 레이아웃으로 3페이지 보고서를 직접 그립니다. Excel이 없는 환경에서도 동작합니다.",
+        key="linearity_pdf_mode"
+    )
+    linearity_incremental = st.checkbox(
+        "변경된 항목만 다시 생성 (Skip unchanged analytes)",
+        value=True,
+        help="같은 세션에서 다시 실행할 때, 작업 폴더의 매니페스트와 비교하여 CSV 열, 템플릿, PDF 방식이 그대로인 항목은 건너뜁니다.",
+        key="linearity_incremental"
+    )
 
     if st.button("🚀 Linearity_ED2 워크북 자동 입력 실행"):
         if not excel_template:
             st.error("Linearity_ED2 템플릿 파일을 업로드해주세요.")
         elif not csv_data:
             st.error("CSV 데이터 파일을 업로드해주세요.")
-        elif not save_folder:
-            st.error("저장 폴더 경로를 입력해주세요.")
-        elif not os.path.exists(save_folder):
-            st.error("입력한 저장 폴더 경로가 존재하지 않습니다.")
         else:
-            with st.spinner("Linearity_ED2 워크북 자동 입력 실행 중..."):
-                try:
-                    # 임시 파일로 저장
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_excel:
-                        tmp_excel.write(excel_template.getbuffer())
-                        excel_path = tmp_excel.name
-                    
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp_csv:
-                        tmp_csv.write(csv_data.getbuffer())
-                        csv_path = tmp_csv.name
-                    
-                    # automate copy 모듈의 핵심 로직을 직접 호출
-                    automate_mod = importlib.import_module("automate copy")
-                    importlib.reload(automate_mod)
-                    
-                    # 핵심 처리 함수 호출 (GUI 없이)
-                    result = process_linearity_files(excel_path, csv_path, save_folder)
-                    
-                    if result["success"]:
-                        st.success(f"✅ 성공적으로 완료되었습니다! {result['files_created']}개 파일이 생성되었습니다.")
-                        st.info(f"저장 위치: {save_folder}")
-                        if result["log"]:
-                            st.text_area("처리 로그:", "\n".join(result["log"]), height=200)
-                    else:
-                        st.error(f"❌ 처리 중 오류가 발생했습니다: {result['error']}")
-                        if result["log"]:
-                            st.text_area("오류 로그:", "\n".join(result["log"]), height=200)
-                    
-                    # 임시 파일 정리
+            try:
+                # 임시 파일로 저장
+                with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_excel:
+                    tmp_excel.write(excel_template.getbuffer())
+                    excel_path = tmp_excel.name
+                
+                with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp_csv:
+                    tmp_csv.write(csv_data.getbuffer())
+                    csv_path = tmp_csv.name
+                
+                # 템플릿은 내용 해시 기준으로 캐시된 것을 사용
+                template = get_linearity_template(excel_template.getvalue())
+                
+                options = dict(
+                    template=template, workers=int(linearity_workers),
+                    excel_workers=int(linearity_excel_workers),
+                    native_pdf=linearity_pdf_mode != "Excel",
+                    incremental=linearity_incremental,
+                )
+                
+                def run_linearity(job, excel_path=excel_path, csv_path=csv_path, save_folder=save_folder, options=options):
+                    import output_bundle
                     try:
-                        os.unlink(excel_path)
-                        os.unlink(csv_path)
-                    except:
-                        pass
+                        total = 1  # CSV를 읽은 뒤 on_start에서 분석 항목 수로 바뀜
+                        workbooks = []
                         
-                except Exception as e:
-                    st.error(f"Linearity_ED2 워크북 자동 입력 실행 중 오류 발생: {e}")
-                    import traceback
-                    st.text_area("상세 오류:", traceback.format_exc(), height=200)
+                        # 핵심 처리 함수 호출 (GUI 없이) - 결과 파일은 만들어지는 대로 ZIP에 추가
+                        # ZIP은 작업 폴더에 파일로 남기고 (결과 지우기 / 보관 시간이 지나면 삭제) 내려받을 때만 읽음
+                        zip_path = os.path.join(save_folder, f"{job.job_id}.zip")
+                        with output_bundle.OutputBundle(path=zip_path) as bundle:
+                            def on_output(path):
+                                bundle.add_file(path)
+                                if path.endswith(".xlsm"):
+                                    workbooks.append(path)
+                                    job.update(len(workbooks) / total, f"{len(workbooks)}/{total}개 워크북 준비됨")
+                            
+                            def on_start(count):
+                                nonlocal total
+                                total = max(1, count)
+                            
+                            job.update(0.0, "Linearity_ED2 워크북 자동 입력 실행 중...")
+                            result = process_linearity_files(
+                                excel_path, csv_path, save_folder, on_output=on_output, on_start=on_start, **options
+                            )
+                            if not bundle.file_count:
+                                return {"result": result, "zip_path": None, "file_count": 0, "size": 0}
+                            bundle.close()
+                            size = bundle.size
+                            job.cleanup_paths.append(bundle.save())
+                            return {
+                                "result": result,
+                                "zip_path": zip_path,
+                                "file_count": bundle.file_count,
+                                "size": size,
+                            }
+                    finally:
+                        # 임시 파일 정리
+                        try:
+                            os.unlink(excel_path)
+                            os.unlink(csv_path)
+                        except:
+                            pass
+                
+                job = submit_job(run_linearity, csv_data.name)
+                if job is not None:
+                    st.session_state.linearity_job_id = job.job_id
+                else:
+                    os.unlink(excel_path)
+                    os.unlink(csv_path)
+                    
+            except Exception as e:
+                st.error(f"Linearity_ED2 워크북 자동 입력 실행 중 오류 발생: {e}")
+                import traceback
+                st.text_area("상세 오류:", traceback.format_exc(), height=200)
+
+    # 실행 상태와 결과 (화면을 다시 그려도 유지)
+    linearity_job_id = st.session_state.linearity_job_id
+    linearity_job = job_queue.get_job_manager().get(linearity_job_id) if linearity_job_id else None
+    if linearity_job is not None and not linearity_job.finished:
+        show_job_progress(linearity_job.job_id)
+    elif linearity_job is not None and linearity_job.status == "failed":
+        st.error(f"Linearity_ED2 워크북 자동 입력 실행 중 오류 발생: {linearity_job.error}")
+        st.text_area("상세 오류:", linearity_job.traceback, height=200)
+    elif linearity_job is not None:
+        job_result = linearity_job.result
+        result = job_result["result"]
+        if result["success"]:
+            skipped_note = f" ({result['files_skipped']}개 항목은 변경 없음)" if result.get("files_skipped") else ""
+            st.success(f"✅ 성공적으로 완료되었습니다! {result['files_created']}개 파일이 생성되었습니다.{skipped_note}")
+            zip_path = job_result["zip_path"]
+            if zip_path and os.path.exists(zip_path):
+                with open(zip_path, "rb") as f:
+                    st.download_button(
+                        label=f"📥 결과 ZIP 다운로드 ({job_result['file_count']}개 파일, {job_result['size'] / (1024 * 1024):.1f} MB)",
+                        data=f,
+                        file_name=f"{datetime.fromtimestamp(linearity_job.finished_at).strftime('%Y%m%d')}_Linearity.zip",
+                        mime="application/zip",
+                        key="linearity_zip_download"
+                    )
+            elif zip_path:
+                st.warning("결과 ZIP 파일이 정리되었습니다. 다시 실행해주세요. (The result ZIP has expired.)")
+            if result["log"]:
+                st.text_area("처리 로그:", "\n".join(result["log"]), height=200)
+            show_timing(result.get("timer"))
+        else:
+            st.error(f"❌ 처리 중 오류가 발생했습니다: {result['error']}")
+            if result["log"]:
+                st.text_area("오류 로그:", "\n".join(result["log"]), height=200)
+
+        if st.button("🗑️ 결과 지우기 (Clear result)", key="clear_linearity_job"):
+            job_queue.get_job_manager().discard(linearity_job.job_id)
+            st.session_state.linearity_job_id = None
+            st.rerun()
 
 # Sidebar version info
 st.sidebar.markdown("---")
@@ -0,0 +1,484 @@
+"""
+성능 벤치마크 도구 (단계별 시간 / 처리량 / 최대 메모리)
+
+    python benchmark.py [--pages 1 10 100 1000] [--analytes 1 20 100] [--modules CC_ID ...]
+                        [--repeat N] [--save-baseline] [--threshold 0.1] [--strict]
+
+- PDF 변환: synthetic_reports로 만든 합성 보고서(페이지 수별)를 각 변환 모듈로
+  단계별(PDF 열기, 텍스트 추출, 파싱, 워크북 작성, 저장)과 전체(run)로 나눠 측정
+- Linearity: process_linearity_files를 분석 항목 수별로 측정 (Excel 없이 PyMuPDF PDF 보고서)
+- 측정마다 새 파이썬 프로세스에서 실행하므로 최대 메모리(peak RSS)가 측정 단위별로 분리됩니다.
+
+결과는 이력 파일(JSON, 기본: 이 폴더의 benchmark_history.json)에 실행마다 추가되고,
+기준 파일(기본: benchmark_baseline.json)이 있으면 기준 대비 변화를 표로 보여줍니다.
+--save-baseline을 주면 이번 결과를 새 기준으로 저장하고, --strict를 주면 기준보다
+threshold 이상 느려진 항목이 있을 때 종료 코드 1을 반환합니다.
+"""
+import argparse
+import contextlib
+import csv
+import importlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import synthetic_reports
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 변환 모듈 약칭 → 모듈 이름
+CONVERTERS = {
+    f"{analyzer}_{mode}": module_name
+    for (analyzer, mode), module_name in synthetic_reports.CONVERTER_MODULES.items()
+}
+
+DEFAULT_PAGES = [1, 10, 100, 1000]
+DEFAULT_ANALYTES = [1, 20, 100]
+
+# 합성 보고서 / Linearity CSV의 난수 시드 (입력이 매번 같아야 결과를 비교할 수 있음)
+INPUT_SEED = 2024
+
+# 기준 대비 변화를 표시하지 않을 최소 시간 (초) - 아주 짧은 단계의 흔들림은 무시
+MIN_COMPARE_SECONDS = 0.005
+
+def get_history_path():
+    return os.path.join(HERE, "benchmark_history.json")
+
+def get_baseline_path():
+    return os.path.join(HERE, "benchmark_baseline.json")
+
+def peak_rss_mb():
+    """현재 프로세스의 최대 메모리 사용량 (MB, 측정할 수 없으면 None)"""
+    try:
+        import resource
+    except ImportError:
+        # Windows: resource 모듈 없음 (psutil이 있으면 peak working set 사용)
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except (ImportError, AttributeError):
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _quiet():
+    """변환 모듈의 진행 로그(print)를 숨김 (측정 결과 JSON만 표준 출력에 남김)"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+def prepare_report(work_dir, converter, pages):
+    """
+    합성 보고서 PDF 준비 (같은 설정의 파일이 이미 있으면 다시 만들지 않음)
+
+    Returns:
+        str: PDF 경로
+    """
+    analyzer, mode = converter.split("_")
+    pdf_path = os.path.join(work_dir, "inputs", f"{converter}_{pages}p_s{INPUT_SEED}.pdf")
+    if not os.path.exists(pdf_path) or not os.path.exists(synthetic_reports.truth_path_for(pdf_path)):
+        synthetic_reports.generate_report(pdf_path, analyzer=analyzer, mode=mode, pages=pages, seed=INPUT_SEED)
+    return pdf_path
+
+def build_linearity_template(path):
+    """
+    Linearity_ED2 형식의 최소 템플릿 생성 (실제 템플릿이 없을 때 사용)
+
+    Instructions / Linearity / Data Entry 시트에 채우기 매핑(linearity_ed2_fill.json)이
+    쓰는 셀과, 평균과 목표값의 차이로 Pass/Fail을 판정하는 수식만 넣습니다.
+    """
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    wb.active.title = "Instructions"
+    linearity = wb.create_sheet("Linearity")
+    data_entry = wb.create_sheet("Data Entry")
+    linearity["B2"] = "Linearity Verification"
+    for i, col in enumerate("EFGHI"):
+        report_col = chr(ord(col) - 1)
+        data_entry[f"{col}20"] = (i + 1) * 10.0  # 레벨별 목표값
+        linearity[f"{report_col}28"] = f"=ABS('Data Entry'!{col}19-'Data Entry'!{col}20)/'Data Entry'!{col}20*100"
+        linearity[f"{report_col}29"] = (
+            f"=IF(ISBLANK('Data Entry'!{col}32),\"\",IF({report_col}28<='Data Entry'!$F$11,\"Pass\",\"Fail\"))"
+        )
+    wb.save(path)
+    return path
+
+def build_linearity_csv(path, analytes, seed=INPUT_SEED, fail_rate=0.2):
+    """
+    분석 항목 analytes개의 Linearity CSV 생성 (항목이 열, C열부터)
+
+    레벨별 반복 측정값은 목표값(10, 20, ... 50) 근처이고, fail_rate 비율의 항목은
+    허용 오차(ATEPct 15%)를 넘도록 치우치게 만듭니다.
+    """
+    rng = random.Random(seed)
+    rows = [["", ""] + [""] * analytes for _ in range(49)]
+    for i in range(analytes):
+        col = 2 + i
+        rows[1][col] = f"BENCH{i + 1:03d}"        # Analyte
+        rows[2][col] = "mg/dL"                    # Units
+        rows[4][col] = "c503 #1"                  # Instrument
+        rows[5][col] = "bench"                    # Analyst
+        rows[6][col] = "2024-01-01"               # Date
+        rows[14][col] = "15"                      # ATEPct
+        bias = 1.3 if rng.random() < fail_rate else 1.0
+        for level in range(5):
+            target = (level + 1) * 10.0
+            rows[36 + level][col] = f"{target * bias * rng.uniform(0.97, 1.03):.3f}"  # Replicate1
+            rows[41 + level][col] = f"{target * bias * rng.uniform(0.97, 1.03):.3f}"  # Replicate2
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(rows)
+    return path
+
+def prepare_linearity(work_dir, analytes, template_path=None):
+    """
+    Linearity 입력 준비
+
+    Returns:
+        tuple: (템플릿 경로, CSV 경로)
+    """
+    inputs = os.path.join(work_dir, "inputs")
+    os.makedirs(inputs, exist_ok=True)
+    if not template_path:
+        template_path = os.path.join(inputs, "linearity_template.xlsx")
+        if not os.path.exists(template_path):
+            build_linearity_template(template_path)
+    csv_path = os.path.join(inputs, f"linearity_{analytes}a_s{INPUT_SEED}.csv")
+    if not os.path.exists(csv_path):
+        build_linearity_csv(csv_path, analytes)
+    return template_path, csv_path
+
+def measure_converter_stages(module_name, pdf_path, out_dir):
+    """
+    변환 단계를 따로따로 측정 (run()과 같은 순서와 인자)
+
+    Returns:
+        dict: {"pages", "rows", "stages": {단계: 초}}
+    """
+    import pdfplumber
+    import timing
+    mod = importlib.import_module(module_name)
+    sequence = "_Seq_" in module_name
+    stages = {}
+
+    started = time.perf_counter()
+    pdf = pdfplumber.open(pdf_path)
+    total_pages = len(pdf.pages)
+    stages["open"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with pdf:
+        texts = [page.extract_text() or "" for page in pdf.pages]
+    stages["extract_text"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    extracted = []
+    pdf_lines = []
+    test_counter = 0
+    with _quiet():
+        for page_num, text in enumerate(texts, 1):
+            lines = text.split('\n')
+            pdf_lines.append({'page': page_num, 'lines': [line.strip() for line in lines if line.strip()]})
+            if page_num == 1:
+                result = mod.extract_data_from_first_page(lines)
+            elif sequence:
+                result = mod.extract_data_from_other_pages(lines, test_counter)
+            else:
+                result = mod.extract_data_from_other_pages(lines)
+            if sequence:
+                test_counter = result[3]
+            for row in result[2]:
+                row['page'] = page_num
+            extracted.extend(result[2])
+    stages["parse"] = time.perf_counter() - started
+
+    # create_excel_file은 저장까지 하므로 저장 시간(excel_save span)을 빼서 작성 시간을 구함
+    timer = timing.Timer(os.path.basename(pdf_path))
+    output_path = os.path.join(out_dir, f"{module_name}_stages.xlsx")
+    started = time.perf_counter()
+    with _quiet():
+        mod.create_excel_file(os.path.basename(pdf_path), extracted, output_path, [], pdf_lines, timer)
+    total = time.perf_counter() - started
+    save = timer.stages.get("excel_save", [0.0])[0]
+    stages["excel_build"] = total - save
+    stages["excel_save"] = save
+    return {"pages": total_pages, "rows": len(extracted), "stages": stages}
+
+def measure_converter_run(module_name, pdf_path, out_dir):
+    """
+    변환 전체(run) 측정 (파싱/처리량 메트릭에는 기록하지 않음)
+
+    Returns:
+        dict: {"pages", "rows", "stages": {"end_to_end": 초}}
+    """
+    import parse_quality
+    mod = importlib.import_module(module_name)
+    quality = parse_quality.ParseQuality(module_name, os.path.basename(pdf_path), record=False)
+    output_path = os.path.join(out_dir, f"{module_name}_run.xlsx")
+    started = time.perf_counter()
+    with _quiet():
+        result = mod.run(pdf_path, output_path=output_path, quality=quality)
+    seconds = time.perf_counter() - started
+    if not result:
+        raise RuntimeError(f"{module_name} 변환 실패: {pdf_path}")
+    totals = quality.totals()
+    return {"pages": totals["pages"], "rows": totals["rows"], "stages": {"end_to_end": seconds}}
+
+def measure_linearity(template_path, csv_path, out_dir):
+    """
+    process_linearity_files 측정 (증분 처리 끔, PyMuPDF PDF 보고서)
+
+    Returns:
+        dict: {"files", "stages": {단계: 초, "end_to_end": 초}}
+    """
+    # app을 불러올 때 변환 모듈 예열이 돌지 않도록 함
+    os.environ["REAF_PREWARM"] = "0"
+    with _quiet():
+        import app
+    started = time.perf_counter()
+    with _quiet():
+        result = app.process_linearity_files(template_path, csv_path, out_dir, native_pdf=True, incremental=False)
+    seconds = time.perf_counter() - started
+    if not result.get("success"):
+        raise RuntimeError(result.get("error") or "Linearity 처리 실패")
+    stages = {name: value[0] for name, value in result["timer"].stages.items()}
+    stages["end_to_end"] = seconds
+    return {"files": result.get("files_created", 0), "stages": stages}
+
+def run_worker(spec):
+    """새 프로세스에서 측정 하나를 실행하고 결과(JSON)를 표준 출력에 씀"""
+    out_dir = tempfile.mkdtemp(prefix="reaf_bench_")
+    try:
+        if spec["kind"] == "converter_stages":
+            result = measure_converter_stages(spec["module"], spec["pdf"], out_dir)
+        elif spec["kind"] == "converter_run":
+            result = measure_converter_run(spec["module"], spec["pdf"], out_dir)
+        else:
+            result = measure_linearity(spec["template"], spec["csv"], out_dir)
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    result["peak_rss_mb"] = peak_rss_mb()
+    print(json.dumps(result))
+
+def _spawn(spec):
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", json.dumps(spec)],
+        cwd=HERE, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "측정 실패")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def measure(spec, repeat=1):
+    """
+    측정 하나를 repeat번 실행해 단계별 최솟값과 최대 메모리를 반환
+    (최솟값: 다른 프로세스의 간섭이 가장 적은 실행)
+    """
+    best = None
+    for _ in range(max(1, repeat)):
+        result = _spawn(spec)
+        if best is None:
+            best = result
+            continue
+        for name, seconds in result["stages"].items():
+            best["stages"][name] = min(best["stages"].get(name, seconds), seconds)
+        if result["peak_rss_mb"] is not None:
+            best["peak_rss_mb"] = max(best["peak_rss_mb"] or 0, result["peak_rss_mb"])
+    return best
+
+def _rate(count, seconds):
+    return count / seconds if seconds > 0 else None
+
+def benchmark_converter(converter, pages, work_dir, repeat=1, log=print):
+    """
+    변환 모듈 하나 × 페이지 수 하나 측정
+
+    Returns:
+        dict: {"pages", "rows", "stages", "pages_per_sec", "rows_per_sec", "peak_rss_mb", "stage_peak_rss_mb"}
+    """
+    module_name = CONVERTERS[converter]
+    pdf_path = prepare_report(work_dir, converter, pages)
+    staged = measure({"kind": "converter_stages", "module": module_name, "pdf": pdf_path}, repeat)
+    full = measure({"kind": "converter_run", "module": module_name, "pdf": pdf_path}, repeat)
+    if full["rows"] != staged["rows"]:
+        log(f"  경고: 단계별 측정({staged['rows']}행)과 전체 측정({full['rows']}행)의 행 수가 다릅니다")
+    seconds = full["stages"]["end_to_end"]
+    stages = dict(staged["stages"])
+    stages["end_to_end"] = seconds
+    return {
+        "pages": full["pages"],
+        "rows": full["rows"],
+        "stages": stages,
+        "pages_per_sec": _rate(full["pages"], seconds),
+        "rows_per_sec": _rate(full["rows"], seconds),
+        "peak_rss_mb": full["peak_rss_mb"],
+        "stage_peak_rss_mb": staged["peak_rss_mb"],
+    }
+
+def benchmark_linearity(analytes, work_dir, template_path=None, repeat=1):
+    """
+    process_linearity_files 분석 항목 수 하나 측정
+
+    Returns:
+        dict: {"analytes", "files", "stages", "analytes_per_sec", "peak_rss_mb"}
+    """
+    template_path, csv_path = prepare_linearity(work_dir, analytes, template_path)
+    result = measure({"kind": "linearity", "template": template_path, "csv": csv_path}, repeat)
+    result["analytes"] = analytes
+    result["analytes_per_sec"] = _rate(analytes, result["stages"]["end_to_end"])
+    return result
+
+def load_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def save_json(path, data):
+    """임시 파일에 쓴 뒤 교체 (중간에 중단되어도 기존 파일은 그대로)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".benchmark_", suffix=".json", dir=directory)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def append_history(run, path=None):
+    """이력 파일에 실행 결과 하나를 추가"""
+    path = path or get_history_path()
+    history = load_json(path, {"runs": []})
+    if not isinstance(history, dict) or not isinstance(history.get("runs"), list):
+        history = {"runs": []}
+    history["runs"].append(run)
+    save_json(path, history)
+
+def compare_runs(run, baseline, threshold=0.1):
+    """
+    기준 실행 대비 변화
+
+    Args:
+        run (dict): 이번 실행 결과
+        baseline (dict): 기준 실행 결과
+        threshold (float): 느려짐/빨라짐으로 표시할 변화율 (0.1 = 10%)
+
+    Returns:
+        list: [(측정 이름, 항목, 기준 값, 이번 값, 변화율, 상태), ...]
+              상태: "slower" / "faster" / "same"
+    """
+    rows = []
+    for name, case in run["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if not base:
+            continue
+        metrics = [(stage, base["stages"].get(stage), seconds) for stage, seconds in case["stages"].items()]
+        metrics.append(("peak_rss_mb", base.get("peak_rss_mb"), case.get("peak_rss_mb")))
+        for metric, before, after in metrics:
+            if before is None or after is None or before <= 0:
+                continue
+            change = after / before - 1
+            if metric != "peak_rss_mb" and max(before, after) < MIN_COMPARE_SECONDS:
+                status = "same"
+            elif change > threshold:
+                status = "slower"
+            elif change < -threshold:
+                status = "faster"
+            else:
+                status = "same"
+            rows.append((name, metric, before, after, change, status))
+    return rows
+
+def format_case(name, case):
+    """측정 결과 한 줄 요약"""
+    stages = "  ".join(
+        f"{stage} {seconds * 1000:.1f}ms" if seconds < 1 else f"{stage} {seconds:.2f}s"
+        for stage, seconds in case["stages"].items()
+    )
+    rss = f"{case['peak_rss_mb']:.0f}MB" if case.get("peak_rss_mb") is not None else "-"
+    if "pages_per_sec" in case:
+        rates = f"{case['pages_per_sec']:.1f} pages/s, {case['rows_per_sec']:.0f} rows/s"
+    else:
+        rates = f"{case['analytes_per_sec']:.1f} analytes/s"
+    return f"{name:<18} {rates:<30} peak {rss:<7} {stages}"
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF 변환 / Linearity 성능 벤치마크")
+    parser.add_argument("--pages", type=int, nargs="*", default=DEFAULT_PAGES, help="합성 보고서 페이지 수")
+    parser.add_argument("--modules", nargs="*", choices=sorted(CONVERTERS), default=sorted(CONVERTERS),
+                        help="측정할 변환 모듈 (CC_ID, CC_Seq, IM_ID, IM_Seq)")
+    parser.add_argument("--analytes", type=int, nargs="*", default=DEFAULT_ANALYTES, help="Linearity 분석 항목 수")
+    parser.add_argument("--template", help="Linearity 템플릿 경로 (없으면 최소 합성 템플릿 사용)")
+    parser.add_argument("--repeat", type=int, default=1, help="측정 반복 횟수 (단계별 최솟값 사용)")
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "reaf_benchmark"),
+                        help="합성 입력 파일 폴더 (다음 실행에서 재사용)")
+    parser.add_argument("--label", default="", help="이력에 남길 설명 (예: 커밋 이름)")
+    parser.add_argument("--history", default=get_history_path(), help="이력 파일 경로")
+    parser.add_argument("--baseline", default=get_baseline_path(), help="기준 파일 경로")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 새 기준으로 저장")
+    parser.add_argument("--threshold", type=float, default=0.1, help="느려짐으로 표시할 변화율 (기본 0.1 = 10%%)")
+    parser.add_argument("--strict", action="store_true", help="기준보다 느려진 항목이 있으면 종료 코드 1")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(json.loads(args.worker))
+        return
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    started = time.perf_counter()
+    run = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "label": args.label,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cases": {},
+    }
+    for converter in args.modules:
+        for pages in args.pages:
+            name = f"{converter}/{pages}p"
+            try:
+                case = benchmark_converter(converter, pages, args.work_dir, args.repeat)
+            except RuntimeError as e:
+                print(f"{name:<18} 측정 실패: {e}")
+                continue
+            run["cases"][name] = case
+            print(format_case(name, case))
+    for analytes in args.analytes:
+        name = f"linearity/{analytes}a"
+        try:
+            case = benchmark_linearity(analytes, args.work_dir, args.template, args.repeat)
+        except RuntimeError as e:
+            print(f"{name:<18} 측정 실패: {e}")
+            continue
+        run["cases"][name] = case
+        print(format_case(name, case))
+    print(f"\n측정 시간: {time.perf_counter() - started:.1f}s")
+
+    append_history(run, args.history)
+    print(f"이력 저장: {args.history}")
+
+    regressions = []
+    baseline = load_json(args.baseline, None)
+    if baseline and baseline.get("cases"):
+        changes = compare_runs(run, baseline, args.threshold)
+        regressions = [row for row in changes if row[5] == "slower"]
+        improvements = [row for row in changes if row[5] == "faster"]
+        print(f"\n기준 대비 ({baseline.get('time', '?')} {baseline.get('label', '')}".rstrip() + ")")
+        for name, metric, before, after, change, status in regressions + improvements:
+            mark = "느려짐" if status == "slower" else "빨라짐"
+            print(f"  {mark} {name:<18} {metric:<14} {before:10.4f} → {after:10.4f}  ({change:+.0%})")
+        print(f"  느려짐 {len(regressions)}개, 빨라짐 {len(improvements)}개, "
+              f"변화 없음 {len(changes) - len(regressions) - len(improvements)}개")
+    if args.save_baseline:
+        save_json(args.baseline, run)
+        print(f"기준 저장: {args.baseline}")
+    if args.strict and regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
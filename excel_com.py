@@ -0,0 +1,578 @@
+"""
+Excel COM 자동화 모듈 (Linearity 검증 및 PDF 변환)
+
+파일 하나당 Excel에서 한 번만 열어서 계산 → Linearity!D29:H29 판정 → (Pass인 경우)
+첫 3개 시트 PDF 변환 → 닫기를 처리합니다. Excel 애플리케이션은 매번 새로 만들지 않고
+스레드마다 하나씩 만들어 재사용합니다 (COM 객체는 만든 스레드에서만 사용 가능).
+여러 인스턴스를 동시에 사용할 때는 ExcelPool로 작업을 나눠 처리합니다.
+
+Windows가 아닌 환경에서 동작을 확인할 수 있도록, 호출을 기록하고 수식 엔진으로 결과를
+계산하는 가짜 백엔드(FakeExcelBackend)를 제공합니다.
+    excel_com.set_backend(excel_com.FakeExcelBackend())
+    또는 환경 변수 REAF_EXCEL_BACKEND=fake
+"""
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+XL_TYPE_PDF = 0
+
+# 판정 셀 위치 (Linearity 시트는 3번째 시트)
+RESULT_SHEET_INDEX = 3
+RESULT_SHEET = "Linearity"
+RESULT_CELLS = ['D29', 'E29', 'F29', 'G29', 'H29']
+
+# 스레드별 Excel 애플리케이션 (재사용)
+_thread_state = threading.local()
+_backend = None
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 백엔드
+# ─────────────────────────────────────────────────────────────────────────────
+class Win32ExcelBackend:
+    """실제 Excel (pywin32)"""
+    name = "win32"
+
+    def initialize_thread(self):
+        import pythoncom
+        pythoncom.CoInitialize()
+
+    def uninitialize_thread(self):
+        import pythoncom
+        pythoncom.CoUninitialize()
+
+    def dispatch(self):
+        import win32com.client
+        return win32com.client.DispatchEx("Excel.Application")
+
+class FakeExcelBackend:
+    """
+    Excel 없이 COM 호출 흐름을 확인하기 위한 가짜 백엔드
+    모든 호출을 calls 리스트에 (이름, 인자) 형태로 기록하고,
+    셀 값은 수식 엔진(linearity_eval)으로 계산합니다.
+    """
+    name = "fake"
+
+    def __init__(self):
+        self.calls = []
+        self.apps = []
+        self._lock = threading.Lock()
+
+    def record(self, name, *args):
+        with self._lock:
+            self.calls.append((name,) + args)
+
+    def calls_named(self, name):
+        return [call for call in self.calls if call[0] == name]
+
+    def initialize_thread(self):
+        self.record("CoInitialize")
+
+    def uninitialize_thread(self):
+        self.record("CoUninitialize")
+
+    def dispatch(self):
+        app = _FakeApplication(self)
+        self.apps.append(app)
+        self.record("Dispatch")
+        return app
+
+class _FakeApplication:
+    def __init__(self, backend):
+        object.__setattr__(self, "_backend", backend)
+        object.__setattr__(self, "Workbooks", _FakeWorkbooks(self))
+        object.__setattr__(self, "ActiveWorkbook", None)
+        object.__setattr__(self, "ActiveSheet", None)
+        object.__setattr__(self, "_selected", [])
+        object.__setattr__(self, "quit", False)
+        object.__setattr__(self, "Version", "16.0")
+
+    def __setattr__(self, name, value):
+        self._backend.record("Set", name, value)
+        object.__setattr__(self, name, value)
+
+    def Calculate(self):
+        self._backend.record("Calculate")
+        if self.ActiveWorkbook is not None:
+            self.ActiveWorkbook._calculate()
+
+    def Sheets(self, names):
+        return _FakeSheetSelection(self.ActiveWorkbook, names)
+
+    def Quit(self):
+        self._backend.record("Quit")
+        object.__setattr__(self, "quit", True)
+
+class _FakeWorkbooks:
+    def __init__(self, app):
+        self._app = app
+
+    def Open(self, path, **kwargs):
+        self._app._backend.record("Open", path, kwargs)
+        workbook = _FakeWorkbook(self._app, path)
+        object.__setattr__(self._app, "ActiveWorkbook", workbook)
+        return workbook
+
+class _FakeWorkbook:
+    def __init__(self, app, path):
+        import openpyxl
+        self._app = app
+        self.FullName = path
+        wb = openpyxl.load_workbook(path, read_only=True)
+        self._sheet_names = list(wb.sheetnames)
+        wb.close()
+        self._values = None
+        self.Worksheets = _FakeWorksheets(self)
+
+    def _calculate(self):
+        import linearity_eval
+        model = linearity_eval.LinearityFormulaModel(self.FullName)
+        self._values = model.evaluate()
+
+    def _value(self, sheet, coord):
+        if self._values is None:
+            self._calculate()
+        value = self._values.get((sheet, coord))
+        if value is None or isinstance(value, (int, float, str)):
+            return value
+        return str(value)  # 오류 값 (#DIV/0! 등)
+
+    def Close(self, SaveChanges=False):
+        self._app._backend.record("Close", self.FullName, SaveChanges)
+        if self._app.ActiveWorkbook is self:
+            object.__setattr__(self._app, "ActiveWorkbook", None)
+
+class _FakeWorksheets:
+    def __init__(self, workbook):
+        self._workbook = workbook
+
+    @property
+    def Count(self):
+        return len(self._workbook._sheet_names)
+
+    def __call__(self, key):
+        if isinstance(key, int):
+            return _FakeWorksheet(self._workbook, self._workbook._sheet_names[key - 1])
+        if key not in self._workbook._sheet_names:
+            raise KeyError(key)
+        return _FakeWorksheet(self._workbook, key)
+
+class _FakeWorksheet:
+    def __init__(self, workbook, name):
+        self._workbook = workbook
+        self.Name = name
+
+    def Range(self, coord):
+        self._workbook._app._backend.record("Range", self.Name, coord)
+        return _FakeRange(self._workbook._value(self.Name, coord))
+
+    def Select(self, replace=True):
+        app = self._workbook._app
+        selected = [self.Name] if replace else app._selected + [self.Name]
+        object.__setattr__(app, "_selected", selected)
+        object.__setattr__(app, "ActiveSheet", _FakeActiveSheet(self._workbook))
+
+class _FakeRange:
+    def __init__(self, value):
+        self.Value = value
+
+class _FakeSheetSelection:
+    def __init__(self, workbook, names):
+        self._workbook = workbook
+        self._names = list(names)
+
+    def Select(self):
+        app = self._workbook._app
+        object.__setattr__(app, "_selected", self._names)
+        object.__setattr__(app, "ActiveSheet", _FakeActiveSheet(self._workbook))
+
+class _FakeActiveSheet:
+    def __init__(self, workbook):
+        self._workbook = workbook
+
+    def ExportAsFixedFormat(self, Type, Filename, **kwargs):
+        app = self._workbook._app
+        app._backend.record("ExportAsFixedFormat", Filename, list(app._selected))
+        try:
+            import pymupdf
+            doc = pymupdf.open()
+            for name in app._selected:
+                doc.new_page().insert_text((72, 72), name)
+            doc.save(Filename)
+            doc.close()
+        except ImportError:
+            with open(Filename, 'wb') as f:
+                f.write(b"%PDF-1.4\n%%EOF\n")
+
+def set_backend(backend):
+    """사용할 백엔드 지정 (None이면 기본값으로 되돌림)"""
+    global _backend
+    _backend = backend
+
+def set_thread_backend(backend):
+    """현재 스레드에서만 사용할 백엔드 지정 (ExcelPool 작업자용)"""
+    _thread_state.backend = backend
+
+def get_backend():
+    """현재 백엔드 (지정하지 않으면 REAF_EXCEL_BACKEND=fake 이면 가짜, 아니면 실제 Excel)"""
+    global _backend
+    backend = getattr(_thread_state, "backend", None)
+    if backend is not None:
+        return backend
+    if _backend is None:
+        if os.environ.get("REAF_EXCEL_BACKEND", "").lower() == "fake":
+            _backend = FakeExcelBackend()
+        else:
+            _backend = Win32ExcelBackend()
+    return _backend
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Excel 애플리케이션 (스레드별 재사용)
+# ─────────────────────────────────────────────────────────────────────────────
+def initialize_thread():
+    """현재 스레드에서 COM 사용 준비 (Excel 전용 작업자 스레드 시작 시 호출)"""
+    try:
+        get_backend().initialize_thread()
+        _thread_state.initialized = True
+    except ImportError:
+        _thread_state.initialized = False
+
+def get_excel_app():
+    """Excel 애플리케이션 인스턴스를 가져오거나 생성하는 함수 (현재 스레드에서 재사용)"""
+    app = getattr(_thread_state, "app", None)
+    if app is None:
+        try:
+            app = get_backend().dispatch()
+            app.Visible = False
+            app.DisplayAlerts = False
+            app.ScreenUpdating = False
+            app.EnableEvents = False
+            _thread_state.app = app
+            print("  - 새로운 Excel 애플리케이션 인스턴스 생성")
+        except Exception as e:
+            print(f"  ! Excel 애플리케이션 생성 오류: {e}")
+            return None
+    return app
+
+def _note_com_error(error):
+    """
+    작업 함수가 잡아서 처리한 COM 오류를 기록 (ExcelPool 작업자가 작업 후 확인하여 인스턴스를 새로 만듦)
+    작업 함수는 호출한 쪽에 False 등을 돌려주므로 예외가 풀까지 전달되지 않습니다.
+    """
+    _thread_state.com_error = error
+
+def take_com_error():
+    """현재 스레드에 기록된 COM 오류를 꺼내고 지움 (없으면 None)"""
+    error = getattr(_thread_state, "com_error", None)
+    _thread_state.com_error = None
+    return error
+
+def cleanup_excel_app():
+    """현재 스레드의 Excel 애플리케이션 정리"""
+    app = getattr(_thread_state, "app", None)
+    if app is None:
+        return
+    _thread_state.app = None
+    try:
+        app.ScreenUpdating = True
+        app.EnableEvents = True
+        app.Quit()
+        print("  - Excel 애플리케이션 정리 완료")
+    except Exception as e:
+        print(f"  - Excel 정리 오류: {e}")
+
+def release_thread():
+    """현재 스레드의 Excel 정리 및 COM 해제 (Excel 전용 작업자 스레드 종료 전 호출)"""
+    cleanup_excel_app()
+    if getattr(_thread_state, "initialized", False):
+        _thread_state.initialized = False
+        try:
+            get_backend().uninitialize_thread()
+        except Exception:
+            pass
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 워크북 작업
+# ─────────────────────────────────────────────────────────────────────────────
+def _open_workbook(excel_app, excel_file_path):
+    return excel_app.Workbooks.Open(
+        os.path.abspath(excel_file_path),
+        UpdateLinks=0,  # 링크 업데이트 안 함
+        ReadOnly=True,  # 읽기 전용으로 열기
+        IgnoreReadOnlyRecommended=True
+    )
+
+def read_linearity_results(excel_app, workbook):
+    """
+    계산 후 Linearity 시트 D29~H29 값을 읽는 함수
+
+    Returns:
+        list: 셀 값 리스트 (읽기 오류인 셀은 None)
+    """
+    excel_app.Calculate()
+    try:
+        ws_linearity = workbook.Worksheets(RESULT_SHEET_INDEX)  # 3번째 시트 (인덱스로 빠른 접근)
+    except Exception:
+        ws_linearity = workbook.Worksheets(RESULT_SHEET)  # 이름으로 폴백
+
+    values = []
+    for cell in RESULT_CELLS:
+        try:
+            values.append(ws_linearity.Range(cell).Value)
+        except Exception as e:
+            print(f"    Linearity {cell}: 읽기 오류 ({e})")
+            values.append(None)
+    return values
+
+def export_first_three_sheets(excel_app, workbook, pdf_file_path):
+    """
+    열려 있는 워크북의 첫 3개 시트를 하나의 PDF로 내보내는 함수
+
+    Returns:
+        bool: 성공 여부
+    """
+    if workbook.Worksheets.Count < 3:
+        print(f"  경고: 시트가 {workbook.Worksheets.Count}개만 있습니다.")
+        return False
+
+    # 첫 3개 시트를 배열로 선택 (실패 시 개별 선택)
+    try:
+        sheet_names = [workbook.Worksheets(i).Name for i in range(1, 4)]
+        excel_app.Sheets(sheet_names).Select()
+    except Exception:
+        workbook.Worksheets(1).Select()
+        for i in range(2, 4):
+            try:
+                workbook.Worksheets(i).Select(False)
+            except Exception:
+                pass
+
+    excel_app.ActiveSheet.ExportAsFixedFormat(
+        Type=XL_TYPE_PDF,
+        Filename=os.path.abspath(pdf_file_path)
+    )
+    return True
+
+def run_linearity_session(excel_file_path, pdf_path_for=None):
+    """
+    파일을 Excel에서 한 번만 열어서 계산, 판정, (Pass인 경우) PDF 변환까지 처리하는 함수
+
+    Args:
+        excel_file_path (str): 저장된 워크북 경로
+        pdf_path_for (callable): pdf_path_for(status_suffix) -> PDF 저장 경로 (None이면 PDF 생략)
+            판정 결과에 따라 파일명이 정해지므로 판정 후에 호출합니다.
+
+    Returns:
+        tuple: (is_valid, status_suffix, pdf_path) - PDF를 만들지 않았으면 pdf_path는 None
+    """
+    import linearity_eval
+
+    workbook = None
+    try:
+        excel_app = get_excel_app()
+        if not excel_app:
+            return False, "_F", None
+
+        workbook = _open_workbook(excel_app, excel_file_path)
+
+        values = read_linearity_results(excel_app, workbook)
+        print("  - Linearity 시트 29행 텍스트 검사: " + ", ".join(
+            f"{cell}='{'' if value is None else str(value).strip()}'" for cell, value in zip(RESULT_CELLS, values)
+        ))
+        is_valid, status_suffix = linearity_eval.judge_linearity_results(values)
+        print(f"  {'✓' if is_valid else '✗'} 검증 결과: {'Pass' if is_valid else 'Fail'}")
+
+        pdf_path = None
+        if is_valid and pdf_path_for:
+            candidate = pdf_path_for(status_suffix)
+            try:
+                if export_first_three_sheets(excel_app, workbook, candidate):
+                    pdf_path = candidate
+            except Exception as e:
+                _note_com_error(e)
+                print(f"  ! PDF 내보내기 오류: {e}")
+        return is_valid, status_suffix, pdf_path
+
+    except Exception as e:
+        _note_com_error(e)
+        print(f"  ! 데이터 검증 중 오류 발생: {e}")
+        return False, "_F", None
+
+    finally:
+        # 워크북만 닫기 (Excel 앱은 재사용을 위해 유지)
+        try:
+            if workbook:
+                workbook.Close(SaveChanges=False)
+        except Exception as e:
+            _note_com_error(e)
+            print(f"  - 워크북 닫기 오류: {e}")
+
+def export_excel_to_pdf(excel_file_path, pdf_file_path):
+    """
+    판정이 끝난 파일의 첫 3개 시트를 PDF로 변환하는 함수 (Excel 앱 재사용, 한 번만 열기)
+
+    Returns:
+        bool: 성공 여부
+    """
+    workbook = None
+    try:
+        excel_app = get_excel_app()
+        if not excel_app:
+            return False
+        workbook = _open_workbook(excel_app, excel_file_path)
+        return export_first_three_sheets(excel_app, workbook, pdf_file_path)
+    except Exception as e:
+        _note_com_error(e)
+        print(f"  ! PDF 내보내기 오류: {e}")
+        return False
+    finally:
+        try:
+            if workbook:
+                workbook.Close(SaveChanges=False)
+        except Exception as e:
+            _note_com_error(e)
+            print(f"  - 워크북 닫기 오류: {e}")
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Excel 작업자 풀
+# ─────────────────────────────────────────────────────────────────────────────
+def ping_excel_app(app):
+    """간단한 속성을 읽어서 Excel 인스턴스가 응답하는지 확인하는 함수"""
+    try:
+        app.Version
+        return True
+    except Exception:
+        return False
+
+class ExcelPool:
+    """
+    Excel 인스턴스 N개를 각각 전용 스레드(COM 아파트)에서 실행하는 작업자 풀
+    작업은 큐로 전달되며, 각 작업자는 작업 전에 인스턴스 상태를 확인하고
+    K개 작업 후 또는 오류 발생 시 인스턴스를 새로 만듭니다. 작업 함수가 COM 오류를 잡아서
+    False 등을 돌려준 경우도(_note_com_error로 기록) 오류로 보고 인스턴스를 새로 만듭니다.
+
+    작업 함수는 작업자 스레드에서 실행되므로 get_excel_app()이 그 작업자의 인스턴스를
+    돌려줍니다. (run_linearity_session, export_excel_to_pdf를 그대로 제출 가능)
+
+    Args:
+        size (int): Excel 인스턴스(작업자 스레드) 수
+        max_jobs_per_app (int): 인스턴스를 새로 만들기 전까지 처리할 작업 수 (0이면 제한 없음)
+        backend: Win32ExcelBackend / FakeExcelBackend (기본: get_backend())
+    """
+
+    def __init__(self, size=1, max_jobs_per_app=50, backend=None):
+        self.size = max(1, int(size))
+        self.max_jobs_per_app = max_jobs_per_app
+        self.backend = backend
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {"jobs": 0, "failed": 0, "apps_created": 0, "recycled": 0, "unhealthy": 0}
+        self._closed = False
+        self._threads = []
+        for i in range(self.size):
+            thread = threading.Thread(target=self._worker, name=f"excel-worker-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        """풀 통계 (처리/실패 작업 수, 생성/재생성 인스턴스 수, 대기 중인 작업 수)"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["size"] = self.size
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        작업을 큐에 넣는 함수
+
+        Returns:
+            concurrent.futures.Future: 작업 결과
+        """
+        if self._closed:
+            raise RuntimeError("ExcelPool이 이미 종료되었습니다.")
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def shutdown(self, wait=True):
+        """모든 작업이 끝난 뒤 작업자를 종료하고 Excel 인스턴스를 정리하는 함수"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _start_app(self):
+        app = get_excel_app()
+        if app is not None:
+            self._count("apps_created")
+        return app
+
+    def _recycle(self, reason):
+        cleanup_excel_app()
+        self._count(reason)
+
+    def _worker(self):
+        if self.backend is not None:
+            set_thread_backend(self.backend)
+        initialize_thread()
+        jobs_on_app = 0
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                future, fn, args, kwargs = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                # 상태 확인 (응답이 없으면 새로 만들기)
+                app = getattr(_thread_state, "app", None)
+                if app is not None and not ping_excel_app(app):
+                    self._recycle("unhealthy")
+                    jobs_on_app = 0
+                if getattr(_thread_state, "app", None) is None:
+                    self._start_app()
+
+                take_com_error()
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as e:
+                    self._count("failed")
+                    future.set_exception(e)
+                    # 오류 후에는 인스턴스를 새로 만들기
+                    self._recycle("recycled")
+                    jobs_on_app = 0
+                    continue
+
+                # 작업 함수가 COM 오류를 잡아서 실패 값을 돌려준 경우에도 인스턴스를 새로 만들기
+                if take_com_error() is not None:
+                    self._count("failed")
+                    future.set_result(result)
+                    self._recycle("recycled")
+                    jobs_on_app = 0
+                    continue
+
+                self._count("jobs")
+                future.set_result(result)
+                jobs_on_app += 1
+                if self.max_jobs_per_app and jobs_on_app >= self.max_jobs_per_app:
+                    self._recycle("recycled")
+                    jobs_on_app = 0
+        finally:
+            release_thread()
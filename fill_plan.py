@@ -0,0 +1,182 @@
+"""
+템플릿 채우기 계획 모듈 (매핑 파일 → 쓰기 계획)
+
+매핑 파일(JSON)에는 CSV에서 읽을 행(fields)과 템플릿에 쓸 셀(cells)을 적습니다.
+    fields: {"name", "row" 또는 "rows": [시작 행, 끝 행], "type": "text" / "number"}
+    cells:  {"sheet", "cell": "E18" 또는 "E32:I32", "field" 또는 "formula"}
+            - 범위에 여러 행 필드를 연결하면 순서대로 한 칸씩 채웁니다.
+            - formula의 {col}, {row}는 각 칸의 열 문자, 행 번호로 바뀝니다.
+            - field 대신 "row", "type"을 직접 적어도 됩니다 (이름 없는 필드).
+
+매핑은 템플릿마다 한 번만 쓰기 계획(FillPlan)으로 바꾸고, 분석 항목마다
+FillPlan.cells()로 같은 계획을 반복 적용합니다.
+"""
+import json
+import os
+
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.cell import range_boundaries
+
+LINEARITY_ED2_MAPPING = os.path.join(os.path.dirname(os.path.abspath(__file__)), "linearity_ed2_fill.json")
+
+# {매핑 파일 경로: 시트 확인 없이 만든 FillPlan} (CSV 읽기 등 템플릿이 없을 때 사용)
+_plan_cache = {}
+
+class FillPlanError(Exception):
+    """매핑 파일 내용이 올바르지 않을 때 발생"""
+
+class FillPlan:
+    """
+    컴파일된 템플릿 채우기 계획
+
+    Attributes:
+        name (str): 매핑 이름
+        schema (tuple): CSV 행 스키마 ((필드명, 행 번호 또는 range, 형식), ...) - linearity_csv에서 사용
+        key_field (str): 분석 항목 열을 판단하는 필드 (이 행이 비어 있는 열에서 중단)
+        steps (list): [((시트명, 셀 주소), 필드명, 값 인덱스, 수식), ...] - 매핑 순서
+        missing_sheets (list): 템플릿에 없어 건너뛰는 시트 이름
+    """
+
+    def __init__(self, name, schema, key_field, steps, missing_sheets=()):
+        self.name = name
+        self.schema = schema
+        self.key_field = key_field
+        self.steps = steps
+        self.missing_sheets = list(missing_sheets)
+
+    @property
+    def cell_keys(self):
+        """계획이 쓰는 모든 셀 (시트명, 셀 주소)"""
+        return [key for key, _, _, _ in self.steps]
+
+    def cells(self, record):
+        """
+        분석 항목 레코드 하나에 계획을 적용하는 함수
+
+        Args:
+            record (dict): linearity_csv의 분석 항목 레코드
+
+        Returns:
+            dict: {(시트명, 셀 주소): 값 또는 '=수식'} (매핑 순서 유지)
+        """
+        cells = {}
+        for key, field, index, formula in self.steps:
+            if formula is not None:
+                cells[key] = formula
+            elif index is None:
+                cells[key] = record[field]
+            else:
+                cells[key] = record[field][index]
+        return cells
+
+def load_fill_mapping(mapping_path=LINEARITY_ED2_MAPPING):
+    """매핑 파일(JSON) 읽기"""
+    with open(mapping_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _expand_cells(ref):
+    """'E32:I32' 같은 범위를 셀 주소 리스트로 펼치기 (행 우선)"""
+    try:
+        min_col, min_row, max_col, max_row = range_boundaries(ref.replace('$', '').upper())
+    except (ValueError, TypeError):
+        raise FillPlanError(f"셀 주소를 해석할 수 없습니다: {ref}")
+    return [
+        (get_column_letter(col), row)
+        for row in range(min_row, max_row + 1)
+        for col in range(min_col, max_col + 1)
+    ]
+
+def _compile_field(entry):
+    """fields 항목 → (필드명, 행 번호 또는 range, 형식)"""
+    kind = entry.get("type", "text")
+    if kind not in ("text", "number"):
+        raise FillPlanError(f"지원하지 않는 형식입니다: {kind}")
+    if "rows" in entry:
+        first, last = entry["rows"]
+        rows = range(int(first), int(last) + 1)
+    elif "row" in entry:
+        rows = int(entry["row"])
+    else:
+        raise FillPlanError(f"'{entry.get('name')}' 필드에 CSV 행 번호(row/rows)가 없습니다.")
+    name = entry.get("name") or f"row{rows}"
+    return name, rows, kind
+
+def compile_fill_plan(mapping, sheetnames=None):
+    """
+    매핑을 쓰기 계획으로 컴파일하는 함수
+
+    Args:
+        mapping (dict): load_fill_mapping()의 결과
+        sheetnames (list): 템플릿 시트 이름 (주어지면 시트 이름을 템플릿 기준으로 맞추고,
+            없는 시트의 셀은 계획에서 제외)
+
+    Returns:
+        FillPlan
+
+    Raises:
+        FillPlanError: 매핑 내용이 올바르지 않을 때
+    """
+    schema = [_compile_field(entry) for entry in mapping.get("fields", [])]
+    fields = {name: rows for name, rows, _ in schema}
+    if len(fields) != len(schema):
+        raise FillPlanError("필드 이름이 중복되었습니다.")
+
+    # 시트 이름은 Excel처럼 대소문자 구분 없이 템플릿 시트에 맞춤
+    sheet_lookup = {name.lower(): name for name in sheetnames} if sheetnames is not None else None
+    missing_sheets = []
+
+    steps = []
+    for entry in mapping.get("cells", []):
+        sheet = entry.get("sheet")
+        if not sheet or "cell" not in entry:
+            raise FillPlanError(f"셀 항목에 sheet/cell이 없습니다: {entry}")
+        if sheet_lookup is not None:
+            resolved = sheet_lookup.get(sheet.lower())
+            if resolved is None:
+                if sheet not in missing_sheets:
+                    missing_sheets.append(sheet)
+                continue
+            sheet = resolved
+
+        targets = _expand_cells(entry["cell"])
+        formula = entry.get("formula")
+        field = entry.get("field")
+        if formula is None and field is None:
+            if "row" not in entry and "rows" not in entry:
+                raise FillPlanError(f"{sheet}!{entry['cell']}: field, formula, row 중 하나가 필요합니다.")
+            name, rows, kind = _compile_field(entry)
+            if name not in fields:
+                schema.append((name, rows, kind))
+                fields[name] = rows
+            field = name
+
+        if formula is not None:
+            for col, row in targets:
+                steps.append(((sheet, f"{col}{row}"), None, None, formula.format(col=col, row=row)))
+            continue
+
+        if field not in fields:
+            raise FillPlanError(f"{sheet}!{entry['cell']}: 정의되지 않은 필드입니다: {field}")
+        rows = fields[field]
+        if isinstance(rows, range):
+            if len(targets) != len(rows):
+                raise FillPlanError(
+                    f"{sheet}!{entry['cell']}: 셀 {len(targets)}개와 '{field}' 값 {len(rows)}개의 개수가 다릅니다."
+                )
+            for index, (col, row) in enumerate(targets):
+                steps.append(((sheet, f"{col}{row}"), field, index, None))
+        else:
+            for col, row in targets:
+                steps.append(((sheet, f"{col}{row}"), field, None, None))
+
+    key_field = mapping.get("key_field") or (schema[0][0] if schema else None)
+    if key_field not in fields:
+        raise FillPlanError(f"key_field가 필드 목록에 없습니다: {key_field}")
+    return FillPlan(mapping.get("name", ""), tuple(schema), key_field, steps, missing_sheets)
+
+def load_fill_plan(mapping_path=LINEARITY_ED2_MAPPING):
+    """매핑 파일을 읽어 시트 확인 없이 컴파일한 FillPlan (경로별로 한 번만 컴파일)"""
+    plan = _plan_cache.get(mapping_path)
+    if plan is None:
+        plan = _plan_cache[mapping_path] = compile_fill_plan(load_fill_mapping(mapping_path))
+    return plan
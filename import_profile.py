@@ -0,0 +1,123 @@
+"""
+시작 시간 측정 도구 (import 시간 보고)
+
+    python import_profile.py [모듈 ...] [--top N] [--app] [--reruns N]
+
+각 모듈을 새 파이썬 프로세스에서 `python -X importtime`으로 불러와, 인터프리터 기본
+import를 뺀 전체 시간과 누적 시간이 큰 패키지를 보여줍니다.
+--app을 주면 Streamlit 앱(app.py)의 첫 실행 시간과 다시 그리기(rerun) 시간도 측정합니다.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 기본 측정 대상 (app.py가 바로 불러오는 모듈 + PDF 변환 모듈)
+DEFAULT_MODULES = [
+    "job_queue",
+    "progress",
+    "Pro_CC_ID_pdf_to_excel",
+    "Pro_CC_Seq_pdf_to_excel",
+    "Pro_IM_ID_pdf_to_excel",
+    "Pro_IM_Seq_pdf_to_excel",
+    "linearity_batch",
+]
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+def _importtime(code):
+    """-X importtime 출력 → [(모듈명, 자체 시간 us, 누적 시간 us, 깊이), ...]"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=HERE, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import 실패")
+    entries = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            entries.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2))
+    return entries
+
+def profile_module(name, baseline=None, top=8):
+    """
+    모듈 하나의 import 시간 측정
+
+    Returns:
+        dict: {"module", "total_ms", "top": [(패키지, 누적 ms), ...]}
+    """
+    baseline = baseline if baseline is not None else {n for n, _, _, _ in _importtime("pass")}
+    entries = [e for e in _importtime(f"import {name}") if e[0] not in baseline]
+    total = sum(cumulative for _, _, cumulative, depth in entries if depth == 0)
+    # 대상 모듈이 직접 불러온 import를 최상위 패키지 기준으로 합산 (pandas.core... → pandas)
+    packages = {}
+    for mod, _, cumulative, depth in entries:
+        if depth == 1:
+            root = mod.split('.')[0]
+            packages[root] = packages.get(root, 0) + cumulative
+    ranked = sorted(packages.items(), key=lambda item: -item[1])[:top]
+    return {
+        "module": name,
+        "total_ms": total / 1000,
+        "top": [(package, us / 1000) for package, us in ranked],
+    }
+
+def profile_app(reruns=5):
+    """
+    Streamlit 앱의 첫 실행 / 다시 그리기 시간 측정 (새 프로세스에서 AppTest로 실행)
+
+    Returns:
+        dict: {"cold_ms", "rerun_ms"}
+    """
+    code = (
+        "import time, json\n"
+        "from streamlit.testing.v1 import AppTest\n"
+        f"at = AppTest.from_file({os.path.join(HERE, 'app.py')!r}, default_timeout=120)\n"
+        "at.session_state['logged_in'] = True\n"
+        "at.session_state['username'] = 'bmserv'\n"
+        "t = time.perf_counter(); at.run(); cold = time.perf_counter() - t\n"
+        "assert not at.exception, at.exception\n"
+        "times = []\n"
+        f"for _ in range({int(reruns)}):\n"
+        "    t = time.perf_counter(); at.run(); times.append(time.perf_counter() - t)\n"
+        "print(json.dumps({'cold': cold, 'rerun': sorted(times)[len(times) // 2]}))\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=HERE, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip())
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {"cold_ms": result["cold"] * 1000, "rerun_ms": result["rerun"] * 1000}
+
+def main():
+    parser = argparse.ArgumentParser(description="import 시간 보고")
+    parser.add_argument("modules", nargs="*", help="측정할 모듈 (기본: app 관련 모듈)")
+    parser.add_argument("--top", type=int, default=5, help="모듈별로 표시할 무거운 패키지 수")
+    parser.add_argument("--app", action="store_true", help="Streamlit 앱 첫 실행/다시 그리기 시간도 측정")
+    parser.add_argument("--reruns", type=int, default=5, help="다시 그리기 측정 횟수 (중앙값 표시)")
+    args = parser.parse_args()
+
+    baseline = {n for n, _, _, _ in _importtime("pass")}
+    started = time.perf_counter()
+    for name in args.modules or DEFAULT_MODULES:
+        try:
+            report = profile_module(name, baseline, args.top)
+        except RuntimeError as e:
+            print(f"{name:<28} 불러오기 실패: {e}")
+            continue
+        heavy = ", ".join(f"{package} {ms:.0f}ms" for package, ms in report["top"])
+        print(f"{name:<28} {report['total_ms']:8.1f} ms   ({heavy})")
+
+    if args.app:
+        report = profile_app(args.reruns)
+        print(f"{'app.py 첫 실행':<28} {report['cold_ms']:8.1f} ms")
+        print(f"{'app.py 다시 그리기 (중앙값)':<28} {report['rerun_ms']:8.1f} ms")
+    print(f"\n측정 시간: {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+백그라운드 작업 큐 모듈 (Streamlit 앱 공용)
+
+오래 걸리는 변환은 버튼 처리 중에 직접 실행하지 않고 프로세스 전체가 공유하는
+작업 실행기에 맡깁니다. 세션에는 작업 ID만 저장하므로, 화면을 다시 그려도
+(입력란 수정, 다른 위젯 조작 등) 작업이 다시 시작되거나 결과가 사라지지 않습니다.
+
+여러 사용자가 동시에 변환을 요청해도 실행 수는 max_workers로 제한되고,
+나머지는 대기열에서 순서대로 기다립니다. 한 사용자가 동시에 실행할 수 있는 작업 수
+(max_per_owner)와 대기열 길이(max_queue)도 제한하며, 대기열이 가득 차면
+JobRejected로 요청을 거절합니다.
+"""
+import os
+import shutil
+import threading
+import time
+import traceback
+import uuid
+import metrics
+
+# 기본 동시 실행 작업 수 (환경 변수 REAF_JOB_WORKERS로 변경 가능)
+DEFAULT_MAX_WORKERS = 2
+
+# 사용자(세션)별 동시 실행 작업 수 (REAF_JOB_PER_USER)
+DEFAULT_MAX_PER_OWNER = 1
+
+# 대기열 최대 길이 (REAF_JOB_QUEUE)
+DEFAULT_MAX_QUEUE = 8
+
+# 완료된 작업 결과를 보관하는 시간 (초)
+DEFAULT_RETENTION_SECONDS = 6 * 3600
+
+class JobRejected(Exception):
+    """
+    대기열이 가득 차서 작업을 받을 수 없을 때 발생
+
+    Attributes:
+        position (int): 받아들여졌다면 대기했을 순번
+    """
+
+    def __init__(self, position):
+        self.position = position
+        super().__init__(
+            f"Server busy, position {position} in queue. Please try again shortly. "
+            f"(서버가 바쁩니다. 대기 순번 {position}번 - 잠시 후 다시 시도해주세요.)"
+        )
+
+class Job:
+    """
+    백그라운드 작업 하나의 상태
+
+    Attributes:
+        job_id (str): 작업 ID
+        label (str): 화면에 표시할 작업 이름
+        owner (str): 작업을 요청한 세션/사용자
+        status (str): "queued" / "running" / "done" / "failed"
+        progress (float): 진행률 0~1 (알 수 없으면 None)
+        message (str): 현재 진행 상태 설명
+        result: 작업 함수의 반환값 (완료 시)
+        error (str): 오류 메시지 (실패 시)
+        cleanup_paths (list): 작업이 정리될 때(discard / 보관 시간 경과) 삭제할 파일·폴더
+            (결과를 메모리 대신 디스크에 두는 작업이 등록)
+    """
+
+    def __init__(self, label, owner):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.owner = owner
+        self.status = "queued"
+        self.progress = None
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.traceback = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cleanup_paths = []
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    @property
+    def elapsed(self):
+        """실행 시간 (초, 대기 시간 제외)"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def update(self, progress=None, message=None):
+        """진행 상태 갱신 (작업 함수에서 호출, progress는 0~1)"""
+        if progress is not None:
+            self.progress = max(0.0, min(1.0, float(progress)))
+        if message is not None:
+            self.message = message
+
+    def remove_files(self):
+        """cleanup_paths에 등록된 파일·폴더 삭제 (이미 없으면 무시)"""
+        paths, self.cleanup_paths = self.cleanup_paths, []
+        for path in paths:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+class JobManager:
+    """
+    프로세스 전체가 공유하는 백그라운드 작업 실행기 (크기가 정해진 작업 스레드 + 대기열)
+
+    Args:
+        max_workers (int): 동시에 실행할 작업 수
+        max_per_owner (int): 사용자(세션)별 동시 실행 작업 수 (넘는 작업은 대기)
+        max_queue (int): 대기열 최대 길이 (넘으면 JobRejected)
+        retention_seconds (float): 완료된 작업을 보관하는 시간
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, max_per_owner=DEFAULT_MAX_PER_OWNER,
+                 max_queue=DEFAULT_MAX_QUEUE, retention_seconds=DEFAULT_RETENTION_SECONDS):
+        self.max_workers = max(1, int(max_workers))
+        self.max_per_owner = max(1, int(max_per_owner))
+        self.max_queue = max(0, int(max_queue))
+        self.retention_seconds = retention_seconds
+        self._jobs = {}
+        self._queue = []     # [(job, target), ...] 등록 순서
+        self._running = {}   # {owner: 실행 중인 작업 수}
+        self._busy = 0
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+
+    def submit(self, target, label="", owner=None):
+        """
+        작업 등록
+
+        Args:
+            target (callable): target(job) -> 결과, job.update()로 진행 상태를 알릴 수 있음
+            label (str): 작업 이름
+            owner (str): 작업을 요청한 세션/사용자
+
+        Returns:
+            Job
+
+        Raises:
+            JobRejected: 대기열이 가득 찼을 때
+        """
+        job = Job(label, owner)
+        with self._lock:
+            self._prune()
+            if len(self._queue) >= self.max_queue and not self._can_start_now(owner):
+                metrics.JOBS_REJECTED.inc()
+                raise JobRejected(len(self._queue) + 1)
+            self._jobs[job.job_id] = job
+            self._queue.append((job, target))
+            # 작업 스레드는 필요할 때만 max_workers개까지 생성
+            if len(self._threads) < self.max_workers and self._busy + len(self._queue) > len(self._threads):
+                self._spawn_worker()
+            self._wakeup.notify_all()
+        return job
+
+    def start(self):
+        """작업 스레드를 max_workers개까지 미리 생성 (서버 시작 시 예열용)"""
+        with self._lock:
+            while len(self._threads) < self.max_workers:
+                self._spawn_worker()
+
+    def _spawn_worker(self):
+        """작업 스레드 하나 생성 (_lock 안에서 호출)"""
+        thread = threading.Thread(target=self._worker, name=f"reaf-job-{len(self._threads)}", daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _can_start_now(self, owner):
+        """대기 없이 바로 실행할 수 있는지 (_lock 안에서 호출)"""
+        return (
+            not self._queue
+            and self._busy < self.max_workers
+            and self._running.get(owner, 0) < self.max_per_owner
+        )
+
+    def _next_runnable(self):
+        """사용자별 제한에 걸리지 않는 가장 오래된 대기 작업 (_lock 안에서 호출)"""
+        for i, (job, _) in enumerate(self._queue):
+            if self._running.get(job.owner, 0) < self.max_per_owner:
+                return self._queue.pop(i)
+        return None
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                entry = self._next_runnable()
+                while entry is None:
+                    self._wakeup.wait()
+                    entry = self._next_runnable()
+                job, target = entry
+                self._running[job.owner] = self._running.get(job.owner, 0) + 1
+                self._busy += 1
+            try:
+                self._run(job, target)
+            finally:
+                with self._lock:
+                    self._running[job.owner] -= 1
+                    if not self._running[job.owner]:
+                        del self._running[job.owner]
+                    self._busy -= 1
+                    self._wakeup.notify_all()
+
+    def _run(self, job, target):
+        job.status = "running"
+        job.started_at = time.time()
+        metrics.JOB_WAIT_SECONDS.observe(job.started_at - job.submitted_at)
+        try:
+            job.result = target(job)
+            job.status = "done"
+            job.progress = 1.0
+        except Exception as e:
+            job.error = str(e)
+            job.traceback = traceback.format_exc()
+            job.status = "failed"
+            metrics.FAILURES.inc(source="job", exception=type(e).__name__)
+        finally:
+            job.finished_at = time.time()
+
+    def queue_position(self, job_id):
+        """대기 중인 작업의 순번 (1부터, 대기 중이 아니면 None)"""
+        with self._lock:
+            for i, (job, _) in enumerate(self._queue):
+                if job.job_id == job_id:
+                    return i + 1
+        return None
+
+    def stats(self):
+        """
+        실행기 상태 (사이드바 표시용)
+
+        Returns:
+            dict: {"running", "queued", "max_workers", "max_queue", "utilization"}
+        """
+        with self._lock:
+            return {
+                "running": self._busy,
+                "queued": len(self._queue),
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "utilization": self._busy / self.max_workers,
+            }
+
+    def get(self, job_id):
+        """작업 ID로 작업 찾기 (없거나 정리된 작업이면 None)"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def discard(self, job_id):
+        """완료된 작업 결과 삭제 (작업에 딸린 파일도 삭제)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.finished:
+                return
+            del self._jobs[job_id]
+        job.remove_files()
+
+    def jobs_for(self, owner):
+        """요청자별 작업 목록 (등록 순서)"""
+        with self._lock:
+            return [job for job in self._jobs.values() if job.owner == owner]
+
+    def _prune(self):
+        """보관 시간이 지난 완료 작업 정리 (_lock 안에서 호출, 작업에 딸린 파일도 삭제)"""
+        cutoff = time.time() - self.retention_seconds
+        for job in [j for j in self._jobs.values() if j.finished and j.finished_at < cutoff]:
+            del self._jobs[job.job_id]
+            job.remove_files()
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_job_manager():
+    """프로세스 공용 JobManager (처음 호출할 때 생성)"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(
+                max_workers=int(os.environ.get("REAF_JOB_WORKERS", DEFAULT_MAX_WORKERS)),
+                max_per_owner=int(os.environ.get("REAF_JOB_PER_USER", DEFAULT_MAX_PER_OWNER)),
+                max_queue=int(os.environ.get("REAF_JOB_QUEUE", DEFAULT_MAX_QUEUE)),
+            )
+            # 대기열 상태는 메트릭을 내보낼 때 읽음
+            metrics.REGISTRY.gauge("reaf_jobs_running", "Jobs currently running",
+                                   callback=lambda: _manager.stats()["running"])
+            metrics.REGISTRY.gauge("reaf_jobs_queued", "Jobs waiting in the queue",
+                                   callback=lambda: _manager.stats()["queued"])
+            metrics.REGISTRY.gauge("reaf_job_workers", "Maximum concurrent jobs",
+                                   callback=lambda: _manager.max_workers)
+        return _manager
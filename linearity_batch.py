@@ -0,0 +1,536 @@
+"""
+Linearity_ED2 워크북 배치 생성 모듈
+
+CSV의 각 열(C열부터, 분석 항목 하나)은 서로 독립적이므로 여러 프로세스에서 동시에
+채우고 저장할 수 있습니다. 작업마다 분석 항목 레코드(linearity_csv) 하나만 전달하고,
+공유하는 것은 읽기 전용인 템플릿뿐이며,
+Excel을 사용하는 단계(PDF 변환)는 Excel 작업자 풀(기본 1개)에서 처리합니다.
+
+저장 폴더에는 매니페스트(.linearity_manifest.json)를 함께 남겨서, 다시 실행할 때
+입력(분석 항목 열, 템플릿, PDF 방식)이 바뀌지 않은 분석 항목은 건너뜁니다.
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import excel_com
+import linearity_csv
+import linearity_workbook
+import metrics
+import timing
+
+# 작업자 프로세스마다 한 번만 불러오는 템플릿 (initializer에서 설정)
+_worker_state = {}
+
+MANIFEST_NAME = ".linearity_manifest.json"
+MANIFEST_VERSION = 2  # 2: Pass 항목은 PDF를 만들지 못해도 예정된 PDF 이름을 기록
+
+def default_worker_count():
+    """기본 작업자 수 (CPU 코어 수, 최대 4)"""
+    return max(1, min(4, os.cpu_count() or 1))
+
+def make_safe_filename(value):
+    """파일명에 부적절한 문자 제거 (예: /, \\, :, *)"""
+    for ch in '/\\:*?"<>|':
+        value = value.replace(ch, '_')
+    return value.strip()
+
+def plan_linearity_jobs(linearity_data):
+    """
+    생성할 파일 목록을 미리 정하는 함수 (CSV 열 순서)
+    파일 번호와 열이 처리 순서와 관계없이 항상 같게 정해집니다.
+
+    Args:
+        linearity_data (LinearityCsv): linearity_csv.parse_linearity_csv()의 결과
+
+    Returns:
+        list: [(파일 번호(1부터), 분석 항목 레코드), ...]
+    """
+    return [(file_number, record) for file_number, record in enumerate(linearity_data.records, start=1)]
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 증분 생성 매니페스트
+# ─────────────────────────────────────────────────────────────────────────────
+def load_manifest(save_directory):
+    """
+    저장 폴더의 매니페스트 읽기 (없거나 읽을 수 없으면 빈 매니페스트)
+
+    Returns:
+        dict: {"version", "entries": {분석 항목 키: {"input_hash", "template_hash", "xlsm", "pdf", "is_valid"}}}
+    """
+    path = os.path.join(save_directory, MANIFEST_NAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION and isinstance(manifest.get("entries"), dict):
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "entries": {}}
+
+def save_manifest(save_directory, manifest):
+    """매니페스트 저장 (임시 파일에 쓴 뒤 교체)"""
+    path = os.path.join(save_directory, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+def hash_record_inputs(record, plan, pdf_mode):
+    """
+    분석 항목 하나의 입력 해시 (CSV 열 값 + 채우기 계획 + PDF 방식)
+    템플릿 내용 해시는 매니페스트 항목에 따로 기록합니다.
+    """
+    payload = {
+        "fields": [record[name] for name, _, _ in plan.schema],
+        "steps": [[list(key), field, index, formula] for key, field, index, formula in plan.steps],
+        "pdf": pdf_mode,
+    }
+    data = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+def _manifest_outputs_exist(save_directory, entry):
+    """매니페스트에 기록된 결과 파일이 모두 남아 있는지 확인 (PDF 생성에 실패한 Pass 항목은 PDF가 없어 다시 생성)"""
+    names = [entry.get("xlsm")] + ([entry["pdf"]] if entry.get("pdf") else [])
+    return all(name and os.path.exists(os.path.join(save_directory, name)) for name in names)
+
+def _redate_outputs(save_directory, entry, today_str):
+    """
+    입력은 그대로이고 파일명 날짜만 다른 경우, 결과 파일을 다시 만들지 않고 오늘 날짜 이름으로 바꾸는 함수
+    (매니페스트 항목의 파일 이름도 함께 갱신)
+
+    Returns:
+        list: [(이전 이름, 새 이름), ...] 바꾼 파일
+    """
+    renamed = []
+    for field in ("xlsm", "pdf"):
+        name = entry.get(field)
+        if not name:
+            continue
+        new_name = f"{today_str}_{name.partition('_')[2]}"
+        if new_name != name:
+            os.replace(os.path.join(save_directory, name), os.path.join(save_directory, new_name))
+            entry[field] = new_name
+            renamed.append((name, new_name))
+    return renamed
+
+def _skipped_result(file_number, record, entry, save_directory):
+    """입력이 바뀌지 않아 다시 만들지 않은 분석 항목의 결과"""
+    return {
+        "file_number": file_number,
+        "success": True,
+        "skipped": True,
+        "is_valid": entry.get("is_valid", False),
+        "xlsm_path": os.path.join(save_directory, entry["xlsm"]),
+        "pdf_path": os.path.join(save_directory, entry["pdf"]) if entry.get("pdf") else None,
+        "pdf_done": True,
+        "log": [f"{file_number}번째 파일: 입력이 바뀌지 않아 건너뜁니다 (CSV {record['letter']}열, {entry['xlsm']})"],
+        "error": None,
+    }
+
+def _update_manifest_entry(manifest, key, input_hash, template_hash, result, save_directory, keep=(), pdf_expected=False):
+    """
+    새로 만든 결과를 매니페스트에 기록하고, 이전 결과 중 이름이 바뀐 파일(_P/_F 변경 등)은 삭제
+    (keep: 이번 실행에서 만든 파일 이름 - 다른 분석 항목이 만든 파일은 지우지 않음)
+    (pdf_expected: PDF를 만드는 실행인지 - Pass 항목은 PDF 생성에 실패해도 예정된 PDF 이름을 기록하여
+     다음 실행에서 PDF가 없으면 다시 생성)
+
+    Returns:
+        list: 삭제한 파일 이름
+    """
+    pdf_path = result.get("pdf_path")
+    entry = {
+        "input_hash": input_hash,
+        "template_hash": template_hash,
+        "xlsm": os.path.basename(result["xlsm_path"]),
+        "pdf": os.path.basename(pdf_path) if result["is_valid"] and pdf_path and pdf_expected else None,
+        "is_valid": bool(result["is_valid"]),
+    }
+    previous = manifest["entries"].get(key) or {}
+    removed = []
+    for name in (previous.get("xlsm"), previous.get("pdf")):
+        if name and name not in (entry["xlsm"], entry["pdf"]) and name not in keep:
+            try:
+                os.remove(os.path.join(save_directory, name))
+                removed.append(name)
+            except FileNotFoundError:
+                pass
+    manifest["entries"][key] = entry
+    return removed
+
+def _duplicate_result(file_number, record, first_letter):
+    """다른 열과 파일 이름이 같아지는 분석 항목의 결과 (앞 열의 결과 파일을 덮어쓰지 않도록 생성하지 않음)"""
+    return {
+        "file_number": file_number,
+        "success": False,
+        "is_valid": False,
+        "xlsm_path": None,
+        "pdf_path": None,
+        "pdf_done": False,
+        "log": [
+            f"{file_number}번째 파일 생성 중... (CSV {record['letter']}열)",
+            f"! 분석 항목 이름 '{record['Analyte']}'의 파일 이름이 CSV {first_letter}열과 같아 파일을 생성하지 않습니다.",
+        ],
+        "error": "duplicate analyte name",
+    }
+
+def _invalid_result(file_number, record):
+    """CSV 숫자 칸에 문제가 있어 생성하지 않은 분석 항목의 결과"""
+    log = [f"{file_number}번째 파일 생성 중... (CSV {record['letter']}열)"]
+    log.append(f"! CSV 값이 올바르지 않아 파일을 생성하지 않습니다 ({len(record['issues'])}개 칸):")
+    log.extend(f"  - {linearity_csv.format_issue(issue)}" for issue in record["issues"])
+    return {
+        "file_number": file_number,
+        "success": False,
+        "is_valid": False,
+        "xlsm_path": None,
+        "pdf_path": None,
+        "pdf_done": False,
+        "log": log,
+        "error": "invalid csv values",
+    }
+
+def build_linearity_file(template, formula_model, record, file_number, save_directory, today_str, native_pdf=False):
+    """
+    분석 항목 하나(CSV 한 열)의 워크북을 채우고 판정하여 저장하는 함수 (Excel 사용 안 함)
+
+    Args:
+        template (LinearityTemplate): 템플릿
+        formula_model (LinearityFormulaModel): Pass/Fail 판정용 수식 모델 (None이면 _P로 저장)
+        record (dict): 분석 항목 레코드 (linearity_csv)
+        file_number (int): 파일 번호 (로그용)
+        save_directory (str): 저장 폴더
+        today_str (str): 파일명 날짜 (YYYYMMDD, 배치 시작 시점 기준)
+        native_pdf (bool): Pass인 경우 Excel 없이 PDF 보고서를 바로 생성 (linearity_report)
+
+    Returns:
+        dict: {"file_number", "success", "is_valid", "xlsm_path", "pdf_path", "pdf_done", "log", "error",
+               "error_type", "timings": {단계: 초}}
+    """
+    log = [f"{file_number}번째 파일 생성 중... (CSV {record['letter']}열)"]
+    # 파일 단위 단계별 시간 (파일당 몇 번의 시간 측정뿐이라 항상 기록)
+    timer = timing.Timer()
+    result = {
+        "file_number": file_number,
+        "success": False,
+        "is_valid": False,
+        "xlsm_path": None,
+        "pdf_path": None,
+        "pdf_done": False,
+        "log": log,
+        "error": None,
+        "error_type": None,
+        "timings": {},
+    }
+    try:
+        # 파일명에 사용할 값
+        safe_e19_value = make_safe_filename(record["Analyte"])
+
+        # 입력할 셀 값 (Instructions / Linearity / Data Entry 시트)
+        with timer.span("fill"):
+            cells = template.fill_cells(record)
+
+        # Pass/Fail 판정 (수식 엔진, 저장 전 메모리에서) - 계산 결과는 수식 셀 캐시 값으로 저장
+        is_valid, status_suffix = True, "_P"
+        cached = None
+        if formula_model:
+            import linearity_eval
+            try:
+                with timer.span("evaluate"):
+                    (is_valid, status_suffix), cached = linearity_eval.evaluate_linearity_cells(
+                        formula_model, cells, template.template_cell_value
+                    )
+                log.append(f"  - 판정 결과: {'Pass' if is_valid else 'Fail'}")
+            except linearity_eval.FormulaError as e:
+                log.append(f"! 수식 엔진 판정 실패 (_P로 저장): {e}")
+
+        base_name = f"{today_str}_Linearity_{safe_e19_value}{status_suffix}"
+        xlsm_path = os.path.join(save_directory, base_name + ".xlsm")
+
+        # 파일 저장 (바뀐 워크시트 XML만 고쳐 쓰고, 안 되면 openpyxl로 저장)
+        with timer.span("save"):
+            template.save_filled(xlsm_path, cells, cached)
+        log.append(f"✔ 엑셀 파일 저장 완료: {base_name}.xlsm")
+
+        result.update(
+            success=True,
+            is_valid=is_valid,
+            xlsm_path=xlsm_path,
+            pdf_path=os.path.join(save_directory, base_name + ".pdf"),
+        )
+
+        # PDF 보고서 직접 생성 (Excel 사용 안 함)
+        if is_valid and native_pdf:
+            import linearity_report
+            log.append("  - PDF 파일 생성 중...")
+            with timer.span("native_pdf"):
+                pdf_ok = linearity_report.export_linearity_report(template, cells, result["pdf_path"])
+            if pdf_ok:
+                log.append(f"✔ PDF 파일 저장 완료: {base_name}.pdf")
+            else:
+                log.append(f"! PDF 파일 생성 실패: {base_name}.pdf")
+            result["pdf_done"] = True
+    except Exception as e:
+        result["error"] = str(e)
+        result["error_type"] = type(e).__name__
+        log.append(f"! {file_number}번째 파일 처리 중 오류: {e}")
+    result["timings"] = timer.totals()
+    return result
+
+def _record_batch_metrics(results, seconds):
+    """분석 항목별 판정(pass/fail/skipped/invalid/error)과 배치 시간을 메트릭에 기록"""
+    for result in results.values():
+        if result.get("skipped"):
+            verdict = "skipped"
+        elif result.get("error") == "invalid csv values":
+            verdict = "invalid"
+        elif not result["success"]:
+            verdict = "error"
+            metrics.FAILURES.inc(source="linearity", exception=result.get("error_type") or "Exception")
+        else:
+            verdict = "pass" if result["is_valid"] else "fail"
+        metrics.LINEARITY_FILES.inc(verdict=verdict)
+    metrics.LINEARITY_BATCH_SECONDS.observe(seconds)
+
+def _init_worker(template_bytes, mapping_path):
+    """작업자 프로세스 초기화 (템플릿, 채우기 계획, 수식 모델은 프로세스당 한 번만 불러옴)"""
+    template = linearity_workbook.LinearityTemplate(template_bytes, mapping_path)
+    try:
+        formula_model = template.formula_model
+    except Exception:
+        formula_model = None
+    _worker_state.update(template=template, formula_model=formula_model)
+
+def _run_job(job):
+    file_number, record, save_directory, today_str, native_pdf = job
+    return build_linearity_file(
+        _worker_state["template"], _worker_state["formula_model"], record,
+        file_number, save_directory, today_str, native_pdf
+    )
+
+def _export_pdf(export_pdf, result):
+    """Pass인 파일의 PDF 변환 (Excel 작업자 풀에서 실행)"""
+    pdf_name = os.path.basename(result["pdf_path"])
+    lines = ["  - PDF 파일 생성 중..."]
+    started = time.perf_counter()
+    try:
+        ok = export_pdf(result["xlsm_path"], result["pdf_path"])
+    except Exception as e:
+        print(f"PDF 변환 오류: {e}")
+        ok = False
+    result.setdefault("timings", {})["excel_pdf"] = time.perf_counter() - started
+    if ok:
+        lines.append(f"✔ PDF 파일 저장 완료: {pdf_name}")
+    else:
+        lines.append(f"! PDF 파일 생성 실패: {pdf_name}")
+    return lines
+
+def process_linearity_batch(template, linearity_data, save_directory, workers=1, export_pdf=None, excel_workers=1,
+                            native_pdf=False, incremental=True, on_output=None, timer=None):
+    """
+    CSV의 모든 분석 항목 워크북을 생성하는 함수
+
+    Args:
+        template (LinearityTemplate): 미리 불러온 템플릿
+        linearity_data (LinearityCsv): 분석 항목별 레코드 (linearity_csv.parse_linearity_csv())
+            CSV 숫자 칸에 문제가 있는 분석 항목은 파일을 만들지 않고 문제 칸을 로그에 남깁니다.
+        save_directory (str): 저장 폴더
+        workers (int): 워크북을 동시에 채우고 저장할 프로세스 수 (1이면 현재 프로세스에서 순서대로)
+        export_pdf (callable): export_pdf(xlsm 경로, pdf 경로) -> bool, Pass인 파일만 호출 (선택)
+            Excel을 사용하므로 Excel 작업자 풀(excel_com.ExcelPool)에서 실행합니다.
+        excel_workers (int): 동시에 사용할 Excel 인스턴스 수 (기본 1, 순서대로 처리)
+        native_pdf (bool): True이면 export_pdf 대신 PyMuPDF로 PDF 보고서를 생성 (Excel 불필요)
+        incremental (bool): True이면 저장 폴더의 매니페스트와 비교하여 입력이 바뀌지 않은 분석 항목은 건너뜀
+            (False여도 매니페스트는 갱신)
+        on_output (callable): on_output(파일 경로) - 결과 파일(워크북, PDF)이 준비될 때마다 호출 (선택)
+            건너뛴 항목의 기존 파일도 포함합니다. (예: output_bundle.OutputBundle.add_file)
+        timer (timing.Timer): 단계별 시간 측정 (배치 단계 + 파일별 단계 합계, None이면 측정하지 않음)
+
+    Returns:
+        dict: {"success", "error", "log", "files_created", "files_skipped"} - 로그는 파일 번호 순서
+    """
+    log = []
+    timer = timer or timing.NULL_TIMER
+    batch_started = time.perf_counter()
+    jobs = plan_linearity_jobs(linearity_data)
+    if not jobs:
+        return {"success": False, "error": "처리할 데이터가 없습니다.", "log": log, "files_created": 0, "files_skipped": 0}
+
+    # CSV 검증 (문제 있는 분석 항목은 미리 제외)
+    results = {}
+    if linearity_data.issues:
+        invalid = [(n, record) for n, record in jobs if record["issues"]]
+        log.append(f"! CSV 검증: {len(invalid)}개 분석 항목에 잘못된 값이 있습니다 (해당 파일은 생성하지 않음).")
+        for file_number, record in invalid:
+            results[file_number] = _invalid_result(file_number, record)
+        jobs = [(n, record) for n, record in jobs if not record["issues"]]
+
+    # 파일 이름(= 매니페스트 키)이 같아지는 분석 항목은 첫 열만 생성 (서로 덮어쓰지 않도록)
+    first_letters = {}
+    unique = []
+    for file_number, record in jobs:
+        key = make_safe_filename(record["Analyte"])
+        if key in first_letters:
+            results[file_number] = _duplicate_result(file_number, record, first_letters[key])
+        else:
+            first_letters[key] = record["letter"]
+            unique.append((file_number, record))
+    if len(unique) < len(jobs):
+        log.append(f"! 분석 항목 이름이 중복된 {len(jobs) - len(unique)}개 열은 파일을 생성하지 않습니다.")
+    jobs = unique
+
+    # 파일명 날짜는 배치 시작 시점으로 고정
+    today_str = datetime.now().strftime("%Y%m%d")
+
+    if native_pdf:
+        export_pdf = None
+    pdf_mode = "native" if native_pdf else ("excel" if export_pdf else "none")
+
+    # 증분 생성: 템플릿과 입력이 같고 결과 파일이 남아 있는 분석 항목은 건너뜀
+    # (파일명 날짜만 다르면 오늘 날짜로 이름만 바꿈, incremental=False여도 매니페스트는 갱신하여 이전 _P/_F 파일을 정리)
+    manifest_started = time.perf_counter()
+    manifest = load_manifest(save_directory)
+    input_hashes = {}
+    pending = []
+    for file_number, record in jobs:
+        key = make_safe_filename(record["Analyte"])
+        input_hashes[file_number] = (key, hash_record_inputs(record, template.fill_plan, pdf_mode))
+        entry = manifest["entries"].get(key)
+        if (incremental and entry and entry.get("input_hash") == input_hashes[file_number][1]
+                and entry.get("template_hash") == template.content_hash
+                and _manifest_outputs_exist(save_directory, entry)):
+            try:
+                renamed = _redate_outputs(save_directory, entry, today_str)
+            except OSError:
+                pending.append((file_number, record))
+                continue
+            results[file_number] = _skipped_result(file_number, record, entry, save_directory)
+            if renamed:
+                results[file_number]["log"].append(
+                    "  - 파일명 날짜 변경: " + ", ".join(f"{old} → {new}" for old, new in renamed)
+                )
+        else:
+            pending.append((file_number, record))
+    timer.add("manifest_check", time.perf_counter() - manifest_started)
+    if incremental:
+        metrics.record_cache("linearity_manifest", hits=len(jobs) - len(pending), misses=len(pending))
+    if len(pending) < len(jobs):
+        log.append(f"  - 입력이 바뀌지 않은 {len(jobs) - len(pending)}개 항목은 건너뜁니다 (매니페스트 기준).")
+    jobs = pending
+
+    workers = max(1, min(int(workers or 1), len(jobs) or 1))
+
+    try:
+        formula_model = template.formula_model
+    except Exception as e:
+        formula_model = None
+        log.append(f"! 수식 엔진을 사용할 수 없어 Pass/Fail 판정을 생략합니다: {e}")
+
+    def emit(path):
+        if on_output and path and os.path.exists(path):
+            on_output(path)
+
+    for result in results.values():
+        if result.get("skipped"):
+            emit(result["xlsm_path"])
+            emit(result["pdf_path"])
+
+    pdf_futures = {}
+    build_started = time.perf_counter()
+    with excel_com.ExcelPool(size=excel_workers if export_pdf else 1) as excel_pool:
+        def finish(result):
+            results[result["file_number"]] = result
+            if not result["success"]:
+                return
+            emit(result["xlsm_path"])
+            if result.get("pdf_done") and result["is_valid"]:
+                emit(result["pdf_path"])
+            if not result["is_valid"]:
+                result["log"].append("  - 검증 실패로 인해 PDF 파일을 생성하지 않습니다.")
+            elif export_pdf and not result.get("pdf_done"):
+                future = excel_pool.submit(_export_pdf, export_pdf, result)
+                future.add_done_callback(lambda _, path=result["pdf_path"]: emit(path))
+                pdf_futures[result["file_number"]] = future
+
+        if workers == 1:
+            for file_number, record in jobs:
+                finish(build_linearity_file(
+                    template, formula_model, record, file_number, save_directory, today_str, native_pdf
+                ))
+        else:
+            log.append(f"  - {workers}개 프로세스에서 동시에 생성합니다.")
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(template.template_bytes, template.mapping_path),
+            ) as pool:
+                futures = {
+                    pool.submit(_run_job, (file_number, record, save_directory, today_str, native_pdf)): (file_number, record)
+                    for file_number, record in jobs
+                }
+                for future in as_completed(futures):
+                    file_number, record = futures[future]
+                    try:
+                        finish(future.result())
+                    except Exception as e:
+                        # 작업자 프로세스 자체가 실패한 경우
+                        results[file_number] = {
+                            "file_number": file_number,
+                            "success": False,
+                            "log": [
+                                f"{file_number}번째 파일 생성 중... (CSV {record['letter']}열)",
+                                f"! {file_number}번째 파일 처리 중 오류: {e}",
+                            ],
+                            "error": str(e),
+                            "error_type": type(e).__name__,
+                        }
+
+        for file_number, future in pdf_futures.items():
+            results[file_number]["log"].extend(future.result())
+    timer.add("build_wall", time.perf_counter() - build_started)
+
+    # 파일별 단계 시간 합계 (여러 프로세스에서 동시에 처리하면 build_wall보다 클 수 있음)
+    for result in results.values():
+        timer.merge(result.get("timings"))
+
+    # 매니페스트 갱신 (새로 만든 항목만, 이전 _P/_F 파일 정리)
+    produced = {
+        os.path.basename(path)
+        for result in results.values() if result["success"]
+        for path in (result.get("xlsm_path"), result.get("pdf_path")) if path
+    }
+    for file_number, result in sorted(results.items()):
+        if result["success"] and not result.get("skipped") and file_number in input_hashes:
+            key, input_hash = input_hashes[file_number]
+            removed = _update_manifest_entry(
+                manifest, key, input_hash, template.content_hash, result, save_directory, produced,
+                pdf_expected=pdf_mode != "none",
+            )
+            if removed:
+                result["log"].append(f"  - 이전 결과 파일 삭제: {', '.join(removed)}")
+    try:
+        with timer.span("manifest_save"):
+            save_manifest(save_directory, manifest)
+    except OSError as e:
+        log.append(f"! 매니페스트 저장 실패 (다음 실행 때 모두 다시 생성): {e}")
+
+    files_created = 0
+    files_skipped = 0
+    for file_number in sorted(results):
+        log.extend(results[file_number]["log"])
+        if results[file_number].get("skipped"):
+            files_skipped += 1
+        elif results[file_number]["success"]:
+            files_created += 1
+    _record_batch_metrics(results, time.perf_counter() - batch_started)
+
+    return {
+        "success": True,
+        "error": None,
+        "log": log,
+        "files_created": files_created,
+        "files_skipped": files_skipped,
+    }
@@ -0,0 +1,138 @@
+"""
+Linearity CSV 읽기 모듈 (행 스키마 기반)
+
+CSV는 분석 항목이 열(C열부터), 항목 정보가 행으로 배치되어 있습니다.
+읽을 행은 채우기 매핑 파일의 fields(fill_plan, 기본: linearity_ed2_fill.json)에 정의되어 있으며,
+필요한 행만 한 번 읽어서 분석 항목별 레코드로 바꾸고(행 ↔ 열 전환),
+숫자여야 하는 칸이 비어 있거나 숫자가 아니면 0으로 채우지 않고 문제로 기록합니다.
+"""
+import csv
+import math
+
+from openpyxl.utils import get_column_letter
+
+import fill_plan
+
+FIRST_DATA_COL = 2  # C열
+
+def parse_number(text):
+    """
+    CSV 문자열을 숫자로 변환하는 함수 (천 단위 쉼표 허용)
+
+    Returns:
+        tuple: (숫자 또는 None, 문제 설명 또는 None)
+    """
+    text = (text or "").strip()
+    if not text:
+        return None, "값이 비어 있습니다"
+    try:
+        value = float(text.replace(',', ''))
+    except ValueError:
+        return None, "숫자가 아닙니다"
+    if not math.isfinite(value):
+        return None, "숫자가 아닙니다"
+    return value, None
+
+def _field_rows(rows):
+    return list(rows) if isinstance(rows, range) else [rows]
+
+class LinearityCsv:
+    """
+    분석 항목별로 정리된 Linearity CSV
+
+    records: 분석 항목 레코드 리스트 (CSV 열 순서)
+        {"column": 열 인덱스, "letter": 열 문자, 필드명: 값, ..., "issues": [문제, ...]}
+        - text 필드: 문자열
+        - number 필드: 숫자 (잘못된 칸은 None), 여러 행이면 숫자 리스트
+    """
+
+    def __init__(self, records, plan):
+        self.records = records
+        self.plan = plan
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def issues(self):
+        """모든 분석 항목의 문제 칸 (CSV 열 순서)"""
+        return [issue for record in self.records for issue in record["issues"]]
+
+    @property
+    def valid_records(self):
+        """문제 칸이 없는 분석 항목 레코드"""
+        return [record for record in self.records if not record["issues"]]
+
+def format_issue(issue):
+    """문제 칸을 로그용 문자열로 변환 (예: 'D38 (Replicate1): 'abc' 숫자가 아닙니다')"""
+    return f"{issue['cell']} ({issue['field']}): '{issue['value']}' {issue['message']}"
+
+def parse_linearity_csv(all_csv_data, plan=None):
+    """
+    CSV 행 리스트를 분석 항목별 레코드로 변환하고 숫자 칸을 검증하는 함수
+
+    Args:
+        all_csv_data (list): csv.reader로 읽은 전체 행 리스트
+        plan (FillPlan): 읽을 행 스키마가 들어 있는 채우기 계획 (기본: Linearity_ED2 매핑)
+
+    Returns:
+        LinearityCsv
+    """
+    plan = plan or fill_plan.load_fill_plan()
+    if not all_csv_data:
+        return LinearityCsv([], plan)
+
+    def row_values(row_num, count):
+        # 필요한 행만 분석 항목 열 범위로 잘라서 사용 (짧은 행은 빈 문자열로 채움)
+        row = all_csv_data[row_num - 1] if row_num <= len(all_csv_data) else []
+        values = row[FIRST_DATA_COL:FIRST_DATA_COL + count]
+        return values + [""] * (count - len(values))
+
+    # 분석 항목 열 개수 (기준 행이 비어 있는 열에서 중단, 첫 행 너비까지)
+    key_row = dict((name, rows) for name, rows, _ in plan.schema)[plan.key_field]
+    width = max(0, len(all_csv_data[0]) - FIRST_DATA_COL)
+    key_values = row_values(key_row, width)
+    count = next((i for i, v in enumerate(key_values) if not v.strip()), width)
+
+    columns = range(FIRST_DATA_COL, FIRST_DATA_COL + count)
+    records = [
+        {"column": col_idx, "letter": get_column_letter(col_idx + 1), "issues": []}
+        for col_idx in columns
+    ]
+
+    for name, rows, kind in plan.schema:
+        row_nums = _field_rows(rows)
+        # 행 단위로 읽어서 열(분석 항목) 단위로 전환
+        by_row = [row_values(row_num, count) for row_num in row_nums]
+        for i, record in enumerate(records):
+            if kind == "text":
+                values = [row[i] for row in by_row]
+            else:
+                values = []
+                for row_num, row in zip(row_nums, by_row):
+                    value, problem = parse_number(row[i])
+                    if problem:
+                        record["issues"].append({
+                            "cell": f"{record['letter']}{row_num}",
+                            "field": name,
+                            "value": row[i],
+                            "message": problem,
+                        })
+                    values.append(value)
+            record[name] = values if isinstance(rows, range) else values[0]
+
+    return LinearityCsv(records, plan)
+
+def read_linearity_csv(csv_data_path, plan=None):
+    """CSV 파일을 읽어 분석 항목별 레코드로 변환 (utf-8-sig: 엑셀 CSV의 BOM 처리)"""
+    with open(csv_data_path, mode='r', encoding='utf-8-sig', newline='') as f:
+        return parse_linearity_csv(list(csv.reader(f)), plan)
+
+def blank_record(plan=None):
+    """빈 분석 항목 레코드 (셀 배치만 필요할 때 사용)"""
+    plan = plan or fill_plan.load_fill_plan()
+    record = {"column": FIRST_DATA_COL, "letter": get_column_letter(FIRST_DATA_COL + 1), "issues": []}
+    for name, rows, kind in plan.schema:
+        empty = "" if kind == "text" else 0.0
+        record[name] = [empty] * len(rows) if isinstance(rows, range) else empty
+    return record
@@ -0,0 +1,915 @@
+"""
+Linearity_ED2 템플릿의 Pass/Fail 판정을 Excel 없이 계산하는 수식 엔진
+
+템플릿의 수식 그래프를 한 번만 읽어서 Linearity!D29:H29 가 참조하는 셀만
+컴파일해 두고, 분석 항목(Analyte)마다 입력값만 바꿔서 계산합니다.
+Excel COM 검증(validate_excel_data_with_com)과 같은 (is_valid, "_P"/"_F") 결과를 반환합니다.
+"""
+import datetime
+import math
+import re
+
+import openpyxl
+from openpyxl.formula.tokenizer import Tokenizer, Token
+from openpyxl.utils import range_boundaries, get_column_letter
+from openpyxl.utils.datetime import to_excel
+
+# 판정 대상 셀 (Linearity 시트 29행)
+RESULT_SHEET = "Linearity"
+RESULT_CELLS = ['D29', 'E29', 'F29', 'G29', 'H29']
+
+# 범위 하나가 펼칠 수 있는 최대 셀 수 (A:A 같은 전체 열 참조 보호)
+MAX_RANGE_CELLS = 100000
+
+class FormulaError(Exception):
+    """수식 엔진이 처리할 수 없는 수식 (지원하지 않는 함수, 순환 참조 등)"""
+
+class ExcelError(Exception):
+    """#DIV/0!, #VALUE! 등 Excel 오류 값 (계산 중 전파됨)"""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+    def __str__(self):
+        return self.code
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 값 변환 헬퍼
+# ─────────────────────────────────────────────────────────────────────────────
+def _check(value):
+    """오류 값이면 예외로 전파"""
+    if isinstance(value, ExcelError):
+        raise value
+    return value
+
+def _to_number(value):
+    value = _check(value)
+    if value is None or value == "":
+        return 0.0
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(',', ''))
+    except ValueError:
+        raise ExcelError("#VALUE!")
+
+def _to_text(value):
+    value = _check(value)
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def _to_bool(value):
+    value = _check(value)
+    if value is None:
+        return False
+    if isinstance(value, str):
+        upper = value.upper()
+        if upper in ("TRUE", "FALSE"):
+            return upper == "TRUE"
+        raise ExcelError("#VALUE!")
+    return bool(value)
+
+def _compare(left, right):
+    """Excel 비교 규칙: 숫자 < 문자 < 논리값, 문자는 대소문자 무시"""
+    left, right = _check(left), _check(right)
+    if left is None:
+        left = "" if isinstance(right, str) else 0.0
+    if right is None:
+        right = "" if isinstance(left, str) else 0.0
+
+    def rank(v):
+        if isinstance(v, bool):
+            return 2
+        if isinstance(v, str):
+            return 1
+        return 0
+
+    rl, rr = rank(left), rank(right)
+    if rl != rr:
+        return (rl > rr) - (rl < rr)
+    if rl == 1:
+        left, right = left.lower(), right.lower()
+    return (left > right) - (left < right)
+
+class RangeValue:
+    """셀 범위 값 (행 단위 2차원 리스트)"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def values(self):
+        for row in self.rows:
+            for value in row:
+                yield value
+
+def _flatten(args):
+    """함수 인수에서 값들을 펼치기 (범위 여부와 함께)"""
+    for arg in args:
+        if isinstance(arg, RangeValue):
+            for value in arg.values():
+                yield value, True
+        else:
+            yield arg, False
+
+def _numbers(args):
+    """SUM/AVERAGE 규칙: 범위 안의 문자/빈칸은 무시, 직접 인수는 숫자로 변환"""
+    result = []
+    for value, from_range in _flatten(args):
+        _check(value)
+        if from_range:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                result.append(float(value))
+        elif value is not None:
+            result.append(_to_number(value))
+    return result
+
+def _scalar(value):
+    """범위를 단일 값 문맥에서 사용하는 경우 (한 셀짜리 범위만 허용)"""
+    if isinstance(value, RangeValue):
+        if len(value.rows) == 1 and len(value.rows[0]) == 1:
+            return value.rows[0][0]
+        raise ExcelError("#VALUE!")
+    return value
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 워크시트 함수
+# ─────────────────────────────────────────────────────────────────────────────
+def _fn_average(*args):
+    nums = _numbers(args)
+    if not nums:
+        raise ExcelError("#DIV/0!")
+    return sum(nums) / len(nums)
+
+def _fn_stdev(*args):
+    nums = _numbers(args)
+    if len(nums) < 2:
+        raise ExcelError("#DIV/0!")
+    mean = sum(nums) / len(nums)
+    return math.sqrt(sum((x - mean) ** 2 for x in nums) / (len(nums) - 1))
+
+def _fn_var(*args):
+    nums = _numbers(args)
+    if len(nums) < 2:
+        raise ExcelError("#DIV/0!")
+    mean = sum(nums) / len(nums)
+    return sum((x - mean) ** 2 for x in nums) / (len(nums) - 1)
+
+def _paired(known_y, known_x):
+    ys = [_check(v) for v in _as_range(known_y).values()]
+    xs = [_check(v) for v in _as_range(known_x).values()]
+    if len(ys) != len(xs):
+        raise ExcelError("#N/A")
+    pairs = [(float(x), float(y)) for x, y in zip(xs, ys)
+             if isinstance(x, (int, float)) and isinstance(y, (int, float))
+             and not isinstance(x, bool) and not isinstance(y, bool)]
+    if len(pairs) < 2:
+        raise ExcelError("#DIV/0!")
+    return pairs
+
+def _fn_slope(known_y, known_x):
+    pairs = _paired(known_y, known_x)
+    n = len(pairs)
+    mx = sum(x for x, _ in pairs) / n
+    my = sum(y for _, y in pairs) / n
+    sxx = sum((x - mx) ** 2 for x, _ in pairs)
+    if sxx == 0:
+        raise ExcelError("#DIV/0!")
+    return sum((x - mx) * (y - my) for x, y in pairs) / sxx
+
+def _fn_intercept(known_y, known_x):
+    pairs = _paired(known_y, known_x)
+    n = len(pairs)
+    mx = sum(x for x, _ in pairs) / n
+    my = sum(y for _, y in pairs) / n
+    return my - _fn_slope(known_y, known_x) * mx
+
+def _fn_rsq(known_y, known_x):
+    pairs = _paired(known_y, known_x)
+    n = len(pairs)
+    mx = sum(x for x, _ in pairs) / n
+    my = sum(y for _, y in pairs) / n
+    sxy = sum((x - mx) * (y - my) for x, y in pairs)
+    sxx = sum((x - mx) ** 2 for x, _ in pairs)
+    syy = sum((y - my) ** 2 for _, y in pairs)
+    if sxx == 0 or syy == 0:
+        raise ExcelError("#DIV/0!")
+    return (sxy * sxy) / (sxx * syy)
+
+def _fn_round(value, digits=0.0, mode="half"):
+    number = _to_number(value)
+    digits = int(_to_number(digits))
+    factor = 10 ** digits
+    scaled = abs(number) * factor
+    if mode == "up":
+        rounded = math.ceil(scaled - 1e-9)
+    elif mode == "down":
+        rounded = math.floor(scaled + 1e-9)
+    else:
+        rounded = math.floor(scaled + 0.5 + 1e-9)
+    return math.copysign(rounded / factor, number)
+
+def _fn_sqrt(value):
+    number = _to_number(value)
+    if number < 0:
+        raise ExcelError("#NUM!")
+    return math.sqrt(number)
+
+def _fn_count(*args):
+    return float(sum(1 for value, _ in _flatten(args)
+                     if isinstance(value, (int, float)) and not isinstance(value, bool)))
+
+def _fn_counta(*args):
+    return float(sum(1 for value, _ in _flatten(args) if value is not None and value != ""))
+
+def _fn_and(*args):
+    values = [_to_bool(v) for v, _ in _flatten(args) if v is not None]
+    if not values:
+        raise ExcelError("#VALUE!")
+    return all(values)
+
+def _fn_or(*args):
+    values = [_to_bool(v) for v, _ in _flatten(args) if v is not None]
+    if not values:
+        raise ExcelError("#VALUE!")
+    return any(values)
+
+def _fn_index(ref, row_num, col_num=None):
+    rng = _as_range(ref)
+    row = int(_to_number(row_num))
+    col = int(_to_number(col_num)) if col_num is not None else 1
+    if len(rng.rows) == 1 and col_num is None:
+        row, col = 1, row
+    try:
+        return rng.rows[row - 1][col - 1]
+    except IndexError:
+        raise ExcelError("#REF!")
+
+def _fn_match(lookup, ref, match_type=1.0):
+    values = list(_as_range(ref).values())
+    match_type = int(_to_number(match_type))
+    if match_type == 0:
+        for idx, value in enumerate(values, 1):
+            if value is not None and _compare(value, lookup) == 0:
+                return float(idx)
+        raise ExcelError("#N/A")
+    found = None
+    for idx, value in enumerate(values, 1):
+        if value is None:
+            continue
+        cmp = _compare(value, lookup)
+        if (match_type > 0 and cmp <= 0) or (match_type < 0 and cmp >= 0):
+            found = idx
+        else:
+            break
+    if found is None:
+        raise ExcelError("#N/A")
+    return float(found)
+
+def _as_range(value):
+    if isinstance(value, RangeValue):
+        return value
+    return RangeValue([[value]])
+
+def _fn_sumproduct(*args):
+    ranges = [list(_as_range(a).values()) for a in args]
+    if len({len(r) for r in ranges}) != 1:
+        raise ExcelError("#VALUE!")
+    total = 0.0
+    for values in zip(*ranges):
+        product = 1.0
+        for value in values:
+            _check(value)
+            product *= float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else 0.0
+        total += product
+    return total
+
+def _fn_countif(ref, criteria):
+    criteria = _check(criteria)
+    op, target = "=", criteria
+    if isinstance(criteria, str):
+        m = re.match(r'^(<=|>=|<>|<|>|=)?(.*)$', criteria)
+        op = m.group(1) or "="
+        target = m.group(2)
+        try:
+            target = float(target)
+        except ValueError:
+            pass
+    count = 0
+    for value in _as_range(ref).values():
+        if value is None or isinstance(value, ExcelError):
+            continue
+        if isinstance(target, float) and not isinstance(value, (int, float)):
+            if op != "<>":
+                continue
+            count += 1
+            continue
+        cmp = _compare(value, target)
+        if _COMPARE_OPS[op](cmp):
+            count += 1
+    return float(count)
+
+_COMPARE_OPS = {
+    "=": lambda c: c == 0,
+    "<>": lambda c: c != 0,
+    "<": lambda c: c < 0,
+    ">": lambda c: c > 0,
+    "<=": lambda c: c <= 0,
+    ">=": lambda c: c >= 0,
+}
+
+# 일반 함수: 인수를 모두 계산한 뒤 호출 (범위는 RangeValue로 전달)
+FUNCTIONS = {
+    'SUM': lambda *a: sum(_numbers(a)),
+    'AVERAGE': _fn_average,
+    'MIN': lambda *a: min(_numbers(a), default=0.0),
+    'MAX': lambda *a: max(_numbers(a), default=0.0),
+    'COUNT': _fn_count,
+    'COUNTA': _fn_counta,
+    'COUNTIF': _fn_countif,
+    'STDEV': _fn_stdev,
+    'STDEV.S': _fn_stdev,
+    'VAR': _fn_var,
+    'VAR.S': _fn_var,
+    'SLOPE': _fn_slope,
+    'INTERCEPT': _fn_intercept,
+    'RSQ': _fn_rsq,
+    'SUMPRODUCT': _fn_sumproduct,
+    'ABS': lambda v: abs(_to_number(_scalar(v))),
+    'SQRT': lambda v: _fn_sqrt(_scalar(v)),
+    'POWER': lambda v, p: _to_number(_scalar(v)) ** _to_number(_scalar(p)),
+    'ROUND': lambda v, d=0.0: _fn_round(_scalar(v), _scalar(d)),
+    'ROUNDUP': lambda v, d=0.0: _fn_round(_scalar(v), _scalar(d), "up"),
+    'ROUNDDOWN': lambda v, d=0.0: _fn_round(_scalar(v), _scalar(d), "down"),
+    'INT': lambda v: float(math.floor(_to_number(_scalar(v)))),
+    'TRUNC': lambda v, d=0.0: _fn_round(_scalar(v), _scalar(d), "down"),
+    'AND': _fn_and,
+    'OR': _fn_or,
+    'NOT': lambda v: not _to_bool(_scalar(v)),
+    'TRUE': lambda: True,
+    'FALSE': lambda: False,
+    'ISBLANK': lambda v: _scalar(v) is None,
+    'ISNUMBER': lambda v: isinstance(_scalar(v), (int, float)) and not isinstance(_scalar(v), bool),
+    'ISTEXT': lambda v: isinstance(_scalar(v), str),
+    'LEN': lambda v: float(len(_to_text(_scalar(v)))),
+    'VALUE': lambda v: _to_number(_scalar(v)),
+    'CONCATENATE': lambda *a: "".join(_to_text(_scalar(v)) for v in a),
+    'INDEX': _fn_index,
+    'MATCH': _fn_match,
+}
+
+# 지연 계산 함수: 선택된 인수만 계산 (IF 분기, 오류 처리)
+LAZY_FUNCTIONS = {'IF', 'IFERROR', 'ISERROR', 'CHOOSE'}
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 수식 파서 (openpyxl Tokenizer 토큰 → 계산 함수)
+# ─────────────────────────────────────────────────────────────────────────────
+_INFIX_PRECEDENCE = {
+    '=': 1, '<>': 1, '<': 1, '>': 1, '<=': 1, '>=': 1,
+    '&': 2,
+    '+': 3, '-': 3,
+    '*': 4, '/': 4,
+    '^': 5,
+}
+_PREFIX_PRECEDENCE = 6
+
+_REF_RE = re.compile(r"^(?:(?:'((?:[^']|'')+)'|([^!]+))!)?(.+)$")
+
+def _split_reference(text, default_sheet):
+    m = _REF_RE.match(text)
+    sheet = m.group(1).replace("''", "'") if m.group(1) else (m.group(2) or default_sheet)
+    return sheet, m.group(3).replace('$', '')
+
+class _Parser:
+    """토큰 목록을 계산 함수(클로저)로 변환하는 재귀 하강 파서"""
+
+    def __init__(self, formula, sheet, model):
+        tokens = Tokenizer(formula).items
+        self.tokens = [t for t in tokens if t.type != Token.WSPACE]
+        self.pos = 0
+        self.sheet = sheet
+        self.model = model
+        self.references = []  # 이 수식이 참조하는 (sheet, coord) 목록
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.expression(0)
+        if self.peek() is not None:
+            raise FormulaError(f"해석할 수 없는 토큰: {self.peek().value}")
+        return node
+
+    def expression(self, min_prec):
+        left = self.unary()
+        while True:
+            token = self.peek()
+            if token is None or token.type != Token.OP_IN:
+                break
+            op = token.value
+            prec = _INFIX_PRECEDENCE.get(op)
+            if prec is None:
+                raise FormulaError(f"지원하지 않는 연산자: {op}")
+            if prec < min_prec:
+                break
+            self.take()
+            right = self.expression(prec + 1)
+            left = self.binary(op, left, right)
+        return left
+
+    def unary(self):
+        token = self.peek()
+        if token is not None and token.type == Token.OP_PRE:
+            self.take()
+            operand = self.expression(_PREFIX_PRECEDENCE)
+            if token.value == '-':
+                return lambda ctx: -_to_number(_scalar(operand(ctx)))
+            return operand
+        node = self.primary()
+        # 후위 연산자 (%)
+        while self.peek() is not None and self.peek().type == Token.OP_POST:
+            self.take()
+            inner = node
+            node = lambda ctx, inner=inner: _to_number(_scalar(inner(ctx))) / 100.0
+        return node
+
+    def primary(self):
+        token = self.take()
+        if token is None:
+            raise FormulaError("수식이 예상보다 일찍 끝났습니다.")
+
+        if token.type == Token.OPERAND:
+            return self.operand(token)
+
+        if token.type == Token.PAREN and token.subtype == Token.OPEN:
+            node = self.expression(0)
+            closing = self.take()
+            if closing is None or closing.type != Token.PAREN:
+                raise FormulaError("괄호가 닫히지 않았습니다.")
+            return node
+
+        if token.type == Token.FUNC and token.subtype == Token.OPEN:
+            return self.function(token.value[:-1].upper())
+
+        raise FormulaError(f"해석할 수 없는 토큰: {token.value}")
+
+    def operand(self, token):
+        if token.subtype == Token.NUMBER:
+            value = float(token.value)
+            return lambda ctx: value
+        if token.subtype == Token.TEXT:
+            value = token.value[1:-1].replace('""', '"')
+            return lambda ctx: value
+        if token.subtype == Token.LOGICAL:
+            value = token.value.upper() == "TRUE"
+            return lambda ctx: value
+        if token.subtype == Token.ERROR:
+            code = token.value
+            return lambda ctx: _check(ExcelError(code))
+        if token.subtype == Token.RANGE:
+            return self.reference(token.value)
+        raise FormulaError(f"지원하지 않는 피연산자: {token.value}")
+
+    def reference(self, text):
+        # 이름 정의(Defined Name) 해석
+        resolved = self.model.resolve_name(text)
+        if resolved is not None:
+            text = resolved
+
+        sheet, ref = _split_reference(text, self.sheet)
+        try:
+            min_col, min_row, max_col, max_row = range_boundaries(ref)
+        except ValueError:
+            raise FormulaError(f"해석할 수 없는 참조: {text}")
+        if min_row is None or max_row is None:
+            min_row = min_row or 1
+            max_row = self.model.sheet_max_row(sheet)
+        if min_col is None or max_col is None:
+            min_col = min_col or 1
+            max_col = self.model.sheet_max_col(sheet)
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > MAX_RANGE_CELLS:
+            raise FormulaError(f"범위가 너무 큽니다: {text}")
+
+        keys = [[(sheet, f"{get_column_letter(c)}{r}") for c in range(min_col, max_col + 1)]
+                for r in range(min_row, max_row + 1)]
+        for row in keys:
+            self.references.extend(row)
+
+        if len(keys) == 1 and len(keys[0]) == 1:
+            key = keys[0][0]
+            return lambda ctx: _check(ctx.get(key))
+        return lambda ctx: RangeValue([[ctx.get(key) for key in row] for row in keys])
+
+    def function(self, name):
+        args = []
+        if self.peek() is not None and self.peek().type == Token.FUNC and self.peek().subtype == Token.CLOSE:
+            self.take()
+        else:
+            while True:
+                token = self.peek()
+                if token is not None and token.type == Token.SEP and token.subtype == Token.ARG:
+                    args.append(lambda ctx: None)  # 생략된 인수
+                else:
+                    args.append(self.expression(0))
+                token = self.take()
+                if token is None:
+                    raise FormulaError(f"{name} 함수가 닫히지 않았습니다.")
+                if token.type == Token.FUNC and token.subtype == Token.CLOSE:
+                    break
+                if not (token.type == Token.SEP and token.subtype == Token.ARG):
+                    raise FormulaError(f"{name} 함수 인수 해석 오류: {token.value}")
+
+        if name.startswith("_XLFN."):
+            name = name[len("_XLFN."):]
+
+        if name in LAZY_FUNCTIONS:
+            return self.lazy_function(name, args)
+
+        func = FUNCTIONS.get(name)
+        if func is None:
+            raise FormulaError(f"지원하지 않는 함수: {name}")
+
+        def call(ctx):
+            try:
+                return func(*[arg(ctx) for arg in args])
+            except TypeError:
+                raise ExcelError("#VALUE!")
+            except ZeroDivisionError:
+                raise ExcelError("#DIV/0!")
+            except (OverflowError, ValueError):
+                raise ExcelError("#NUM!")
+        return call
+
+    def lazy_function(self, name, args):
+        if name == 'IF':
+            if not 1 <= len(args) <= 3:
+                raise FormulaError("IF 함수 인수 개수 오류")
+            cond = args[0]
+            when_true = args[1] if len(args) > 1 else (lambda ctx: True)
+            when_false = args[2] if len(args) > 2 else (lambda ctx: False)
+            return lambda ctx: when_true(ctx) if _to_bool(_scalar(cond(ctx))) else when_false(ctx)
+
+        if name == 'IFERROR':
+            value, fallback = args[0], args[1]
+
+            def iferror(ctx):
+                try:
+                    return _check(_scalar(value(ctx)))
+                except ExcelError:
+                    return fallback(ctx)
+            return iferror
+
+        if name == 'ISERROR':
+            value = args[0]
+
+            def iserror(ctx):
+                try:
+                    _check(_scalar(value(ctx)))
+                    return False
+                except ExcelError:
+                    return True
+            return iserror
+
+        # CHOOSE
+        index, choices = args[0], args[1:]
+
+        def choose(ctx):
+            idx = int(_to_number(_scalar(index(ctx))))
+            if not 1 <= idx <= len(choices):
+                raise ExcelError("#VALUE!")
+            return choices[idx - 1](ctx)
+        return choose
+
+    def binary(self, op, left, right):
+        if op == '&':
+            return lambda ctx: _to_text(_scalar(left(ctx))) + _to_text(_scalar(right(ctx)))
+        if op in _COMPARE_OPS:
+            check = _COMPARE_OPS[op]
+            return lambda ctx: check(_compare(_scalar(left(ctx)), _scalar(right(ctx))))
+
+        def arithmetic(ctx):
+            a = _to_number(_scalar(left(ctx)))
+            b = _to_number(_scalar(right(ctx)))
+            if op == '+':
+                return a + b
+            if op == '-':
+                return a - b
+            if op == '*':
+                return a * b
+            if op == '/':
+                if b == 0:
+                    raise ExcelError("#DIV/0!")
+                return a / b
+            try:
+                return float(a ** b)
+            except (ZeroDivisionError, OverflowError):
+                raise ExcelError("#NUM!")
+        return arithmetic
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 수식 모델 (템플릿 1회 로드)
+# ─────────────────────────────────────────────────────────────────────────────
+class _EvalContext:
+    """계산 1회분의 셀 값 캐시"""
+
+    def __init__(self, model, inputs, reader=None):
+        self.model = model
+        self.inputs = inputs
+        self.reader = reader
+        self.cache = {}
+        self.in_progress = set()
+
+    def get(self, key):
+        if key in self.cache:
+            return self.cache[key]
+
+        if key in self.inputs:
+            value = self.inputs[key]
+            compiled = self.model.compile_input(key, value)
+        elif key in self.model.formulas or key in self.model.constants:
+            value = self.model.constants.get(key)
+            compiled = self.model.formulas.get(key)
+        elif self.reader is not None:
+            # 템플릿 그래프 밖의 셀 (입력 수식이 새로 참조하는 셀)
+            value = self.reader(key)
+            compiled = self.model.compile_input(key, value)
+        else:
+            value, compiled = None, None
+
+        if compiled is not None:
+            if key in self.in_progress:
+                raise FormulaError(f"순환 참조: {key[0]}!{key[1]}")
+            self.in_progress.add(key)
+            try:
+                value = _scalar(compiled(self))
+            except ExcelError as e:
+                value = e
+            finally:
+                self.in_progress.discard(key)
+        else:
+            value = _normalize(value)
+
+        self.cache[key] = value
+        return value
+
+def _normalize(value):
+    """셀 값을 계산용 값으로 변환 (정수 → 실수, 날짜 → Excel 일련번호)"""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, int):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return float(to_excel(value))
+    return value
+
+class LinearityFormulaModel:
+    """
+    템플릿에서 판정 셀이 의존하는 수식만 모아 둔 계산 모델
+
+    Args:
+        template_path (str): Linearity_ED2 템플릿 경로 (.xlsx/.xlsm)
+        targets (list): 계산할 셀 [(sheet, coord), ...] (기본: Linearity!D29:H29)
+        strict (bool): False이면 해석할 수 없는 수식을 오류 대신 빈 셀로 처리하고 unsupported에 기록
+    """
+
+    def __init__(self, template_path, targets=None, strict=True):
+        self.template_path = template_path
+        self.targets = targets or [(RESULT_SHEET, cell) for cell in RESULT_CELLS]
+        self.strict = strict
+        self.unsupported = {}
+        self.constants = {}
+        self.formulas = {}
+        self._template_values = {}
+        self._input_cache = {}
+
+        wb = openpyxl.load_workbook(template_path, data_only=False)
+        try:
+            self._wb = wb
+            self._names = {}
+            for name, defined in wb.defined_names.items():
+                if defined.attr_text and '!' in defined.attr_text:
+                    self._names[name.upper()] = defined.attr_text
+            self._build(self.targets)
+        finally:
+            self._wb = None
+            wb.close()
+
+        # 입력으로 덮어쓸 수 있는 셀 (수식 그래프 안의 모든 셀)
+        self.dependency_keys = sorted(set(self.constants) | set(self.formulas))
+
+    def resolve_name(self, text):
+        return self._names.get(text.upper()) if self._names else None
+
+    def sheet_max_row(self, sheet):
+        return self._sheet(sheet).max_row
+
+    def sheet_max_col(self, sheet):
+        return self._sheet(sheet).max_column
+
+    def _sheet(self, sheet):
+        if self._wb is None:
+            raise FormulaError("템플릿 로드 이후에는 새 범위를 해석할 수 없습니다.")
+        if sheet not in self._wb.sheetnames:
+            raise FormulaError(f"시트를 찾을 수 없습니다: {sheet}")
+        return self._wb[sheet]
+
+    def _build(self, targets):
+        """판정 셀에서 시작하여 참조하는 셀만 따라가며 수식을 컴파일"""
+        pending = list(targets)
+        seen = set()
+        while pending:
+            key = pending.pop()
+            if key in seen:
+                continue
+            seen.add(key)
+            sheet, coord = key
+            value = self._sheet(sheet)[coord].value
+            self._template_values[key] = value
+            formula = _formula_text(value)
+            if formula is None:
+                self.constants[key] = value
+                continue
+            parser = _Parser(formula, sheet, self)
+            try:
+                self.formulas[key] = parser.parse()
+            except FormulaError as e:
+                if self.strict:
+                    raise
+                self.unsupported[key] = str(e)
+                self.constants[key] = None
+                continue
+            pending.extend(parser.references)
+
+    def compile_input(self, key, value):
+        """입력값이 수식 문자열이면 컴파일 (같은 수식은 재사용)"""
+        formula = _formula_text(value)
+        if formula is None:
+            return None
+        cache_key = (key[0], formula)
+        compiled = self._input_cache.get(cache_key)
+        if compiled is None:
+            compiled = _Parser(formula, key[0], self).parse()
+            self._input_cache[cache_key] = compiled
+        return compiled
+
+    def evaluate(self, inputs=None, reader=None):
+        """
+        입력값을 적용하여 판정 셀을 계산하는 함수
+
+        Args:
+            inputs (dict): {(sheet, coord): 값 또는 '=수식'} 템플릿 값을 덮어쓸 셀
+            reader (callable): 템플릿 그래프 밖의 셀 값을 읽는 함수 (선택)
+
+        Returns:
+            dict: {(sheet, coord): 계산 결과} (오류는 ExcelError 인스턴스)
+        """
+        ctx = _EvalContext(self, inputs or {}, reader)
+        return {key: ctx.get(key) for key in self.targets}
+
+    def read_inputs(self, wb):
+        """
+        채워진 openpyxl 워크북에서 수식 그래프에 속한 셀 중 템플릿과 달라진 값만 읽는 함수
+        """
+        inputs = {}
+        for key in self.dependency_keys:
+            sheet, coord = key
+            if sheet not in wb.sheetnames:
+                continue
+            value = wb[sheet][coord].value
+            if value != self._template_values.get(key):
+                inputs[key] = value
+        return inputs
+
+def _formula_text(value):
+    if value is None:
+        return None
+    text = getattr(value, 'text', value)  # ArrayFormula
+    if isinstance(text, str) and text.startswith('=') and len(text) > 1:
+        return text
+    return None
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 판정
+# ─────────────────────────────────────────────────────────────────────────────
+def judge_linearity_results(values):
+    """
+    D29~H29 값으로 Pass/Fail을 판정하는 함수 (Excel COM 검증과 같은 규칙)
+    "Pass"가 하나 이상 있고 "Fail"이 없으면 Pass
+
+    Args:
+        values (list): D29~H29 셀 값 (순서대로)
+
+    Returns:
+        tuple: (is_valid, status_suffix)
+    """
+    pass_count = 0
+    for value in values:
+        cell_str = str(value).strip() if value is not None else ""
+        if "Pass" in cell_str:
+            pass_count += 1
+        elif "Fail" in cell_str:
+            return False, "_F"
+    if pass_count > 0:
+        return True, "_P"
+    return False, "_F"
+
+def validate_linearity_workbook(model, wb):
+    """
+    채워진 워크북(저장 전, 메모리상)을 수식 엔진으로 검증하는 함수
+
+    Args:
+        model (LinearityFormulaModel): load_formula_model()의 결과
+        wb (openpyxl.Workbook): 데이터가 입력된 워크북
+
+    Returns:
+        tuple: (is_valid, status_suffix) - "_P" 또는 "_F"
+    """
+    def reader(key):
+        sheet, coord = key
+        return wb[sheet][coord].value if sheet in wb.sheetnames else None
+
+    results = model.evaluate(model.read_inputs(wb), reader)
+    return judge_linearity_results([results[key] for key in model.targets])
+
+def validate_linearity_cells(model, cells, reader=None):
+    """
+    입력할 셀 값만으로(워크북 없이) 수식 엔진 검증을 하는 함수
+
+    Args:
+        model (LinearityFormulaModel): 템플릿 수식 모델
+        cells (dict): {(sheet, coord): 값 또는 '=수식'} 입력할 셀 값
+        reader (callable): 입력 밖의 셀 값을 읽는 함수 (예: LinearityTemplate.template_cell_value)
+
+    Returns:
+        tuple: (is_valid, status_suffix) - "_P" 또는 "_F"
+    """
+    results = model.evaluate(cells, reader)
+    return judge_linearity_results([results[key] for key in model.targets])
+
+def evaluate_linearity_cells(model, cells, reader=None):
+    """
+    입력할 셀 값으로 판정과 수식 셀 계산 결과를 함께 구하는 함수 (계산 1회)
+    계산 결과는 저장할 때 수식 셀의 캐시 값으로 기록하는 데 사용합니다.
+
+    Args:
+        model (LinearityFormulaModel): 템플릿 수식 모델
+        cells (dict): {(sheet, coord): 값 또는 '=수식'} 입력할 셀 값
+        reader (callable): 입력 밖의 셀 값을 읽는 함수 (예: LinearityTemplate.template_cell_value)
+
+    Returns:
+        tuple: ((is_valid, status_suffix), {(sheet, coord): 계산 결과})
+            계산 결과는 입력 수식 셀과 판정에 쓰인 템플릿 수식 셀 (오류는 ExcelError 인스턴스)
+    """
+    ctx = _EvalContext(model, cells, reader)
+    verdict = judge_linearity_results([ctx.get(key) for key in model.targets])
+    computed = {key: ctx.get(key) for key, value in cells.items() if _formula_text(value)}
+    for key in model.formulas:
+        if key not in cells:
+            computed[key] = ctx.get(key)
+    return verdict, computed
+
+def compare_with_cached_values(excel_file_path, tolerance=1e-9, targets=None):
+    """
+    Excel이 저장한 캐시 값과 수식 엔진의 계산 결과를 비교하는 함수
+    (Excel에서 계산 후 저장한 워크북으로 엔진을 검증할 때 사용)
+
+    Args:
+        excel_file_path (str): Excel에서 저장한 워크북 경로
+        tolerance (float): 숫자 비교 허용 오차
+        targets (list): 비교할 수식 셀 [(sheet, coord), ...] (기본: Linearity!D29:H29)
+
+    Returns:
+        list: [(셀, 엔진 값, Excel 캐시 값), ...] 불일치 목록 (비어 있으면 일치)
+    """
+    model = LinearityFormulaModel(excel_file_path, targets)
+    computed = model.evaluate()
+
+    cached_wb = openpyxl.load_workbook(excel_file_path, data_only=True)
+    try:
+        mismatches = []
+        for sheet, coord in model.targets:
+            expected = cached_wb[sheet][coord].value
+            actual = computed[(sheet, coord)]
+            if isinstance(actual, ExcelError):
+                actual = str(actual)
+            if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+                if abs(float(expected) - float(actual)) <= tolerance * max(1.0, abs(float(expected))):
+                    continue
+            elif expected == actual:
+                continue
+            mismatches.append((f"{sheet}!{coord}", actual, expected))
+        return mismatches
+    finally:
+        cached_wb.close()
@@ -0,0 +1,348 @@
+"""
+Linearity 보고서 PDF 렌더러 (Excel 없이 PyMuPDF로 생성)
+
+템플릿의 첫 3개 시트(Instructions / Data Entry / Linearity 등)를 Excel의 "첫 3개 시트 PDF
+내보내기"와 같은 3페이지 보고서로 그립니다.
+
+템플릿에서 한 번만 만드는 것 (ReportLayout, 템플릿당 캐시):
+    - 열 너비 / 행 높이 / 병합 셀로 계산한 셀 위치
+    - 배경 PDF: 채우기 색, 테두리, 고정 텍스트를 미리 그려 둔 3페이지 문서
+보고서마다 하는 것:
+    - 배경 PDF를 복사하고 입력값과 수식 결과(값이 바뀌는 셀)만 텍스트로 추가
+"""
+import re
+from datetime import date, datetime, timedelta
+
+import pymupdf
+from openpyxl.utils import range_boundaries
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 (pt)
+PAGE_MARGIN = 36
+CELL_PADDING = 2.0
+DEFAULT_FONT_SIZE = 11
+REPORT_SHEET_COUNT = 3
+
+# 글꼴 (한글 등 Latin-1 밖의 문자는 CJK 글꼴 사용)
+_FONTS = {}
+
+def _font(name):
+    font = _FONTS.get(name)
+    if font is None:
+        font = _FONTS[name] = pymupdf.Font(name)
+    return font
+
+def _pick_font(text, bold):
+    if any(ord(ch) > 255 for ch in text):
+        return _font("cjk")
+    return _font("hebo" if bold else "helv")
+
+def _rgb(color):
+    """openpyxl 색상(ARGB 문자열)을 PyMuPDF RGB(0~1)로 변환 (테마 색상 등은 None)"""
+    rgb = getattr(color, 'rgb', None) if color is not None else None
+    if not isinstance(rgb, str) or len(rgb) < 6:
+        return None
+    rgb = rgb[-6:]
+    try:
+        return tuple(int(rgb[i:i + 2], 16) / 255 for i in (0, 2, 4))
+    except ValueError:
+        return None
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 표시 형식
+# ─────────────────────────────────────────────────────────────────────────────
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+
+def format_value(value, number_format="General"):
+    """
+    셀 값을 Excel 표시 형식에 가깝게 문자열로 변환하는 함수
+    (General, 0.00, #,##0.0, 0.0%, 날짜 형식 정도만 지원)
+    """
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    if not isinstance(value, (int, float)):
+        return str(value)
+
+    fmt = (number_format or "General").split(';')[0]
+    fmt_plain = re.sub(r'"[^"]*"|\[[^\]]*\]|\\.', '', fmt)
+    if re.search(r'[yd]', fmt_plain, re.I) and 'General' not in fmt_plain:
+        try:
+            return (_EXCEL_EPOCH + timedelta(days=float(value))).strftime("%Y-%m-%d")
+        except (OverflowError, ValueError):
+            return str(value)
+    m = re.search(r'[#0,]*0(?:\.(0+))?', fmt_plain)
+    if m and 'General' not in fmt_plain:
+        decimals = len(m.group(1) or "")
+        percent = '%' in fmt_plain
+        number = value * 100 if percent else value
+        text = f"{number:,.{decimals}f}" if ',' in m.group(0) else f"{number:.{decimals}f}"
+        return text + ("%" if percent else "")
+    # General: 최대 유효숫자 10자리
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return f"{value:.10g}"
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 레이아웃 (템플릿당 한 번)
+# ─────────────────────────────────────────────────────────────────────────────
+class _CellBox:
+    __slots__ = ('key', 'rect', 'number_format', 'bold', 'font_size', 'color', 'align')
+
+    def __init__(self, key, rect, number_format, bold, font_size, color, align):
+        self.key = key
+        self.rect = rect
+        self.number_format = number_format
+        self.bold = bold
+        self.font_size = font_size
+        self.color = color
+        self.align = align
+
+def _print_range(ws):
+    """인쇄 영역 (없으면 사용된 범위)"""
+    area = ws.print_area
+    if area:
+        first = area.split(',')[0] if isinstance(area, str) else area[0]
+        return range_boundaries(first.split('!')[-1].replace('$', ''))
+    return range_boundaries(ws.dimensions)
+
+def _column_widths(ws, min_col, max_col):
+    """열 너비 (pt) - 숨긴 열은 0"""
+    default = ws.sheet_format.defaultColWidth or ((ws.sheet_format.baseColWidth or 8) + 0.71)
+    widths = {col: default for col in range(min_col, max_col + 1)}
+    hidden = set()
+    for dim in ws.column_dimensions.values():
+        lo, hi = dim.min or 0, dim.max or 0
+        for col in range(max(lo, min_col), min(hi, max_col) + 1):
+            if dim.hidden:
+                hidden.add(col)
+            elif dim.width:
+                widths[col] = dim.width
+    return {col: 0 if col in hidden else (chars * 7 + 5) * 0.75 for col, chars in widths.items()}
+
+def _row_heights(ws, min_row, max_row):
+    """행 높이 (pt) - 숨긴 행은 0"""
+    default = ws.sheet_format.defaultRowHeight or 15
+    heights = {}
+    for row in range(min_row, max_row + 1):
+        dim = ws.row_dimensions.get(row)
+        if dim is not None and dim.hidden:
+            heights[row] = 0
+        else:
+            heights[row] = (dim.height if dim is not None and dim.height else default)
+    return heights
+
+class _PageLayout:
+    def __init__(self, ws, dynamic_keys):
+        self.sheet = ws.title
+        min_col, min_row, max_col, max_row = _print_range(ws)
+        widths = _column_widths(ws, min_col, max_col)
+        heights = _row_heights(ws, min_row, max_row)
+
+        # 한 페이지에 맞추기 (Excel의 "한 페이지에 시트 맞추기"와 같은 방식)
+        total_w = sum(widths.values()) or 1
+        total_h = sum(heights.values()) or 1
+        self.scale = min(1.0, (PAGE_WIDTH - 2 * PAGE_MARGIN) / total_w, (PAGE_HEIGHT - 2 * PAGE_MARGIN) / total_h)
+
+        xs, x = {}, PAGE_MARGIN
+        for col in range(min_col, max_col + 2):
+            xs[col] = x
+            x += widths.get(col, 0) * self.scale
+        ys, y = {}, PAGE_MARGIN
+        for row in range(min_row, max_row + 2):
+            ys[row] = y
+            y += heights.get(row, 0) * self.scale
+
+        # 병합 셀: 기준 셀은 병합 영역 전체, 나머지 셀은 건너뜀
+        merged_anchor, covered = {}, set()
+        for merged in ws.merged_cells.ranges:
+            c1, r1, c2, r2 = merged.min_col, merged.min_row, merged.max_col, merged.max_row
+            merged_anchor[(r1, c1)] = (min(c2, max_col), min(r2, max_row))
+            for r in range(r1, r2 + 1):
+                for c in range(c1, c2 + 1):
+                    if (r, c) != (r1, c1):
+                        covered.add((r, c))
+
+        self.fills = {}           # {색상: [Rect, ...]}
+        self.lines = []           # [(Point, Point), ...]
+        self.static_boxes = []    # [(_CellBox, 표시 텍스트, 숫자 여부)]
+        self.dynamic_boxes = []   # [_CellBox] 보고서마다 값이 바뀌는 셀
+
+        for row in ws.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col):
+            for cell in row:
+                r, c = cell.row, cell.column
+                if (r, c) in covered or not widths.get(c) or not heights.get(r):
+                    continue
+                c2, r2 = merged_anchor.get((r, c), (c, r))
+                rect = pymupdf.Rect(xs[c], ys[r], xs[c2 + 1], ys[r2 + 1])
+                if rect.is_empty:
+                    continue
+
+                if cell.has_style:
+                    fill = cell.fill
+                    if fill is not None and fill.fill_type == 'solid':
+                        color = _rgb(fill.fgColor)
+                        if color and color != (1.0, 1.0, 1.0):
+                            self.fills.setdefault(color, []).append(rect)
+                    border = cell.border
+                    if border is not None:
+                        if border.top is not None and border.top.style:
+                            self.lines.append((rect.tl, rect.tr))
+                        if border.bottom is not None and border.bottom.style:
+                            self.lines.append((rect.bl, rect.br))
+                        if border.left is not None and border.left.style:
+                            self.lines.append((rect.tl, rect.bl))
+                        if border.right is not None and border.right.style:
+                            self.lines.append((rect.tr, rect.br))
+
+                key = (ws.title, cell.coordinate)
+                value = cell.value
+                is_formula = isinstance(value, str) and value.startswith('=')
+                if key not in dynamic_keys and (value is None or is_formula):
+                    continue
+
+                font = cell.font
+                box = _CellBox(
+                    key, rect, cell.number_format,
+                    bool(font is not None and font.b),
+                    (font.sz if font is not None and font.sz else DEFAULT_FONT_SIZE) * self.scale,
+                    (font is not None and _rgb(font.color)) or (0, 0, 0),
+                    cell.alignment.horizontal if cell.alignment is not None else None,
+                )
+                if key in dynamic_keys:
+                    self.dynamic_boxes.append(box)
+                else:
+                    self.static_boxes.append((box, format_value(value, cell.number_format), _is_number(value)))
+
+class ReportLayout:
+    """
+    템플릿에서 한 번만 계산하는 보고서 레이아웃 (배경 PDF 포함)
+
+    Args:
+        wb (openpyxl.Workbook): 템플릿 워크북 (수식 포함, data_only=False)
+        input_keys (iterable): 보고서마다 입력되는 셀 [(sheet, coord), ...]
+    """
+
+    def __init__(self, wb, input_keys=()):
+        sheets = wb.worksheets[:REPORT_SHEET_COUNT]
+        input_keys = set(input_keys)
+
+        # 값이 바뀌는 셀: 입력 셀 + 수식 셀
+        self.dynamic_keys = set()
+        for ws in sheets:
+            for row in ws.iter_rows():
+                for cell in row:
+                    if isinstance(cell.value, str) and cell.value.startswith('='):
+                        self.dynamic_keys.add((ws.title, cell.coordinate))
+        self.dynamic_keys |= {key for key in input_keys if key[0] in {ws.title for ws in sheets}}
+
+        self.pages = [_PageLayout(ws, self.dynamic_keys) for ws in sheets]
+        self.background = self._render_background()
+
+    def _render_background(self):
+        """채우기 / 테두리 / 고정 텍스트를 그린 배경 PDF (바이트)"""
+        doc = pymupdf.open()
+        for page_layout in self.pages:
+            page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+            shape = page.new_shape()
+            for color, rects in page_layout.fills.items():
+                for rect in rects:
+                    shape.draw_rect(rect)
+                shape.finish(fill=color, color=None, width=0)
+            if page_layout.lines:
+                for p1, p2 in page_layout.lines:
+                    shape.draw_line(p1, p2)
+                shape.finish(color=(0, 0, 0), width=0.5 * page_layout.scale)
+            shape.commit()
+            _write_texts(page, page_layout.static_boxes)
+        data = doc.tobytes(garbage=1, deflate=True)
+        doc.close()
+        return data
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _write_texts(page, boxes_with_text):
+    """셀 텍스트를 TextWriter로 한 번에 쓰기 (글자색별로 묶음, 일반 맞춤은 숫자만 오른쪽)"""
+    writers = {}
+    for box, text, is_number in boxes_with_text:
+        if not text:
+            continue
+        font = _pick_font(text, box.bold)
+        size = box.font_size
+        width = font.text_length(text, fontsize=size)
+        rect = box.rect
+        align = box.align
+        if align in ('center', 'centerContinuous'):
+            x = (rect.x0 + rect.x1 - width) / 2
+        elif align == 'right' or (align in (None, 'general') and is_number):
+            x = rect.x1 - CELL_PADDING * size / DEFAULT_FONT_SIZE - width
+        else:
+            x = rect.x0 + CELL_PADDING * size / DEFAULT_FONT_SIZE
+        y = rect.y1 - max((rect.height - size) / 2, 0) - size * 0.2
+        writer = writers.get(box.color)
+        if writer is None:
+            writer = writers[box.color] = pymupdf.TextWriter(page.rect)
+        writer.append((x, y), text, font=font, fontsize=size)
+    for color, writer in writers.items():
+        writer.write_text(page, color=color)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 보고서 생성
+# ─────────────────────────────────────────────────────────────────────────────
+def render_linearity_report(layout, values, output_path=None):
+    """
+    입력값과 계산 결과로 3페이지 보고서 PDF를 만드는 함수
+
+    Args:
+        layout (ReportLayout): 템플릿 레이아웃 (LinearityTemplate.report_layout)
+        values (dict): {(sheet, coord): 값} 입력 셀과 수식 셀의 표시할 값
+        output_path (str): 저장 경로 (None이면 바이트로 반환)
+
+    Returns:
+        bytes 또는 None: output_path가 없으면 PDF 바이트
+    """
+    doc = pymupdf.open("pdf", layout.background)
+    try:
+        for page, page_layout in zip(doc, layout.pages):
+            _write_texts(page, [
+                (box, format_value(values.get(box.key), box.number_format), _is_number(values.get(box.key)))
+                for box in page_layout.dynamic_boxes
+            ])
+        if output_path:
+            doc.save(output_path, garbage=1, deflate=True)
+            return None
+        return doc.tobytes(garbage=1, deflate=True)
+    finally:
+        doc.close()
+
+def compute_report_values(template, cells):
+    """
+    보고서에 표시할 값 계산 (입력 셀 값 + 수식 엔진으로 계산한 수식 셀 값)
+
+    Args:
+        template (LinearityTemplate): 템플릿 (report_layout, report_model 사용)
+        cells (dict): LinearityTemplate.fill_cells()의 결과
+
+    Returns:
+        dict: {(sheet, coord): 값}
+    """
+    values = dict(cells)
+    values.update(template.report_model.evaluate(cells, template.template_cell_value))
+    return values
+
+def export_linearity_report(template, cells, pdf_file_path):
+    """
+    채운 값으로 보고서 PDF를 저장하는 함수 (Excel의 첫 3개 시트 PDF 내보내기 대체)
+
+    Returns:
+        bool: 성공 여부
+    """
+    try:
+        render_linearity_report(template.report_layout, compute_report_values(template, cells), pdf_file_path)
+        return True
+    except Exception as e:
+        print(f"PDF 렌더링 오류: {e}")
+        return False
@@ -0,0 +1,102 @@
+"""
+Linearity 통계 계산 모듈 (NumPy, 모든 분석 항목을 한 번에 계산)
+
+워크북을 만들기 전에 CSV만으로 결과를 미리 확인하기 위한 사전 점검용입니다.
+    - 반복 측정값: CSV 37~41행(1차), 42~46행(2차) = Data Entry E32:I32, E33:I33
+    - 평균: Data Entry E19:I19 (=AVERAGE(E32, E33) 등)
+    - ATE%: CSV 15행 = Data Entry F11
+    - 회귀: 5개 수준 평균의 기울기 / 절편 / R², 회귀직선에서 각 수준 평균이 벗어난 정도(%)
+
+이 모듈은 기술 통계만 계산하고 Pass/Fail은 판정하지 않습니다. 판정 규칙과 수준별 목표값은
+템플릿에 있으므로, 판정은 템플릿 수식(linearity_eval)으로만 합니다.
+"""
+import numpy as np
+import pandas as pd
+
+import linearity_csv
+
+LEVEL_COUNT = 5
+
+def extract_linearity_inputs(linearity_data):
+    """
+    분석 항목별 레코드에서 분석 항목명, 반복 측정값, ATE%를 배열로 추출하는 함수
+    (잘못된 숫자 칸은 NaN)
+
+    Args:
+        linearity_data (LinearityCsv): linearity_csv.parse_linearity_csv()의 결과
+
+    Returns:
+        tuple: (analytes 리스트, replicates 배열 (n, 2, 5), ate_pct 배열 (n,))
+    """
+    records = linearity_data.records
+    analytes = [record["Analyte"] for record in records]
+    replicates = np.array(
+        [[record["Replicate1"], record["Replicate2"]] for record in records], dtype=float
+    ).reshape(len(records), 2, LEVEL_COUNT)
+    ate_pct = np.array([record["ATEPct"] for record in records], dtype=float).reshape(len(records))
+    return analytes, replicates, ate_pct
+
+def compute_linearity_stats(replicates, levels=None):
+    """
+    모든 분석 항목의 Linearity 기술 통계를 한 번에 계산하는 함수 (판정 없음)
+
+    Args:
+        replicates (ndarray): 반복 측정값 (n, 2, 5)
+        levels (sequence): 수준별 상대 농도 (기본: 1~5 등간격)
+
+    Returns:
+        dict: means (n, 5), slope / intercept / r2 (n,), fitted / deviation_pct (n, 5)
+    """
+    replicates = np.asarray(replicates, dtype=float)
+    x = np.asarray(levels if levels is not None else np.arange(1, LEVEL_COUNT + 1), dtype=float)
+
+    means = replicates.mean(axis=1)                             # E19:I19
+    x_centered = x - x.mean()
+    sxx = (x_centered ** 2).sum()
+    y_mean = means.mean(axis=1, keepdims=True)
+    slope = (means - y_mean) @ x_centered / sxx
+    intercept = y_mean[:, 0] - slope * x.mean()
+    fitted = intercept[:, None] + slope[:, None] * x[None, :]
+
+    ss_res = ((means - fitted) ** 2).sum(axis=1)
+    ss_tot = ((means - y_mean) ** 2).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r2 = np.where(ss_tot > 0, 1 - ss_res / ss_tot, np.nan)
+        deviation_pct = np.abs(means - fitted) / np.abs(fitted) * 100
+    deviation_pct = np.where(np.isfinite(deviation_pct), deviation_pct, np.inf)
+
+    return {
+        "means": means,
+        "slope": slope,
+        "intercept": intercept,
+        "r2": r2,
+        "fitted": fitted,
+        "deviation_pct": deviation_pct,
+    }
+
+def precheck_table(linearity_data, levels=None):
+    """
+    사전 점검 결과 표 (분석 항목별 평균, 회귀 통계, CSV 검증 결과)
+    CSV에 잘못된 숫자 칸이 있는 항목은 CSV가 "Invalid"입니다 (나머지는 "OK").
+
+    Args:
+        linearity_data (LinearityCsv | list): 분석 항목별 레코드 또는 CSV 전체 행 리스트
+
+    Returns:
+        pandas.DataFrame
+    """
+    if not isinstance(linearity_data, linearity_csv.LinearityCsv):
+        linearity_data = linearity_csv.parse_linearity_csv(linearity_data)
+    analytes, replicates, ate_pct = extract_linearity_inputs(linearity_data)
+    stats = compute_linearity_stats(replicates, levels)
+
+    table = pd.DataFrame({"Analyte": analytes, "ATE%": ate_pct})
+    for i in range(LEVEL_COUNT):
+        table[f"Mean L{i + 1}"] = stats["means"][:, i]
+    table["Slope"] = stats["slope"]
+    table["Intercept"] = stats["intercept"]
+    table["R²"] = stats["r2"]
+    table["Max Fit Dev%"] = stats["deviation_pct"].max(axis=1)
+    invalid = np.array([bool(record["issues"]) for record in linearity_data.records], dtype=bool)
+    table["CSV"] = np.where(invalid, "Invalid", "OK")
+    return table
@@ -0,0 +1,482 @@
+"""
+Linearity_ED2 템플릿 워크북을 한 번만 불러와서 분석 항목(Analyte)마다 재사용하는 모듈
+
+매크로 포함 템플릿(.xlsm)을 열 때마다 VBA 프로젝트까지 다시 파싱하지 않도록,
+템플릿을 한 번 불러온 뒤 각 항목은 원본 상태로 되돌린 워크북을 받아서 채웁니다.
+"""
+import hashlib
+import io
+import os
+import posixpath
+import re
+import struct
+import threading
+import zipfile
+import zlib
+from contextlib import contextmanager
+from xml.sax.saxutils import escape as xml_escape, unescape as xml_unescape
+
+import openpyxl
+from openpyxl.utils import column_index_from_string
+from openpyxl.utils.cell import coordinate_to_tuple
+
+def hash_bytes(data):
+    """파일 내용의 SHA-256 해시 (캐시 키로 사용)"""
+    return hashlib.sha256(data).hexdigest()
+
+def _take_snapshot(wb):
+    """워크북의 모든 셀 값/형식을 기록 (복원용)"""
+    return {
+        ws.title: {key: (cell._value, cell.data_type) for key, cell in ws._cells.items()}
+        for ws in wb.worksheets
+    }
+
+def _restore_snapshot(wb, snapshot):
+    """기록해 둔 상태로 셀을 되돌림 (새로 생긴 셀은 삭제)"""
+    for ws in wb.worksheets:
+        saved = snapshot.get(ws.title, {})
+        cells = ws._cells
+        for key in list(cells):
+            original = saved.get(key)
+            if original is None:
+                del cells[key]
+            else:
+                cell = cells[key]
+                if cell._value is not original[0] or cell.data_type != original[1]:
+                    cell._value, cell.data_type = original
+
+class LinearityTemplate:
+    """
+    한 번 파싱한 Linearity_ED2 템플릿 워크북
+
+    Args:
+        template_bytes (bytes): 템플릿 파일 내용 (.xlsx/.xlsm)
+        mapping_path (str): 채우기 매핑 파일 (기본: linearity_ed2_fill.json)
+    """
+
+    def __init__(self, template_bytes, mapping_path=None):
+        self.template_bytes = template_bytes
+        self.mapping_path = mapping_path
+        self.content_hash = hash_bytes(template_bytes)
+        self._workbook = openpyxl.load_workbook(io.BytesIO(template_bytes), keep_vba=True)
+        self._snapshot = _take_snapshot(self._workbook)
+        self._lock = threading.Lock()
+        self._formula_model = None
+        self._fill_plan = None
+        self._patcher = None
+        self._report_layout = None
+        self._report_model = None
+
+    @classmethod
+    def from_path(cls, template_path, mapping_path=None):
+        with open(template_path, 'rb') as f:
+            return cls(f.read(), mapping_path)
+
+    @property
+    def sheetnames(self):
+        return self._workbook.sheetnames
+
+    @property
+    def fill_plan(self):
+        """이 템플릿 시트에 맞춰 컴파일한 채우기 계획 (처음 사용할 때 한 번만 생성)"""
+        if self._fill_plan is None:
+            import fill_plan
+            mapping = fill_plan.load_fill_mapping(self.mapping_path or fill_plan.LINEARITY_ED2_MAPPING)
+            self._fill_plan = fill_plan.compile_fill_plan(mapping, self.sheetnames)
+        return self._fill_plan
+
+    def fill_cells(self, record):
+        """분석 항목 레코드 하나의 입력 셀 값 {(시트명, 셀 주소): 값 또는 '=수식'}"""
+        return self.fill_plan.cells(record)
+
+    @property
+    def formula_model(self):
+        """Pass/Fail 판정용 수식 모델 (처음 사용할 때 한 번만 생성)"""
+        if self._formula_model is None:
+            import linearity_eval
+            self._formula_model = linearity_eval.LinearityFormulaModel(io.BytesIO(self.template_bytes))
+        return self._formula_model
+
+    @property
+    def report_layout(self):
+        """Excel 없이 PDF 보고서를 그리기 위한 레이아웃 (처음 사용할 때 한 번만 생성)"""
+        if self._report_layout is None:
+            import linearity_report
+            input_keys = self.fill_plan.cell_keys
+            with self.fresh_workbook() as wb:
+                self._report_layout = linearity_report.ReportLayout(wb, input_keys)
+        return self._report_layout
+
+    @property
+    def report_model(self):
+        """보고서에 표시할 모든 수식 셀의 수식 모델 (해석할 수 없는 수식은 빈 셀로 표시)"""
+        if self._report_model is None:
+            import linearity_eval
+            self._report_model = linearity_eval.LinearityFormulaModel(
+                io.BytesIO(self.template_bytes), targets=sorted(self.report_layout.dynamic_keys), strict=False
+            )
+        return self._report_model
+
+    def template_cell_value(self, key):
+        """템플릿 원본 셀 값 (수식 엔진에서 입력 밖의 셀을 읽을 때 사용)"""
+        sheet, coord = key
+        saved = self._snapshot.get(sheet)
+        if saved is None:
+            return None
+        original = saved.get(coordinate_to_tuple(coord))
+        return original[0] if original else None
+
+    def save_filled(self, output_path, cells, cached=None):
+        """
+        셀 값을 채운 결과 파일을 저장하는 함수
+        가능하면 압축 파일 수준 패치(TemplatePatcher)로 바뀐 워크시트 XML만 고쳐 쓰고,
+        템플릿 구조상 불가능하면 openpyxl 저장으로 대체합니다.
+
+        Args:
+            output_path (str): 저장 경로
+            cells (dict): {(시트명, 셀 주소): 값 또는 '=수식'}
+            cached (dict): {(시트명, 셀 주소): 계산 결과} 수식 셀에 함께 기록할 캐시 값
+                (linearity_eval.evaluate_linearity_cells, 패치 저장에서만 기록됨)
+
+        Returns:
+            str: 사용한 저장 방식 ("patch" 또는 "openpyxl")
+        """
+        if self._patcher is None:
+            try:
+                self._patcher = TemplatePatcher(self.template_bytes)
+            except PatchError:
+                self._patcher = False
+        if self._patcher:
+            try:
+                self._patcher.write(output_path, cells, cached)
+                return "patch"
+            except PatchError:
+                pass
+        with self.fresh_workbook() as wb:
+            apply_cells(wb, cells)
+            wb.save(output_path)
+        return "openpyxl"
+
+    @contextmanager
+    def fresh_workbook(self):
+        """
+        템플릿 원본 상태의 워크북을 빌려주는 컨텍스트 매니저
+        블록 안에서 값을 채우고 저장한 뒤, 블록이 끝나면 변경된 셀을 원래대로 되돌립니다.
+        여러 세션이 같은 템플릿을 공유해도 한 번에 하나씩만 사용합니다.
+
+        Yields:
+            openpyxl.Workbook: 템플릿 상태의 워크북 (블록 밖에서는 사용하지 말 것)
+        """
+        with self._lock:
+            try:
+                yield self._workbook
+            finally:
+                _restore_snapshot(self._workbook, self._snapshot)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 셀 값 → openpyxl 워크북
+# ─────────────────────────────────────────────────────────────────────────────
+def apply_cells(wb, cells):
+    """셀 값을 openpyxl 워크북에 입력 (템플릿에 없는 시트는 건너뜀)"""
+    for (sheet, coord), value in cells.items():
+        if sheet in wb.sheetnames:
+            wb[sheet][coord] = value
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 압축 파일 수준 셀 패치 저장기
+# ─────────────────────────────────────────────────────────────────────────────
+class PatchError(Exception):
+    """템플릿 구조상 XML 직접 수정이 안전하지 않은 경우 (openpyxl 저장으로 대체)"""
+
+_LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+_CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+_END_RECORD = struct.Struct('<IHHHHIIH')
+
+def _dos_datetime(date_time):
+    year, month, day, hour, minute, second = date_time
+    dos_date = (max(year, 1980) - 1980) << 9 | month << 5 | day
+    dos_time = hour << 11 | minute << 5 | (second // 2)
+    return dos_time, dos_date
+
+def _xml_attr(tag_text, name):
+    m = re.search(r'\b%s="([^"]*)"' % re.escape(name), tag_text)
+    return m.group(1) if m else None
+
+def _cached_value_xml(value):
+    """
+    수식 셀의 캐시 값 XML
+
+    Returns:
+        tuple: (t 속성 또는 None, '<v>...</v>') - 기록할 값이 없으면 (None, '')
+    """
+    if value is None:
+        return None, ''
+    if isinstance(value, bool):
+        return 'b', f'<v>{int(value)}</v>'
+    if isinstance(value, (int, float)):
+        return None, f'<v>{repr(float(value))}</v>'
+    if isinstance(value, Exception):  # linearity_eval.ExcelError (#DIV/0! 등)
+        return 'e', f'<v>{xml_escape(str(value))}</v>'
+    return 'str', f'<v>{xml_escape(str(value))}</v>'
+
+def _set_cached_value(cell_xml, value):
+    """기존 수식 셀의 수식은 그대로 두고 캐시 값(<v>)과 형식(t)만 바꾸기"""
+    t_attr, value_xml = _cached_value_xml(value)
+    head_end = cell_xml.index('>')
+    head = cell_xml[:head_end]
+    head = re.sub(r'\st="[^"]*"', '', head)
+    if t_attr:
+        head += f' t="{t_attr}"'
+    body = re.sub(r'<v\s*/>|<v\b[^>]*>.*?</v>', '', cell_xml[head_end + 1:], flags=re.S)
+    body = body[:body.rindex('</c>')] + value_xml + '</c>'
+    return head + '>' + body
+
+def _cell_xml(coord, style, value, cached=None):
+    """
+    openpyxl과 같은 규칙으로 셀 XML 생성 (문자열은 inlineStr로 써서 sharedStrings.xml은 그대로 둠)
+    수식은 cached가 있으면 계산 결과를 캐시 값으로 함께 기록합니다.
+    """
+    attrs = f'r="{coord}"' + (f' s="{style}"' if style else '')
+    if value is None or value == "":
+        return f'<c {attrs}/>'
+    if isinstance(value, bool):
+        return f'<c {attrs} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c {attrs}><v>{repr(float(value)) if isinstance(value, float) else value}</v></c>'
+    text = str(value)
+    if text.startswith('=') and len(text) > 1:
+        t_attr, value_xml = _cached_value_xml(cached)
+        if t_attr:
+            attrs += f' t="{t_attr}"'
+        return f'<c {attrs}><f>{xml_escape(text[1:])}</f>{value_xml}</c>'
+    space = ' xml:space="preserve"' if text != text.strip() else ''
+    return f'<c {attrs} t="inlineStr"><is><t{space}>{xml_escape(text)}</t></is></c>'
+
+def _column_index(coord):
+    return column_index_from_string(re.match(r'[A-Z]+', coord).group(0))
+
+def _patch_sheet_xml(xml, values, has_calc_chain, cached=None):
+    """
+    워크시트 XML 안에서 지정한 셀만 고쳐 쓰는 함수
+
+    Args:
+        xml (str): 원본 워크시트 XML
+        values (dict): {셀 주소: 값}
+        has_calc_chain (bool): 템플릿에 calcChain.xml이 있는지 여부
+        cached (dict): {셀 주소: 계산 결과} 수식 셀의 캐시 값 (values에 없는 셀은 기존 수식 셀만 갱신)
+
+    Returns:
+        str: 수정된 XML
+    """
+    cached = cached or {}
+    by_row = {}
+    for coord, value in values.items():
+        row_num = int(re.search(r'\d+', coord).group(0))
+        by_row.setdefault(row_num, {})[coord] = value
+    cached_by_row = {}
+    for coord, value in cached.items():
+        if coord not in values:
+            row_num = int(re.search(r'\d+', coord).group(0))
+            cached_by_row.setdefault(row_num, {})[coord] = value
+
+    if '<sheetData/>' in xml:
+        xml = xml.replace('<sheetData/>', '<sheetData></sheetData>', 1)
+    if '</sheetData>' not in xml:
+        raise PatchError("sheetData 요소를 찾을 수 없습니다.")
+
+    for row_num in sorted(set(by_row) | set(cached_by_row)):
+        row_re = re.compile(r'<row\b[^>]*?\br="%d"[^>]*?(?:/>|>.*?</row>)' % row_num, re.S)
+        m = row_re.search(xml)
+        if m:
+            row_xml = m.group(0)
+        elif row_num not in by_row:
+            continue
+        else:
+            # 행이 없으면 번호 순서에 맞게 새로 삽입
+            row_xml = f'<row r="{row_num}"/>'
+            insert_at = xml.index('</sheetData>')
+            for rm in re.finditer(r'<row\b[^>]*?\br="(\d+)"', xml):
+                if int(rm.group(1)) > row_num:
+                    insert_at = rm.start()
+                    break
+            xml = xml[:insert_at] + row_xml + xml[insert_at:]
+            m = row_re.search(xml)
+
+        if row_xml.endswith('/>'):
+            row_xml = row_xml[:-2] + '></row>'
+
+        # 템플릿 수식 셀: 수식은 그대로 두고 캐시 값만 갱신
+        for coord, value in cached_by_row.get(row_num, {}).items():
+            cm = re.search(r'<c\b[^>]*?\br="%s"[^>]*?(?:/>|>.*?</c>)' % coord, row_xml, re.S)
+            if cm and cm.group(0).endswith('</c>') and '<f' in cm.group(0):
+                row_xml = row_xml[:cm.start()] + _set_cached_value(cm.group(0), value) + row_xml[cm.end():]
+
+        for coord, value in by_row.get(row_num, {}).items():
+            cell_re = re.compile(r'<c\b[^>]*?\br="%s"[^>]*?(?:/>|>.*?</c>)' % coord, re.S)
+            cm = cell_re.search(row_xml)
+            style = None
+            if cm:
+                old_cell = cm.group(0)
+                style = _xml_attr(old_cell[:old_cell.index('>')], 's')
+                formula_tag = re.search(r'<f\b[^>]*>', old_cell) or re.search(r'<f\b[^>]*/>', old_cell)
+                if formula_tag:
+                    ftag = formula_tag.group(0)
+                    if _xml_attr(ftag, 't') in ('shared', 'array') and (_xml_attr(ftag, 'ref') or _xml_attr(ftag, 't') == 'array'):
+                        raise PatchError(f"공유/배열 수식의 기준 셀은 직접 수정할 수 없습니다: {coord}")
+                    is_new_formula = isinstance(value, str) and value.startswith('=')
+                    if has_calc_chain and not is_new_formula:
+                        raise PatchError(f"calcChain에 있는 수식 셀을 값으로 바꿀 수 없습니다: {coord}")
+                new_cell = _cell_xml(coord, style, value, cached.get(coord))
+                row_xml = row_xml[:cm.start()] + new_cell + row_xml[cm.end():]
+            else:
+                # 열 순서에 맞게 새 셀 삽입
+                new_cell = _cell_xml(coord, style, value, cached.get(coord))
+                col = _column_index(coord)
+                insert_at = row_xml.rindex('</row>')
+                for ccm in re.finditer(r'<c\b[^>]*?\br="([A-Z]+)\d+"', row_xml):
+                    if column_index_from_string(ccm.group(1)) > col:
+                        insert_at = ccm.start()
+                        break
+                row_xml = row_xml[:insert_at] + new_cell + row_xml[insert_at:]
+
+        xml = xml[:m.start()] + row_xml + xml[m.end():]
+    return xml
+
+def _set_full_calc_on_load(xml):
+    """workbook.xml에 fullCalcOnLoad="1"을 설정 (Excel이 열 때 다시 계산하도록)"""
+    m = re.search(r'<calcPr\b[^>]*?/?>', xml)
+    if m:
+        tag = m.group(0)
+        if 'fullCalcOnLoad=' in tag:
+            new_tag = re.sub(r'fullCalcOnLoad="[^"]*"', 'fullCalcOnLoad="1"', tag)
+        else:
+            end = -2 if tag.endswith('/>') else -1
+            new_tag = tag[:end] + ' fullCalcOnLoad="1"' + tag[end:]
+        return xml[:m.start()] + new_tag + xml[m.end():]
+    for marker in ('<oleSize', '<customWorkbookViews', '<pivotCaches', '<smartTagPr',
+                   '<smartTagTypes', '<webPublishing', '<fileRecoveryPr',
+                   '<webPublishObjects', '<extLst', '</workbook>'):
+        idx = xml.find(marker)
+        if idx != -1:
+            return xml[:idx] + '<calcPr fullCalcOnLoad="1"/>' + xml[idx:]
+    raise PatchError("workbook.xml 구조를 해석할 수 없습니다.")
+
+class TemplatePatcher:
+    """
+    템플릿 .xlsm 압축 파일을 복사하면서 값이 바뀌는 워크시트 XML만 고쳐 쓰는 저장기
+    나머지 파일(VBA 프로젝트, 스타일, 그림 등)은 압축된 바이트 그대로 복사합니다.
+
+    Args:
+        template_bytes (bytes): 템플릿 파일 내용
+    """
+
+    def __init__(self, template_bytes):
+        self._entries = []   # [(ZipInfo, 압축된 원본 바이트)]
+        self._xml = {}       # {파일 경로: 압축 해제된 XML 문자열} (수정 대상만)
+        with zipfile.ZipFile(io.BytesIO(template_bytes)) as zf:
+            infos = zf.infolist()
+            if len(infos) >= 0xFFFF or any(i.file_size >= 0xFFFFFFFF or i.compress_size >= 0xFFFFFFFF for i in infos):
+                raise PatchError("ZIP64 템플릿은 지원하지 않습니다.")
+            for info in infos:
+                if info.flag_bits & 0x1:
+                    raise PatchError("암호화된 템플릿은 지원하지 않습니다.")
+                self._entries.append((info, self._raw_data(template_bytes, info)))
+            names = {info.filename for info in infos}
+            self.has_calc_chain = 'xl/calcChain.xml' in names
+            self.sheet_parts = self._read_sheet_parts(zf)
+            for part in list(self.sheet_parts.values()) + ['xl/workbook.xml']:
+                if part not in names:
+                    raise PatchError(f"템플릿에서 {part} 파일을 찾을 수 없습니다.")
+                self._xml[part] = zf.read(part).decode('utf-8')
+
+    @staticmethod
+    def _raw_data(data, info):
+        """로컬 헤더를 건너뛰고 압축된 데이터만 잘라내기"""
+        offset = info.header_offset
+        fields = _LOCAL_HEADER.unpack_from(data, offset)
+        name_len, extra_len = fields[9], fields[10]
+        start = offset + _LOCAL_HEADER.size + name_len + extra_len
+        return data[start:start + info.compress_size]
+
+    @staticmethod
+    def _read_sheet_parts(zf):
+        """workbook.xml과 관계 파일에서 {시트명: 워크시트 XML 경로} 읽기"""
+        workbook_xml = zf.read('xl/workbook.xml').decode('utf-8')
+        rels_xml = zf.read('xl/_rels/workbook.xml.rels').decode('utf-8')
+        targets = {}
+        for m in re.finditer(r'<Relationship\b[^>]*?>', rels_xml):
+            tag = m.group(0)
+            rel_id, target = _xml_attr(tag, 'Id'), _xml_attr(tag, 'Target')
+            if rel_id and target:
+                target = target.lstrip('/') if target.startswith('/') else 'xl/' + target
+                targets[rel_id] = posixpath.normpath(target)
+        parts = {}
+        for m in re.finditer(r'<(?:\w+:)?sheet\b[^>]*?/?>', workbook_xml):
+            tag = m.group(0)
+            name = _xml_attr(tag, 'name')
+            rel_id = re.search(r'\b\w+:id="([^"]*)"', tag)
+            if name and rel_id and rel_id.group(1) in targets:
+                parts[xml_unescape(name, {'&quot;': '"', '&apos;': "'"})] = targets[rel_id.group(1)]
+        return parts
+
+    def write(self, output_path, cells, cached=None):
+        """
+        셀 값을 반영한 새 .xlsm 파일을 저장하는 함수
+
+        Args:
+            output_path (str): 저장 경로
+            cells (dict): {(시트명, 셀 주소): 값 또는 '=수식'} (템플릿에 없는 시트는 건너뜀)
+            cached (dict): {(시트명, 셀 주소): 계산 결과} 수식 셀의 캐시 값 (선택)
+        """
+        by_sheet = {}
+        for (sheet, coord), value in cells.items():
+            part = self.sheet_parts.get(sheet)
+            if part is not None:
+                by_sheet.setdefault(part, {})[coord] = value
+        cached_by_sheet = {}
+        for (sheet, coord), value in (cached or {}).items():
+            part = self.sheet_parts.get(sheet)
+            if part is not None:
+                cached_by_sheet.setdefault(part, {})[coord] = value
+
+        replaced = {}
+        for part in set(by_sheet) | set(cached_by_sheet):
+            replaced[part] = _patch_sheet_xml(
+                self._xml[part], by_sheet.get(part, {}), self.has_calc_chain, cached_by_sheet.get(part)
+            ).encode('utf-8')
+        if replaced:
+            replaced['xl/workbook.xml'] = _set_full_calc_on_load(self._xml['xl/workbook.xml']).encode('utf-8')
+
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, 'wb') as out:
+            central = []
+            for info, raw in self._entries:
+                flag_bits = info.flag_bits & ~0x08  # 크기를 헤더에 직접 기록 (data descriptor 사용 안 함)
+                if info.filename in replaced:
+                    data = replaced[info.filename]
+                    crc = zlib.crc32(data) & 0xFFFFFFFF
+                    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+                    raw = compressor.compress(data) + compressor.flush()
+                    method, file_size = zipfile.ZIP_DEFLATED, len(data)
+                else:
+                    crc, method, file_size = info.CRC, info.compress_type, info.file_size
+
+                name = info.filename.encode('utf-8' if flag_bits & 0x800 else 'cp437')
+                dos_time, dos_date = _dos_datetime(info.date_time)
+                offset = out.tell()
+                out.write(_LOCAL_HEADER.pack(
+                    0x04034b50, info.extract_version, flag_bits, method, dos_time, dos_date,
+                    crc, len(raw), file_size, len(name), 0))
+                out.write(name)
+                out.write(raw)
+                central.append(_CENTRAL_HEADER.pack(
+                    0x02014b50, info.create_version | (info.create_system << 8), info.extract_version,
+                    flag_bits, method, dos_time, dos_date, crc, len(raw), file_size,
+                    len(name), 0, 0, 0, info.internal_attr, info.external_attr, offset) + name)
+
+            cd_offset = out.tell()
+            for record in central:
+                out.write(record)
+            out.write(_END_RECORD.pack(
+                0x06054b50, 0, 0, len(central), len(central), out.tell() - cd_offset, cd_offset, 0))
+        os.replace(tmp_path, output_path)
@@ -0,0 +1,382 @@
+"""
+처리량/오류 메트릭 모듈 (Prometheus 텍스트 형식, 외부 라이브러리 없음)
+
+공용 서버의 용량 계획용으로 변환 수(장비/모드별), 처리한 페이지/행 수, 처리 시간 분포와
+백분위수, 캐시 적중, 예외 종류별 실패, Linearity 파일 판정(Pass/Fail) 수를 모읍니다.
+값은 변환/파일/작업이 끝날 때 한 번만 갱신하므로 (페이지 루프에서는 갱신하지 않음)
+메트릭마다 짧은 잠금 한 번이면 충분합니다.
+
+내보내기 (둘 다 선택, 앱 시작 시 start_exporters()):
+    REAF_METRICS_FILE=/path/reaf.prom  - 주기적으로 파일에 기록 (node_exporter textfile 수집기 형식)
+    REAF_METRICS_PORT=9108             - 127.0.0.1:포트/metrics 로 제공 (REAF_METRICS_HOST로 주소 변경)
+    REAF_METRICS_INTERVAL=15           - 파일 기록 주기 (초)
+"""
+import bisect
+import collections
+import math
+import os
+import tempfile
+import threading
+import time
+
+# 처리 시간 히스토그램 구간 (초)
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# 백분위수 계산에 쓰는 최근 관측값 수 (레이블 조합별)
+SUMMARY_WINDOW = 1024
+
+# 내보낼 백분위수
+SUMMARY_QUANTILES = (0.5, 0.9, 0.99)
+
+# 파일 기록 기본 주기 (초)
+DEFAULT_WRITE_INTERVAL = 15.0
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if math.isnan(value):
+            return "NaN"
+        return repr(value)
+    return str(value)
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+class _Metric:
+    """메트릭 공통 부분 (레이블 조합별 값, 메트릭마다 잠금 하나)"""
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self):
+        """[(접미사, 레이블 값, 추가 레이블, 값), ...]"""
+        with self._lock:
+            return [("", key, (), value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+class Counter(_Metric):
+    """증가만 하는 값"""
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+class Gauge(_Metric):
+    """
+    현재 값 (set() 또는 내보낼 때 호출하는 함수)
+
+    Args:
+        callback (callable): callback() -> 값 또는 {레이블 값 튜플: 값} (지정하면 set()은 쓰지 않음)
+    """
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _samples(self):
+        if self.callback is None:
+            return super()._samples()
+        try:
+            value = self.callback()
+        except Exception:
+            return []
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        return [("", tuple(key), (), item) for key, item in items]
+
+class Histogram(_Metric):
+    """구간별 누적 개수 + 합계 + 개수 (Prometheus histogram_quantile()로 백분위수 계산 가능)"""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in sorted(self._values.items())]
+        samples = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                samples.append(("_bucket", key, (("le", _format_value(float(bound))),), cumulative))
+            samples.append(("_sum", key, (), total))
+            samples.append(("_count", key, (), count))
+        return samples
+
+class Summary(_Metric):
+    """최근 window개 관측값의 백분위수 + 전체 합계/개수 (파일만 보고도 p50/p90/p99를 알 수 있게)"""
+    kind = "summary"
+
+    def __init__(self, name, documentation, labelnames=(), quantiles=SUMMARY_QUANTILES, window=SUMMARY_WINDOW):
+        super().__init__(name, documentation, labelnames)
+        self.quantiles = tuple(quantiles)
+        self.window = window
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [collections.deque(maxlen=self.window), 0.0, 0]
+            state[0].append(value)
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, sorted(recent), total, count) for key, (recent, total, count) in sorted(self._values.items())]
+        samples = []
+        for key, recent, total, count in items:
+            for q in self.quantiles:
+                value = recent[min(len(recent) - 1, int(q * len(recent)))] if recent else float("nan")
+                samples.append(("", key, (("quantile", _format_value(q)),), value))
+            samples.append(("_sum", key, (), total))
+            samples.append(("_count", key, (), count))
+        return samples
+
+class Registry:
+    """메트릭 목록 (등록 순서대로 내보냄)"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """같은 이름이 이미 있으면 기존 메트릭을 반환"""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None):
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def summary(self, name, documentation, labelnames=()):
+        return self.register(Summary(name, documentation, labelnames))
+
+    def render(self):
+        """Prometheus 텍스트 형식 (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+REGISTRY = Registry()
+
+# PDF 변환
+CONVERSIONS = REGISTRY.counter(
+    "reaf_conversions_total", "PDF conversions by analyzer, mode and status (ok/empty/failed)",
+    ("analyzer", "mode", "status"))
+CONVERSION_PAGES = REGISTRY.counter(
+    "reaf_conversion_pages_total", "PDF pages processed", ("analyzer", "mode"))
+CONVERSION_ROWS = REGISTRY.counter(
+    "reaf_conversion_rows_total", "Result rows extracted", ("analyzer", "mode"))
+CONVERSION_SECONDS = REGISTRY.histogram(
+    "reaf_conversion_duration_seconds", "PDF conversion wall time", ("analyzer", "mode"))
+CONVERSION_LATENCY = REGISTRY.summary(
+    "reaf_conversion_latency_seconds", "PDF conversion wall time percentiles (recent conversions)",
+    ("analyzer", "mode"))
+
+# 실패 (예외 종류별) - source: pdf / linearity / job
+FAILURES = REGISTRY.counter(
+    "reaf_failures_total", "Failures by source and exception type", ("source", "exception"))
+
+# 캐시 - 적중률 = 1 - misses / requests
+CACHE_REQUESTS = REGISTRY.counter(
+    "reaf_cache_requests_total", "Cache lookups", ("cache",))
+CACHE_MISSES = REGISTRY.counter(
+    "reaf_cache_misses_total", "Cache lookups that had to build the value", ("cache",))
+
+# Linearity 배치
+LINEARITY_FILES = REGISTRY.counter(
+    "reaf_linearity_files_total", "Linearity analytes by verdict (pass/fail/skipped/invalid/error)", ("verdict",))
+LINEARITY_BATCH_SECONDS = REGISTRY.histogram(
+    "reaf_linearity_batch_duration_seconds", "Linearity batch wall time")
+
+# 작업 실행기
+JOB_WAIT_SECONDS = REGISTRY.histogram(
+    "reaf_job_wait_seconds", "Time jobs spent waiting in the queue", buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0))
+JOBS_REJECTED = REGISTRY.counter(
+    "reaf_jobs_rejected_total", "Jobs rejected because the queue was full")
+
+def converter_labels(module):
+    """변환 모듈 이름 → (장비, 모드) 레이블 (예: Pro_CC_Seq_pdf_to_excel → ("CC", "Seq"))"""
+    parts = module.split("_")
+    if len(parts) >= 3 and parts[0] == "Pro":
+        return parts[1], parts[2]
+    return module, ""
+
+def record_conversion(module, status, seconds, pages=0, rows=0, exception=None):
+    """
+    PDF 변환 한 번의 결과 기록
+
+    Args:
+        module (str): 변환 모듈 이름
+        status (str): "ok" / "empty"(추출된 행 없음) / "failed"
+        seconds (float): 걸린 시간
+        pages (int): 처리한 페이지 수
+        rows (int): 추출한 행 수
+        exception (str): 실패한 경우 예외 종류 이름
+    """
+    analyzer, mode = converter_labels(module)
+    CONVERSIONS.inc(analyzer=analyzer, mode=mode, status=status)
+    if pages:
+        CONVERSION_PAGES.inc(pages, analyzer=analyzer, mode=mode)
+    if rows:
+        CONVERSION_ROWS.inc(rows, analyzer=analyzer, mode=mode)
+    CONVERSION_SECONDS.observe(seconds, analyzer=analyzer, mode=mode)
+    CONVERSION_LATENCY.observe(seconds, analyzer=analyzer, mode=mode)
+    if exception:
+        FAILURES.inc(source="pdf", exception=exception)
+
+def record_cache(cache, hits=0, misses=0):
+    """캐시 조회 결과 기록 (조회 수 = hits + misses)"""
+    if hits + misses:
+        CACHE_REQUESTS.inc(hits + misses, cache=cache)
+    if misses:
+        CACHE_MISSES.inc(misses, cache=cache)
+
+def write_textfile(path=None):
+    """
+    현재 메트릭을 파일에 기록 (임시 파일에 쓴 뒤 교체하므로 읽는 쪽이 반쯤 쓴 파일을 보지 않음)
+
+    Args:
+        path (str): 파일 경로 (None이면 REAF_METRICS_FILE, 둘 다 없으면 기록하지 않음)
+
+    Returns:
+        str: 기록한 경로 (기록하지 않았으면 None)
+    """
+    path = path or os.environ.get("REAF_METRICS_FILE")
+    if not path:
+        return None
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".reaf_metrics_", suffix=".prom", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(REGISTRY.render())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return path
+
+def start_http_server(port, host="127.0.0.1"):
+    """
+    /metrics 를 제공하는 작은 HTTP 서버를 데몬 스레드로 시작
+
+    Returns:
+        ThreadingHTTPServer: 실행 중인 서버 (server_address로 실제 포트 확인)
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="reaf-metrics-http", daemon=True).start()
+    return server
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+def start_exporters(log=print):
+    """
+    환경 변수에 따라 파일 기록 스레드 / HTTP 서버 시작 (프로세스당 한 번만)
+
+    Returns:
+        dict: {"file": 경로 또는 None, "http": (주소, 포트) 또는 None}
+    """
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return None
+        _exporters_started = True
+
+    started = {"file": None, "http": None}
+    path = os.environ.get("REAF_METRICS_FILE")
+    if path:
+        interval = float(os.environ.get("REAF_METRICS_INTERVAL", DEFAULT_WRITE_INTERVAL))
+
+        def writer():
+            while True:
+                try:
+                    write_textfile(path)
+                except OSError as e:
+                    log(f"[metrics] 메트릭 파일 기록 실패: {e}")
+                time.sleep(interval)
+
+        threading.Thread(target=writer, name="reaf-metrics-file", daemon=True).start()
+        started["file"] = path
+        log(f"[metrics] {path} 에 {interval:g}초마다 기록")
+    port = os.environ.get("REAF_METRICS_PORT")
+    if port:
+        try:
+            server = start_http_server(int(port), os.environ.get("REAF_METRICS_HOST", "127.0.0.1"))
+            started["http"] = server.server_address[:2]
+            log(f"[metrics] http://{started['http'][0]}:{started['http'][1]}/metrics")
+        except (OSError, ValueError) as e:
+            log(f"[metrics] HTTP 서버 시작 실패: {e}")
+    return started
@@ -0,0 +1,145 @@
+"""
+결과 파일 ZIP 묶음 모듈
+
+생성된 워크북/PDF를 만들어지는 대로 하나의 ZIP에 추가하여, 브라우저에서 한 번에
+내려받을 수 있게 합니다. ZIP은 메모리에서 만들고 크기가 커지면 임시 파일로 옮기며,
+경로를 지정하면 처음부터 그 파일에 씁니다 (작업 폴더에 남겨 두고 내려받을 때만 읽기).
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+
+# 이 크기를 넘으면 메모리 대신 임시 파일에 씀
+DEFAULT_SPILL_BYTES = 64 * 1024 * 1024
+
+# 이미 압축된 형식은 다시 압축하지 않음
+_STORED_EXTENSIONS = {".xlsx", ".xlsm", ".zip", ".png", ".jpg"}
+
+class OutputBundle:
+    """
+    결과 파일을 하나의 ZIP으로 묶는 번들 (여러 스레드에서 add_file 호출 가능)
+
+    Args:
+        spill_bytes (int): ZIP 크기가 이 값을 넘으면 임시 파일로 전환
+        path (str): ZIP을 쓸 파일 경로 (지정하면 메모리 대신 이 파일에 쓰고, save() 후에는 남겨 둠)
+    """
+
+    def __init__(self, spill_bytes=DEFAULT_SPILL_BYTES, path=None):
+        self.path = path
+        self.saved = False
+        if path:
+            self._buffer = open(path, 'w+b')
+        else:
+            self._buffer = tempfile.SpooledTemporaryFile(max_size=spill_bytes, suffix=".zip")
+        self._zip = zipfile.ZipFile(self._buffer, 'w')
+        self._lock = threading.Lock()
+        self._names = set()
+        self.file_count = 0
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.discard()
+
+    @property
+    def spilled(self):
+        """임시 파일로 전환되었는지 여부 (경로를 지정한 번들은 항상 True)"""
+        return bool(self.path) or bool(getattr(self._buffer, '_rolled', False))
+
+    def add_file(self, path, arcname=None):
+        """
+        파일 하나를 ZIP에 추가 (같은 이름은 한 번만 추가)
+
+        Args:
+            path (str): 추가할 파일 경로
+            arcname (str): ZIP 안의 이름 (기본: 파일 이름)
+        """
+        arcname = arcname or os.path.basename(path)
+        compress_type = (
+            zipfile.ZIP_STORED if os.path.splitext(arcname)[1].lower() in _STORED_EXTENSIONS
+            else zipfile.ZIP_DEFLATED
+        )
+        with self._lock:
+            if self.closed:
+                raise ValueError("이미 닫힌 번들입니다.")
+            if arcname in self._names:
+                return
+            self._zip.write(path, arcname, compress_type=compress_type)
+            self._names.add(arcname)
+            self.file_count += 1
+
+    def close(self):
+        """ZIP 마무리 (이후 size/read 사용 가능)"""
+        with self._lock:
+            if not self.closed:
+                self._zip.close()
+                self.closed = True
+
+    @property
+    def size(self):
+        """ZIP 크기 (bytes)"""
+        with self._lock:
+            position = self._buffer.tell()
+            self._buffer.seek(0, os.SEEK_END)
+            size = self._buffer.tell()
+            self._buffer.seek(position)
+            return size
+
+    def read(self):
+        """완성된 ZIP 내용 (close() 이후)"""
+        self.close()
+        with self._lock:
+            self._buffer.seek(0)
+            return self._buffer.read()
+
+    def save(self):
+        """
+        ZIP을 마무리하고 지정한 경로에 남겨 두는 함수 (path를 지정한 번들만, 이후 discard해도 파일 유지)
+
+        Returns:
+            str: ZIP 파일 경로
+        """
+        if not self.path:
+            raise ValueError("경로를 지정하지 않은 번들입니다.")
+        self.close()
+        self._buffer.close()
+        self.saved = True
+        return self.path
+
+    def discard(self):
+        """번들 정리 (임시 파일 삭제, 경로를 지정한 번들은 save()하지 않았으면 파일도 삭제)"""
+        self.close()
+        self._buffer.close()
+        if self.path and not self.saved:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+def create_work_directory(prefix="linearity", max_age_hours=24):
+    """
+    서버 임시 폴더에 작업 폴더를 새로 만드는 함수
+    같은 종류의 작업 폴더 중 max_age_hours보다 오래된 폴더는 함께 정리합니다.
+
+    Returns:
+        str: 작업 폴더 경로
+    """
+    root = os.path.join(tempfile.gettempdir(), f"reaf_{prefix}")
+    os.makedirs(root, exist_ok=True)
+    cutoff = time.time() - max_age_hours * 3600
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+    path = os.path.join(root, uuid.uuid4().hex)
+    os.makedirs(path)
+    return path
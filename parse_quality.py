@@ -0,0 +1,240 @@
+"""
+파싱 품질 카운터 모듈 (보고서 레이아웃 변화 감지)
+
+PDF 파서는 고정된 줄 위치(헤더 8번째/5번째 줄, 13번째/10번째~30번째 줄)와
+단위 목록에 의존하므로, 장비 펌웨어가 보고서 형식을 바꾸면 행이 조용히 빠질 수 있습니다.
+파서는 페이지마다 PageCounters에 이미 하고 있는 판단만 기록하고 (추가 순회 없음)
+    counters = quality.page(page_num)
+    ... = extract_data_from_other_pages(lines, counters=counters)
+변환이 끝나면 ParseQuality.warnings()로 이상 징후를 경고 문장으로 만들고,
+save_metrics()로 모듈별 누적 카운터를 메트릭 파일(JSON)에 더합니다.
+메트릭 파일 위치는 REAF_PARSE_METRICS로 바꿀 수 있습니다 (기본: 이 폴더의 parse_metrics.json).
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime
+
+# 데이터 창(30번째 줄) 뒤에서 결과 줄로 보는 패턴: [+] [ISE] 검사명 [1자리 숫자/v2] 숫자 결과
+RESULT_LIKE = re.compile(r'^\+?\s*(?:ISE\s+)?[A-Z][A-Z0-9\-]*(?:\s+(?:\d|[vV]\d+))*\s+[<>]?\d[\d\.,]*(?:\s|$)')
+
+# 제외 사유 → 경고 문장에 쓰는 설명
+REJECT_REASONS = {
+    "page_end": "test line at end of page (페이지 끝의 검사 줄)",
+    "no_unit": "no known unit on next line (다음 줄에 단위 없음)",
+    "short_unit_line": "unit line too short (단위 줄 항목 부족)",
+    "empty_next_line": "empty unit line (단위 줄이 비어 있음)",
+}
+
+# 변환 한 번에 표시할 최대 경고 수
+MAX_WARNINGS = 20
+
+_metrics_lock = threading.Lock()
+
+class PageCounters:
+    """
+    페이지 하나의 파싱 카운터 (파서가 직접 증가시킴)
+
+    Attributes:
+        page (int): 페이지 번호 (1부터)
+        lines (int): 데이터 창에서 검사한 줄 수 (단위 줄 제외)
+        candidates (int): 검사 줄 패턴과 일치한 줄 수
+        rows (int): 추출한 행 수
+        rejected (dict): {제외 사유: 줄 수}
+        past_window (int): 30번째 줄 뒤에서 결과 줄처럼 보이는 줄 수
+        blank_results (int): 결과 값이 빈 행 수
+        header (bool): 헤더 줄에서 Sample ID / Seq No.를 찾았는지
+    """
+    __slots__ = ("page", "lines", "candidates", "rows", "rejected", "past_window", "blank_results", "header")
+
+    def __init__(self, page=0):
+        self.page = page
+        self.lines = 0
+        self.candidates = 0
+        self.rows = 0
+        self.rejected = {}
+        self.past_window = 0
+        self.blank_results = 0
+        self.header = True
+
+    def reject(self, reason):
+        """검사 줄 하나를 reason 사유로 제외했음을 기록"""
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+
+    def finish(self, header_value, rows, lines, end_line):
+        """
+        페이지 파싱이 끝난 뒤 호출 (행 수, 헤더, 창 밖 결과 줄 기록)
+
+        Args:
+            header_value: 헤더에서 찾은 Sample ID / Seq No. (못 찾으면 None)
+            rows (list): 이 페이지에서 추출한 행
+            lines (list): 페이지의 모든 줄
+            end_line (int): 데이터 창의 끝 (이 줄부터는 파서가 읽지 않음)
+        """
+        self.header = header_value is not None
+        self.rows = len(rows)
+        self.blank_results = sum(1 for row in rows if row.get('result') in ("", None))
+        # 창 밖은 파서가 읽지 않는 부분이므로 여기서만 훑음 (결과 줄 + 다음 줄이 있는 쌍만 셈)
+        i = end_line
+        while i < len(lines) - 1:
+            if RESULT_LIKE.match(lines[i].strip()) and lines[i + 1].strip():
+                self.past_window += 1
+                i += 2
+            else:
+                i += 1
+
+class ParseQuality:
+    """
+    변환 한 번의 페이지별 파싱 카운터 모음
+
+    Args:
+        module (str): 변환 모듈 이름 (메트릭 파일의 키)
+        label (str): 변환 대상 이름 (예: PDF 파일명)
+        record (bool): 파싱 메트릭 파일과 처리량 메트릭(metrics)에 남길지 여부 (예열 등은 False)
+    """
+
+    def __init__(self, module, label="", record=True):
+        self.module = module
+        self.label = label
+        self.record = record
+        self.pages = []
+
+    def page(self, page_num):
+        """page_num 페이지의 카운터를 새로 만들어 반환"""
+        counters = PageCounters(page_num)
+        self.pages.append(counters)
+        return counters
+
+    def totals(self):
+        """
+        전체 페이지 합계
+
+        Returns:
+            dict: {"pages", "lines", "candidates", "rows", "rejected": {사유: 수}, "past_window",
+                   "blank_results", "missing_header", "empty_pages"}
+        """
+        totals = {
+            "pages": len(self.pages), "lines": 0, "candidates": 0, "rows": 0, "rejected": {},
+            "past_window": 0, "blank_results": 0, "missing_header": 0, "empty_pages": 0,
+        }
+        for counters in self.pages:
+            totals["lines"] += counters.lines
+            totals["candidates"] += counters.candidates
+            totals["rows"] += counters.rows
+            totals["past_window"] += counters.past_window
+            totals["blank_results"] += counters.blank_results
+            totals["missing_header"] += 0 if counters.header else 1
+            totals["empty_pages"] += 1 if counters.lines and not counters.candidates else 0
+            for reason, count in counters.rejected.items():
+                totals["rejected"][reason] = totals["rejected"].get(reason, 0) + count
+        return totals
+
+    def warnings(self, limit=MAX_WARNINGS):
+        """
+        이상 징후 경고 문장 목록 (없으면 빈 목록)
+
+        - 제외된 검사 줄, 30번째 줄 뒤의 결과처럼 보이는 줄, 결과 값이 빈 행
+        - 헤더에서 Sample ID / Seq No.를 못 찾았는데 검사 줄이 있는 페이지
+        - 다른 페이지에는 행이 있는데 검사 줄이 하나도 없는 페이지
+        """
+        messages = []
+        any_rows = any(counters.rows for counters in self.pages)
+        empty_pages = []
+        for counters in self.pages:
+            page = counters.page
+            dropped = sum(counters.rejected.values())
+            if dropped:
+                reasons = ", ".join(
+                    f"{REJECT_REASONS.get(reason, reason)}: {count}"
+                    for reason, count in counters.rejected.items()
+                )
+                messages.append(f"Page {page}: {dropped} test line(s) dropped (검사 줄 {dropped}개 제외) - {reasons}")
+            if counters.past_window:
+                messages.append(
+                    f"Page {page}: {counters.past_window} result-like line(s) after line 30 were not read "
+                    f"(30번째 줄 뒤의 결과로 보이는 줄 {counters.past_window}개 - 누락 가능)"
+                )
+            if counters.blank_results:
+                messages.append(
+                    f"Page {page}: {counters.blank_results} row(s) without a result value (결과 값이 빈 행 {counters.blank_results}개)"
+                )
+            if not counters.header and counters.candidates:
+                messages.append(f"Page {page}: Sample ID / Seq No. not found in header line (헤더 줄에서 ID를 찾지 못함)")
+            if any_rows and counters.lines and not counters.candidates:
+                empty_pages.append(str(page))
+        if empty_pages:
+            messages.append(
+                f"Page(s) {', '.join(empty_pages[:10])}{' ...' if len(empty_pages) > 10 else ''}: "
+                f"no test lines found (검사 줄이 없는 페이지 {len(empty_pages)}개)"
+            )
+        if self.pages and not any_rows:
+            messages.append(
+                f"No rows extracted from {len(self.pages)} page(s) - report layout may have changed "
+                f"({len(self.pages)}페이지에서 추출된 행 없음 - 보고서 형식 변경 가능)"
+            )
+        if len(messages) > limit:
+            extra = len(messages) - limit
+            messages = messages[:limit] + [f"... and {extra} more warning(s) (외 경고 {extra}개)"]
+        return messages
+
+def get_metrics_path():
+    """메트릭 파일 경로 (REAF_PARSE_METRICS 또는 이 폴더의 parse_metrics.json)"""
+    return os.environ.get("REAF_PARSE_METRICS") or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "parse_metrics.json"
+    )
+
+def load_metrics(path=None):
+    """메트릭 파일 읽기 (없거나 손상되었으면 빈 메트릭)"""
+    path = path or get_metrics_path()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            metrics = json.load(f)
+        if isinstance(metrics, dict) and isinstance(metrics.get("modules"), dict):
+            return metrics
+    except (OSError, ValueError):
+        pass
+    return {"modules": {}}
+
+def save_metrics(quality, path=None):
+    """
+    변환 한 번의 카운터를 메트릭 파일의 모듈별 누적값에 더함 (실패해도 변환은 계속)
+
+    Args:
+        quality (ParseQuality): 변환 한 번의 카운터
+        path (str): 메트릭 파일 경로 (None이면 get_metrics_path())
+
+    Returns:
+        list: 이번 변환의 경고 문장
+    """
+    warnings = quality.warnings()
+    if not quality.record:
+        return warnings
+    path = path or get_metrics_path()
+    totals = quality.totals()
+    now = datetime.now().isoformat(timespec="seconds")
+    with _metrics_lock:
+        metrics = load_metrics(path)
+        entry = metrics["modules"].setdefault(quality.module, {})
+        entry["conversions"] = entry.get("conversions", 0) + 1
+        entry["conversions_with_warnings"] = entry.get("conversions_with_warnings", 0) + (1 if warnings else 0)
+        for key, value in totals.items():
+            if key == "rejected":
+                rejected = entry.setdefault("rejected", {})
+                for reason, count in value.items():
+                    rejected[reason] = rejected.get(reason, 0) + count
+            else:
+                entry[key] = entry.get(key, 0) + value
+        if warnings:
+            entry["last_warning"] = {"time": now, "pdf": quality.label, "warnings": warnings[:5]}
+        metrics["updated"] = now
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            fd, tmp_path = tempfile.mkstemp(prefix=".parse_metrics_", suffix=".json", dir=directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(metrics, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"파싱 메트릭 저장 실패: {e}")
+    return warnings
@@ -0,0 +1,250 @@
+import os
+import shutil
+
+import pymupdf  # PyMuPDF
+
+# 주석 색상 (RGB 0~1) - 엑셀 출력의 강조 색상과 맞춤
+HIGHLIGHT_COLORS = {
+    'alarm': (1.0, 0.55, 0.55),   # Data Alarm = Y (빨간색 계열)
+    'reac': (1.0, 0.75, 0.35),    # COI Reac (주황색 계열)
+    'rerun': (1.0, 1.0, 0.6),     # Rerun ("+") (연한 노란색, FFFF99)
+}
+
+# 같은 줄로 묶을 단어의 세로 위치 허용 오차 (pt)
+LINE_Y_TOLERANCE = 3.0
+
+# 줄 매칭에 사용할 앞쪽 토큰 개수 ("+ ISE K", "ALB2 4.5" 등)
+MATCH_TOKEN_COUNT = 3
+
+def get_flag_reasons(row):
+    """
+    추출된 행 데이터에서 검토 대상 사유를 반환하는 함수
+
+    Args:
+        row (dict): 변환기가 추출한 행 데이터
+
+    Returns:
+        list: 'alarm', 'reac', 'rerun' 중 해당하는 사유 목록 (우선순위 순)
+    """
+    reasons = []
+    if row.get('data_alarm') == 'Y':
+        reasons.append('alarm')
+    if row.get('r_nr') == 'Reac':
+        reasons.append('reac')
+    if row.get('rerun') == 'Y':
+        reasons.append('rerun')
+    return reasons
+
+def build_page_index(extracted_data):
+    """
+    추출된 행 데이터를 페이지 번호별로 묶는 함수
+    변환 시 이미 추출한 데이터를 사용하므로 PDF 텍스트를 다시 추출하지 않습니다.
+
+    Args:
+        extracted_data (list): 'page' 키가 포함된 행 데이터 리스트
+
+    Returns:
+        dict: {페이지 번호(1부터): [행 데이터, ...]}
+    """
+    page_index = {}
+    for row in extracted_data:
+        page_num = row.get('page')
+        if not page_num:
+            continue
+        page_index.setdefault(page_num, []).append(row)
+    return page_index
+
+def _collect_page_lines(page):
+    """
+    페이지의 단어를 한 번만 추출하여 줄 단위(토큰 목록, 영역)로 묶는 함수
+    pdfplumber와 같이 세로 위치 기준으로 묶어서 변환기의 줄과 맞춥니다.
+
+    Args:
+        page (pymupdf.Page): PyMuPDF 페이지
+
+    Returns:
+        list: [(토큰 리스트, pymupdf.Rect), ...] 위에서 아래 순서
+    """
+    words = page.get_text("words")
+    words.sort(key=lambda w: (w[1], w[0]))
+
+    # 세로 위치가 가까운 단어끼리 묶기
+    groups = []
+    current_y = None
+    for word in words:
+        if current_y is None or abs(word[1] - current_y) > LINE_Y_TOLERANCE:
+            groups.append([])
+            current_y = word[1]
+        groups[-1].append(word)
+
+    page_lines = []
+    for group in groups:
+        group.sort(key=lambda w: w[0])  # 줄 안에서는 왼쪽부터
+        rect = pymupdf.Rect(group[0][:4])
+        for word in group[1:]:
+            rect |= pymupdf.Rect(word[:4])
+        page_lines.append(([word[4] for word in group], rect))
+    return page_lines
+
+def _find_line(page_lines, used, row_tokens):
+    """
+    아직 사용하지 않은 줄 중에서 행의 원본 줄과 앞쪽 토큰이 일치하는 줄을 찾는 함수
+
+    Returns:
+        int: 일치하는 줄의 인덱스, 없으면 None
+    """
+    key = row_tokens[:MATCH_TOKEN_COUNT]
+    if not key:
+        return None
+    for idx, (tokens, _) in enumerate(page_lines):
+        if idx in used:
+            continue
+        if tokens[:len(key)] == key:
+            return idx
+    return None
+
+def annotate_pdf(pdf_path, extracted_data, output_path):
+    """
+    원본 PDF의 사본에 Data Alarm / Rerun / COI Reac 줄을 하이라이트 주석으로 표시하는 함수
+    페이지마다 텍스트를 한 번만 검색하고, 주석을 모두 추가한 뒤 증분 저장합니다.
+
+    Args:
+        pdf_path (str): 원본 PDF 파일 경로
+        extracted_data (list): 변환기가 추출한 행 데이터 리스트 ('page', 'line' 키 포함)
+        output_path (str): 주석이 추가된 PDF 저장 경로
+
+    Returns:
+        int: 추가된 주석 개수
+    """
+    # 주석 대상 행만 페이지별로 모으기
+    flagged_index = {}
+    for page_num, rows in build_page_index(extracted_data).items():
+        flagged = [row for row in rows if get_flag_reasons(row)]
+        if flagged:
+            flagged_index[page_num] = flagged
+
+    # 원본은 그대로 두고 사본에 증분 저장
+    if os.path.abspath(pdf_path) != os.path.abspath(output_path):
+        shutil.copyfile(pdf_path, output_path)
+
+    annot_count = 0
+    doc = pymupdf.open(output_path)
+    try:
+        for page_num in sorted(flagged_index):
+            if page_num > doc.page_count:
+                continue
+            page = doc[page_num - 1]
+            page_lines = _collect_page_lines(page)
+            used = set()
+
+            for row in flagged_index[page_num]:
+                idx = _find_line(page_lines, used, str(row.get('line', '')).split())
+                if idx is None:
+                    continue
+                used.add(idx)
+
+                reasons = get_flag_reasons(row)
+                annot = page.add_highlight_annot(page_lines[idx][1])
+                annot.set_colors(stroke=HIGHLIGHT_COLORS[reasons[0]])
+                annot.set_info(
+                    title="REAF",
+                    content=f"{row.get('test_name', '')}: {', '.join(reasons)}"
+                )
+                annot.update()
+                annot_count += 1
+
+        if annot_count:
+            if doc.can_save_incrementally():
+                doc.saveIncr()
+            else:
+                # 증분 저장이 불가능한 PDF(복구된 파일 등)는 전체 저장 후 교체
+                tmp_path = output_path + ".tmp"
+                doc.save(tmp_path, garbage=1, deflate=True)
+                doc.close()
+                os.replace(tmp_path, output_path)
+                return annot_count
+    finally:
+        if not doc.is_closed:
+            doc.close()
+
+    return annot_count
+
+def get_sample_key(row):
+    """
+    행 데이터의 샘플 식별자(Sample ID 또는 Seq No.)를 반환하는 함수
+    """
+    return str(row.get('sample_id') or row.get('seq_no') or '')
+
+def select_flagged_pages(page_index, sample_ids=None):
+    """
+    Data Alarm = Y, Rerun = Y 이거나 샘플 목록에 포함된 행이 있는 페이지를 고르는 함수
+
+    Args:
+        page_index (dict): build_page_index()의 결과
+        sample_ids (iterable): 추가로 포함할 Sample ID / Seq No. 목록 (선택)
+
+    Returns:
+        list: 선택된 페이지 번호 리스트 (1부터, 오름차순)
+    """
+    wanted = {str(s).strip() for s in (sample_ids or []) if str(s).strip()}
+    selected = []
+    for page_num in sorted(page_index):
+        for row in page_index[page_num]:
+            if (row.get('data_alarm') == 'Y' or row.get('rerun') == 'Y'
+                    or (wanted and get_sample_key(row) in wanted)):
+                selected.append(page_num)
+                break
+    return selected
+
+def export_flagged_pages(pdf_path, extracted_data, output_path, sample_ids=None):
+    """
+    플래그된 샘플의 페이지만 원본 PDF에서 복사하여 작은 PDF로 저장하는 함수
+    페이지는 다시 렌더링하지 않고 그대로 복사하며, 샘플별 책갈피를 추가합니다.
+
+    Args:
+        pdf_path (str): 원본 PDF 파일 경로
+        extracted_data (list): 변환기가 추출한 행 데이터 리스트 ('page' 키 포함)
+        output_path (str): 저장할 PDF 경로
+        sample_ids (iterable): 추가로 포함할 Sample ID / Seq No. 목록 (선택)
+
+    Returns:
+        int: 복사된 페이지 수 (0이면 파일을 만들지 않음)
+    """
+    page_index = build_page_index(extracted_data)
+    pages = select_flagged_pages(page_index, sample_ids)
+    if not pages:
+        return 0
+
+    src = pymupdf.open(pdf_path)
+    out = pymupdf.open()
+    try:
+        # 연속된 페이지는 한 번에 복사
+        run_start = prev = pages[0]
+        for page_num in pages[1:] + [None]:
+            if page_num is not None and page_num == prev + 1:
+                prev = page_num
+                continue
+            out.insert_pdf(src, from_page=run_start - 1, to_page=prev - 1)
+            if page_num is not None:
+                run_start = prev = page_num
+
+        # 샘플별 책갈피 (하위 항목: 플래그된 Test)
+        toc = []
+        last_sample = None
+        for new_page_num, page_num in enumerate(pages, 1):
+            for row in page_index[page_num]:
+                sample = get_sample_key(row)
+                if sample != last_sample:
+                    toc.append([1, f"{sample} (p.{page_num})", new_page_num])
+                    last_sample = sample
+                reasons = get_flag_reasons(row)
+                if reasons:
+                    toc.append([2, f"{row.get('test_name', '')} {row.get('result', '')} [{', '.join(reasons)}]", new_page_num])
+        out.set_toc(toc)
+
+        out.save(output_path, garbage=1, deflate=True)
+    finally:
+        out.close()
+        src.close()
+
+    return len(pages)
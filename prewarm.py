@@ -0,0 +1,105 @@
+"""
+변환기 예열 모듈
+
+서버를 새로 시작한 뒤 첫 변환은 pdfplumber/pdfminer, openpyxl import와
+첫 페이지 글꼴 준비 비용까지 함께 치르므로 이후 변환보다 훨씬 느립니다.
+서버가 시작될 때 작업 실행기의 스레드를 미리 띄우고, 각 변환 모듈에 작은 내장 샘플 PDF를
+한 번씩 통과시켜 이 비용을 사용자 요청 전에 치러 둡니다.
+걸린 시간은 서버 로그(표준 출력)에 남습니다.
+"""
+import importlib
+import os
+import shutil
+import tempfile
+import time
+import parse_quality
+
+# 예열할 변환 모듈 (app.py의 장비/모드 목록과 동일)
+CONVERTER_MODULES = [
+    "Pro_CC_ID_pdf_to_excel",
+    "Pro_CC_Seq_pdf_to_excel",
+    "Pro_IM_ID_pdf_to_excel",
+    "Pro_IM_Seq_pdf_to_excel",
+]
+
+# 샘플 보고서 한 페이지 (모든 변환 모듈이 행을 추출하는 최소 형식)
+SAMPLE_LINES = [
+    "cobas pro", "Report", "Lab", "x", "y", "z", "w",
+    "Ser/PI 50016-1 ID : S000 Test 2024/01/01 10:00:00",
+    "h1", "h2", "h3", "h4",
+    "ALB2 4.5", "g/dL 1-23 R1 12345 67890",
+    "+ ISE K 4.5 H", "mmol/L 2-11 R1 55555 1",
+    "CREA2 0.9 >Test", "mg/dL 3-3 R1 777 88888",
+]
+
+def sample_pdf_bytes(lines=SAMPLE_LINES):
+    """
+    텍스트 줄로 한 페이지짜리 PDF를 만드는 함수 (Helvetica, 외부 라이브러리 없이)
+
+    Returns:
+        bytes: PDF 내용
+    """
+    text = "\n".join(
+        "({}) Tj 0 -14 Td".format(line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)"))
+        for line in lines
+    )
+    stream = f"BT /F1 10 Tf 50 800 Td\n{text}\nET".encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+    ]
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        pdf += b"%010d 00000 n \n" % offset
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+def prewarm_converters(modules=CONVERTER_MODULES, log=print):
+    """
+    변환 모듈을 불러오고 샘플 PDF를 한 번씩 변환하는 함수
+
+    Args:
+        modules (list): 예열할 변환 모듈 이름
+        log (callable): 진행 메시지 출력 함수
+
+    Returns:
+        dict: {"total": 전체 초, "modules": {모듈명: 초 또는 None(실패)}}
+    """
+    started = time.perf_counter()
+    timings = {}
+    work_dir = tempfile.mkdtemp(prefix="reaf_prewarm_")
+    try:
+        pdf_path = os.path.join(work_dir, "prewarm_sample.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(sample_pdf_bytes())
+        for name in modules:
+            t = time.perf_counter()
+            try:
+                mod = importlib.import_module(name)
+                # 예열 변환은 파싱 메트릭 파일에 남기지 않음
+                output_path = mod.run(
+                    pdf_path, output_path=os.path.join(work_dir, f"{name}.xlsx"),
+                    quality=parse_quality.ParseQuality(name, record=False),
+                )
+                if not output_path:
+                    raise RuntimeError("샘플 변환 결과가 없습니다")
+                timings[name] = time.perf_counter() - t
+                log(f"[prewarm] {name}: {timings[name]:.2f}s")
+            except Exception as e:
+                timings[name] = None
+                log(f"[prewarm] {name}: 실패 ({e})")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    total = time.perf_counter() - started
+    log(f"[prewarm] 변환기 예열 완료: {total:.2f}s")
+    return {"total": total, "modules": timings}
@@ -0,0 +1,142 @@
+"""
+변환 진행 상황 알림 모듈 (GUI와 무관한 콜백 규약)
+
+추출 루프는 페이지마다 ProgressReporter.update()만 호출하고, 표시는 콜백이 맡습니다.
+    callback(info) - info는 PageProgress (처리한 페이지 수, 지금까지 추출한 행 수, 속도, 남은 시간)
+콜백은 min_interval초에 한 번만 호출되므로 (마지막 페이지는 항상 호출)
+루프에서 드는 비용은 시간 비교 한 번입니다.
+
+표시용 콜백:
+    text_progress_bar()      - 터미널 텍스트 막대 (CLI)
+    window_progress(window)  - tkinter ProgressWindow
+    (Streamlit은 app.py에서 백그라운드 작업의 job.update()로 연결)
+"""
+import sys
+import time
+
+# 콜백 최소 호출 간격 (초)
+DEFAULT_MIN_INTERVAL = 0.25
+
+def format_eta(seconds):
+    """남은 시간을 'm:ss' 형식으로 변환 (알 수 없으면 '--:--')"""
+    if seconds is None:
+        return "--:--"
+    seconds = int(round(seconds))
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+class PageProgress:
+    """
+    콜백에 전달되는 진행 상황
+
+    Attributes:
+        pages_done (int): 처리한 페이지 수
+        total_pages (int): 전체 페이지 수
+        rows (int): 지금까지 추출한 행 수
+        elapsed (float): 시작 후 경과 시간 (초)
+    """
+    __slots__ = ("pages_done", "total_pages", "rows", "elapsed")
+
+    def __init__(self, pages_done, total_pages, rows, elapsed):
+        self.pages_done = pages_done
+        self.total_pages = total_pages
+        self.rows = rows
+        self.elapsed = elapsed
+
+    @property
+    def fraction(self):
+        """진행률 (0~1)"""
+        return min(1.0, self.pages_done / self.total_pages) if self.total_pages else 1.0
+
+    @property
+    def pages_per_sec(self):
+        return self.pages_done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """남은 시간 (초, 속도를 아직 모르면 None)"""
+        rate = self.pages_per_sec
+        if not rate:
+            return None
+        return max(0, self.total_pages - self.pages_done) / rate
+
+    @property
+    def finished(self):
+        return self.pages_done >= self.total_pages
+
+    def describe(self):
+        """한 줄 상태 문자열 (예: 'Page 12/40 (페이지) · 350 rows (행) · 3.2 pages/s · ETA 0:09 (남은 시간)')"""
+        return (
+            f"Page {self.pages_done}/{self.total_pages} (페이지) · {self.rows} rows (행) · "
+            f"{self.pages_per_sec:.1f} pages/s · ETA {format_eta(self.eta)} (남은 시간)"
+        )
+
+class ProgressReporter:
+    """
+    추출 루프용 진행 상황 알림기 (콜백 호출 횟수 제한)
+
+    Args:
+        total_pages (int): 전체 페이지 수
+        callback (callable): callback(PageProgress), None이면 아무것도 하지 않음
+        min_interval (float): 콜백 최소 호출 간격 (초)
+    """
+
+    def __init__(self, total_pages, callback=None, min_interval=DEFAULT_MIN_INTERVAL):
+        self.total_pages = total_pages
+        self.callback = callback
+        self.min_interval = min_interval
+        self.started = time.monotonic()
+        self._last = None
+
+    def update(self, pages_done, rows=0):
+        """
+        진행 상황 보고 (페이지마다 호출)
+
+        Args:
+            pages_done (int): 지금까지 처리한 페이지 수
+            rows (int): 지금까지 추출한 행 수
+        """
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if pages_done < self.total_pages and self._last is not None and now - self._last < self.min_interval:
+            return
+        self._last = now
+        try:
+            self.callback(PageProgress(pages_done, self.total_pages, rows, now - self.started))
+        except Exception as e:
+            # 표시 실패(창이 닫힘 등)로 변환을 멈추지 않음 - 이후 알림 중단
+            print(f"진행 상황 표시 중 오류 발생 (표시 중단): {e}")
+            self.callback = None
+
+def text_progress_bar(stream=None, width=30):
+    """
+    터미널 텍스트 막대 콜백 (같은 줄을 덮어쓰고, 마지막 페이지에서 줄바꿈)
+
+    Args:
+        stream: 출력 스트림 (기본: sys.stderr)
+        width (int): 막대 길이 (문자 수)
+    """
+    def callback(info):
+        out = stream or sys.stderr
+        filled = int(width * info.fraction)
+        out.write(f"\r[{'#' * filled}{'.' * (width - filled)}] {info.describe()}  ")
+        if info.finished:
+            out.write("\n")
+        out.flush()
+    return callback
+
+def window_progress(window, start=30, end=60):
+    """
+    tkinter ProgressWindow 콜백 (페이지 진행률을 start~end% 구간에 표시)
+
+    Args:
+        window (ProgressWindow): update_progress(value, status_text)를 가진 창
+        start (int): 첫 페이지 처리 후 진행률 (%)
+        end (int): 마지막 페이지 처리 후 진행률 (%)
+    """
+    def callback(info):
+        window.update_progress(
+            start + int((end - start) * info.fraction),
+            f"Processing page {info.pages_done}/{info.total_pages}... ETA {format_eta(info.eta)}",
+        )
+    return callback
@@ -0,0 +1,444 @@
+"""
+합성 cobas Pro 보고서 생성기 (규모 테스트 / 회귀 테스트용)
+
+환자 PDF를 공유할 수 없으므로 변환 모듈이 읽는 형식 그대로 가짜 보고서 PDF를 만듭니다.
+    python synthetic_reports.py out.pdf --analyzer CC --mode ID --pages 1000 [--seed 1] [--check]
+
+- 장비: CC (c503/c703, 단위 줄에 mg/dL 등) / IM (e801, COI + Reac/NonReac 줄 포함)
+- 모드: ID (Barcode, 헤더에 "ID : 샘플ID") / Seq (Sequence, "Ser/PI 순번")
+- 페이지 수, 샘플당 검사 수, ISE 행, "+" 재검 행, 알람 문구, NACL 희석액 줄, 쉼표 소수점 비율 지정 가능
+- PDF와 함께 정답 행 파일(<out>.truth.json)을 저장하고, --check를 주면 해당 변환 모듈의 파서로
+  다시 읽어 정답과 비교합니다.
+
+페이지 구성은 변환 모듈의 고정 줄 위치를 따릅니다:
+    첫 페이지  - 8번째 줄 헤더, 13~30번째 줄 데이터
+    이후 페이지 - 5번째 줄 헤더, 10~30번째 줄 데이터
+한 샘플의 검사가 데이터 창에 다 들어가지 않으면 같은 헤더로 다음 페이지에 이어 씁니다.
+PyMuPDF로 페이지마다 텍스트를 한 번에 넣으므로 10,000페이지도 30초 안팎이면 만들어집니다.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# 변환 모듈 (장비, 모드) → 모듈 이름
+CONVERTER_MODULES = {
+    ("CC", "ID"): "Pro_CC_ID_pdf_to_excel",
+    ("CC", "Seq"): "Pro_CC_Seq_pdf_to_excel",
+    ("IM", "ID"): "Pro_IM_ID_pdf_to_excel",
+    ("IM", "Seq"): "Pro_IM_Seq_pdf_to_excel",
+}
+
+# CC 검사: (검사명, 단위, 최소, 최대, 소수 자릿수)
+CC_TESTS = [
+    ("ALB2", "g/dL", 3.0, 5.5, 1),
+    ("TP2", "g/dL", 6.0, 8.5, 1),
+    ("CREA2", "mg/dL", 0.5, 1.5, 2),
+    ("GLUC3", "mg/dL", 70, 140, 0),
+    ("CHOL2-I", "mg/dL", 120, 260, 0),
+    ("TRIGL", "mg/dL", 40, 300, 0),
+    ("UA2", "mg/dL", 2.5, 8.0, 1),
+    ("CA2", "mg/dL", 8.5, 10.5, 1),
+    ("BILD2-D", "mg/dL", 0.05, 0.4, 3),
+    ("BILT3", "mg/dL", 0.2, 1.2, 2),
+    ("ALTL", "U/L", 5, 60, 0),
+    ("ASTL", "U/L", 10, 50, 0),
+    ("GGT-2", "U/L", 8, 80, 0),
+    ("LDHI2", "U/L", 120, 250, 0),
+    ("HBA1C3", "%", 4.5, 9.0, 1),
+]
+
+# CC ISE 검사 (검사명 두 단어)
+ISE_TESTS = [
+    ("ISE NA", "mmol/L", 135, 145, 0),
+    ("ISE K", "mmol/L", 3.5, 5.1, 1),
+    ("ISE CL", "mmol/L", 98, 107, 0),
+]
+
+# IM 정량 검사 (검사명 뒤의 1자리 숫자 / v2 단어도 검사명에 포함됨)
+IM_TESTS = [
+    ("TSH", "uIU/mL", 0.3, 4.5, 3),
+    ("FT4 3", "ng/dL", 0.9, 1.7, 2),
+    ("FT3", "pg/mL", 2.0, 4.4, 2),
+    ("CEA", "ng/mL", 0.2, 5.0, 2),
+    ("AFP", "ng/mL", 1.0, 8.0, 2),
+    ("PSA", "ng/mL", 0.1, 4.0, 3),
+    ("FERR 4", "ng/mL", 20, 300, 1),
+    ("VITD-T 3", "ng/mL", 10, 60, 1),
+    ("INS", "uIU/mL", 2, 25, 2),
+    ("CORT 2", "ug/dL", 5, 23, 2),
+]
+
+# IM 정성 검사 (단위 COI, 다음 줄에 Reac / NonReac)
+COI_TESTS = [
+    ("HBSAG v2", 0.3, 1500, 3),
+    ("A-HCV 2", 0.05, 30, 3),
+    ("HIVDUO", 0.1, 40, 3),
+    ("SYPH", 0.05, 25, 3),
+]
+
+# 결과 뒤에 붙는 알람 문구 (있으면 Data Alarm = Y)
+ALARM_SUFFIXES = ["> Test", "< Test", "H", "L", "ReagExp", "Calib.E"]
+
+# 데이터 창 (0부터 센 줄 번호) - 변환 모듈과 같은 값
+FIRST_PAGE_HEADER, FIRST_PAGE_START = 7, 12
+OTHER_PAGE_HEADER, OTHER_PAGE_START = 4, 9
+WINDOW_END = 30
+
+# PDF를 나눠 만드는 페이지 단위 (write_report_pdf 참고)
+PDF_CHUNK_PAGES = 250
+
+def _format_result(rng, low, high, decimals, comma_rate):
+    value = rng.uniform(low, high)
+    text = f"{value:.{decimals}f}" if decimals else str(int(round(value)))
+    printed = text.replace(".", ",") if decimals and rng.random() < comma_rate else text
+    return printed, text
+
+def _make_test(rng, analyzer, spec, options):
+    """
+    검사 하나의 보고서 줄과 정답 행
+
+    Returns:
+        tuple: (줄 목록, 정답 행 dict)
+    """
+    rerun = rng.random() < options["rerun_rate"]
+    alarm = rng.choice(ALARM_SUFFIXES) if rng.random() < options["alarm_rate"] else None
+    diluent = rng.choice(options["diluents"]) if options["diluents"] and rng.random() < options["diluent_rate"] else None
+    au = f"{rng.randint(1, 9)}-{rng.randint(1, 99)}"
+    rp_lot = str(rng.randint(100000, 999999))
+    serial = str(rng.randint(10000, 99999))
+
+    name, unit, low, high, decimals = spec
+    printed, result = _format_result(rng, low, high, decimals, options["comma_rate"])
+    # COI 정성 검사는 단위 줄 다음에 판정 줄 (cutoff 1.0)
+    r_nr = ("Reac" if float(result) >= 1.0 else "NonReac") if unit == "COI" else ""
+
+    test_line = " ".join(part for part in ("+" if rerun else None, name, printed, alarm) if part)
+    unit_line = " ".join(part for part in (unit, diluent, au, "R1", rp_lot, serial) if part)
+    lines = [test_line, unit_line] + ([r_nr] if r_nr else [])
+    row = {
+        "test_name": name,
+        # 변환기는 IM 결과의 쉼표를 점으로 바꾸고, CC 결과는 찍힌 그대로 둠
+        "result": result if analyzer == "IM" else printed,
+        "unit": unit,
+        "au": au,
+        "rp_lot": rp_lot,
+        "data_alarm": "Y" if alarm else "N",
+        "rerun": "Y" if rerun else "N",
+        "r_nr": r_nr,
+    }
+    return lines, row
+
+def _sample_tests(rng, analyzer, options):
+    """샘플 하나의 검사 목록 (검사명 중복 없음)"""
+    low, high = options["tests_per_sample"]
+    count = rng.randint(low, high)
+    if analyzer == "CC":
+        pool = list(CC_TESTS)
+        if rng.random() < options["ise_rate"]:
+            pool = list(ISE_TESTS) + rng.sample(pool, len(pool))
+            return pool[:max(count, len(ISE_TESTS))]
+        return rng.sample(pool, min(count, len(pool)))
+    quantitative = list(IM_TESTS)
+    qualitative = [(name, "COI", low_, high_, decimals) for name, low_, high_, decimals in COI_TESTS]
+    tests = []
+    for _ in range(count):
+        pool = qualitative if rng.random() < options["coi_rate"] else quantitative
+        choices = [spec for spec in pool if spec not in tests] or [spec for spec in quantitative + qualitative if spec not in tests]
+        if not choices:
+            break
+        tests.append(rng.choice(choices))
+    return tests
+
+def _header_line(analyzer, mode, sample, stamp):
+    date_text = stamp.strftime("%Y/%m/%d %H:%M:%S")
+    if mode == "Seq":
+        return f"Ser/PI {sample} {date_text}"
+    prefix = "Ser/PI" if analyzer == "CC" else "SerumPlasma"
+    return f"{prefix} {50000 + int(sample[1:]) % 1000}-{int(sample[1:]) % 5 + 1} ID : {sample} {date_text}"
+
+def _page_lines(page_num, total_pages, header, data_lines, analyzer):
+    """페이지 한 장의 줄 (헤더와 데이터 시작 위치는 변환 모듈의 고정 위치)"""
+    instrument = "c503" if analyzer == "CC" else "e801"
+    if page_num == 1:
+        lines = [
+            "cobas pro integrated solutions",
+            "Patient Report",
+            "Laboratory: Synthetic Test Lab",
+            f"Instrument: {instrument} #1",
+            "Operator: synthetic",
+            "Report type: Routine",
+            "Sample type Rack-Pos Sample information Date Time",
+            header,
+        ]
+    else:
+        lines = [
+            "cobas pro integrated solutions",
+            "Patient Report (continued)",
+            f"Instrument: {instrument} #1",
+            "Sample type Rack-Pos Sample information Date Time",
+            header,
+        ]
+    lines += [
+        "Test Result Flags",
+        "Unit AU Reagent R.P.Lot Serial",
+        "Comment",
+        "-----",
+    ]
+    lines += data_lines
+    lines.append(f"Page {page_num} / {total_pages}")
+    return lines
+
+def build_report(analyzer="CC", mode="ID", pages=10, seed=0, tests_per_sample=(3, 8), ise_rate=0.3,
+                 rerun_rate=0.05, alarm_rate=0.08, diluent_rate=0.03, coi_rate=0.3, comma_rate=0.0,
+                 diluents=("NACL",), start=None):
+    """
+    보고서 페이지별 줄과 정답 행 생성 (PDF는 만들지 않음)
+
+    Args:
+        analyzer (str): "CC" / "IM"
+        mode (str): "ID" (Barcode) / "Seq" (Sequence)
+        pages (int): 페이지 수
+        seed (int): 난수 시드 (같은 값이면 같은 보고서)
+        tests_per_sample (tuple): 샘플당 검사 수 범위 (최소, 최대)
+        ise_rate (float): CC 샘플에 ISE 검사(NA/K/CL)가 들어갈 비율
+        rerun_rate (float): "+" 재검 행 비율
+        alarm_rate (float): 결과 뒤에 알람 문구가 붙는 비율
+        diluent_rate (float): 단위 줄에 희석액(NACL 등)이 들어가는 비율
+        coi_rate (float): IM 검사 중 COI 정성 검사(Reac/NonReac 줄) 비율
+        comma_rate (float): 결과를 쉼표 소수점으로 찍는 비율 (예: 4,12)
+        diluents (tuple): 희석액 이름 (변환기는 NACL만 특별 처리)
+        start (datetime): 첫 샘플 시각 (기본: 2024-01-01 08:00)
+
+    Returns:
+        dict: {"analyzer", "mode", "seed", "pages": [[줄, ...], ...], "rows": [정답 행, ...], "samples"}
+    """
+    if analyzer not in ("CC", "IM") or mode not in ("ID", "Seq"):
+        raise ValueError(f"지원하지 않는 장비/모드: {analyzer} {mode}")
+    rng = random.Random(seed)
+    options = {
+        "tests_per_sample": tests_per_sample, "ise_rate": ise_rate, "rerun_rate": rerun_rate,
+        "alarm_rate": alarm_rate, "diluent_rate": diluent_rate, "coi_rate": coi_rate,
+        "comma_rate": comma_rate, "diluents": tuple(diluents or ()),
+    }
+    stamp = start or datetime(2024, 1, 1, 8, 0, 0)
+    page_data = []   # [(헤더, 데이터 줄), ...]
+    rows = []
+    samples = 0
+    seq_no = rng.randint(1, 500)
+    while len(page_data) < pages:
+        samples += 1
+        sample = f"{seq_no:06d}" if mode == "Seq" else f"S{rng.randint(10000000, 99999999)}"
+        seq_no += 1
+        stamp += timedelta(seconds=rng.randint(20, 240))
+        header = _header_line(analyzer, mode, sample, stamp)
+        data_lines = []
+        for spec in _sample_tests(rng, analyzer, options):
+            lines, row = _make_test(rng, analyzer, spec, options)
+            start_line = FIRST_PAGE_START if not page_data else OTHER_PAGE_START
+            # 데이터 창이 차면 같은 헤더로 다음 페이지에 이어 씀
+            if data_lines and start_line + len(data_lines) + len(lines) > WINDOW_END:
+                page_data.append((header, data_lines))
+                data_lines = []
+                if len(page_data) >= pages:
+                    break
+            row.update(page=len(page_data) + 1, sample=sample, date=stamp.strftime("%Y/%m/%d"))
+            rows.append(row)
+            data_lines += lines
+        if data_lines and len(page_data) < pages:
+            page_data.append((header, data_lines))
+    page_lines = [
+        _page_lines(number, len(page_data), header, data_lines, analyzer)
+        for number, (header, data_lines) in enumerate(page_data, 1)
+    ]
+    return {
+        "analyzer": analyzer,
+        "mode": mode,
+        "seed": seed,
+        "pages": page_lines,
+        "rows": [row for row in rows if row["page"] <= len(page_lines)],
+        "samples": samples,
+    }
+
+def write_report_pdf(page_lines, pdf_path, fontsize=9, chunk_pages=PDF_CHUNK_PAGES):
+    """
+    페이지별 줄을 PDF로 저장 (PyMuPDF, Helvetica)
+
+    한 문서에 페이지를 계속 추가하면 페이지가 늘수록 느려지므로
+    chunk_pages 단위로 작은 문서를 만들어 최종 문서에 붙입니다.
+
+    Args:
+        page_lines (list): [[줄, ...], ...]
+        pdf_path (str): 저장 경로
+        fontsize (float): 글자 크기 (한 페이지 40줄 정도까지 A4에 들어감)
+        chunk_pages (int): 작은 문서 하나의 페이지 수
+    """
+    import pymupdf
+
+    doc = pymupdf.open()
+    try:
+        for start in range(0, len(page_lines), chunk_pages):
+            chunk = pymupdf.open()
+            for lines in page_lines[start:start + chunk_pages]:
+                page = chunk.new_page(width=595, height=842)
+                page.insert_text((40, 48), "\n".join(lines), fontsize=fontsize, fontname="helv")
+            doc.insert_pdf(chunk)
+            chunk.close()
+        doc.save(pdf_path, deflate=True, garbage=1)
+    finally:
+        doc.close()
+
+def truth_path_for(pdf_path):
+    """PDF 경로 → 정답 행 파일 경로 (<이름>.truth.json)"""
+    return os.path.splitext(pdf_path)[0] + ".truth.json"
+
+def generate_report(pdf_path, truth_path=None, **options):
+    """
+    합성 보고서 PDF와 정답 행 파일 생성
+
+    Args:
+        pdf_path (str): 저장할 PDF 경로
+        truth_path (str): 정답 행 파일 경로 (None이면 truth_path_for(pdf_path))
+        **options: build_report()의 인자
+
+    Returns:
+        dict: {"pdf_path", "truth_path", "pages", "rows", "samples", "seconds"}
+    """
+    started = time.perf_counter()
+    report = build_report(**options)
+    os.makedirs(os.path.dirname(os.path.abspath(pdf_path)), exist_ok=True)
+    write_report_pdf(report["pages"], pdf_path)
+    truth_path = truth_path or truth_path_for(pdf_path)
+    truth = {
+        "analyzer": report["analyzer"],
+        "mode": report["mode"],
+        "seed": report["seed"],
+        "module": CONVERTER_MODULES[(report["analyzer"], report["mode"])],
+        "pages": len(report["pages"]),
+        "samples": report["samples"],
+        "rows": report["rows"],
+    }
+    with open(truth_path, "w", encoding="utf-8") as f:
+        json.dump(truth, f, ensure_ascii=False)
+    return {
+        "pdf_path": pdf_path,
+        "truth_path": truth_path,
+        "pages": len(report["pages"]),
+        "rows": len(report["rows"]),
+        "samples": report["samples"],
+        "seconds": time.perf_counter() - started,
+    }
+
+def extract_rows(module_name, pdf_path):
+    """
+    변환 모듈의 파서로 PDF의 행 추출 (엑셀은 만들지 않음, 각 행에 page 포함)
+
+    Returns:
+        list: 파서가 반환한 행 dict 목록
+    """
+    import pdfplumber
+
+    mod = importlib.import_module(module_name)
+    sequence = "_Seq_" in module_name
+    rows = []
+    test_counter = 0
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num, page in enumerate(pdf.pages, 1):
+            lines = (page.extract_text() or "").split('\n')
+            if page_num == 1:
+                result = mod.extract_data_from_first_page(lines)
+            elif sequence:
+                result = mod.extract_data_from_other_pages(lines, test_counter)
+            else:
+                result = mod.extract_data_from_other_pages(lines)
+            if sequence:
+                test_counter = result[3]
+            for row in result[2]:
+                row['page'] = page_num
+                rows.append(row)
+    return rows
+
+# 비교할 필드 (Seq 모드의 seq_no는 변환기가 페이지 순번으로 새로 매기므로 비교하지 않음)
+COMPARE_FIELDS = ("page", "test_name", "result", "unit", "au", "rp_lot", "data_alarm", "rerun")
+
+def compare_rows(truth, rows, limit=20):
+    """
+    정답 행과 파서 결과 비교 (순서대로 한 행씩)
+
+    Args:
+        truth (dict): 정답 행 파일 내용
+        rows (list): extract_rows() 결과
+        limit (int): 보고할 최대 불일치 수
+
+    Returns:
+        dict: {"expected", "actual", "matched", "mismatches": [(번호, 필드, 정답, 결과), ...]}
+    """
+    fields = list(COMPARE_FIELDS)
+    if truth["analyzer"] == "IM":
+        fields.append("r_nr")
+    expected = truth["rows"]
+    matched = 0
+    mismatches = []
+    for index, (want, got) in enumerate(zip(expected, rows)):
+        actual = dict(got)
+        if truth["mode"] == "ID":
+            actual["sample"] = got.get("sample_id")
+            check = fields + ["sample", "date"]
+        else:
+            check = fields + ["date"]
+        wrong = [(field, want.get(field), actual.get(field)) for field in check if str(want.get(field, "")) != str(actual.get(field, "") or "")]
+        if wrong:
+            if len(mismatches) < limit:
+                mismatches.extend((index, field, a, b) for field, a, b in wrong)
+        else:
+            matched += 1
+    return {"expected": len(expected), "actual": len(rows), "matched": matched, "mismatches": mismatches[:limit]}
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 cobas Pro 보고서 PDF + 정답 행 파일 생성")
+    parser.add_argument("pdf", help="저장할 PDF 경로 (정답 행은 <이름>.truth.json)")
+    parser.add_argument("--analyzer", choices=["CC", "IM"], default="CC")
+    parser.add_argument("--mode", choices=["ID", "Seq"], default="ID")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tests", type=int, nargs=2, default=[3, 8], metavar=("MIN", "MAX"), help="샘플당 검사 수 범위")
+    parser.add_argument("--ise-rate", type=float, default=0.3)
+    parser.add_argument("--rerun-rate", type=float, default=0.05)
+    parser.add_argument("--alarm-rate", type=float, default=0.08)
+    parser.add_argument("--diluent-rate", type=float, default=0.03)
+    parser.add_argument("--diluent", action="append", help="희석액 이름 (여러 번 지정 가능, 기본 NACL)")
+    parser.add_argument("--coi-rate", type=float, default=0.3)
+    parser.add_argument("--comma-rate", type=float, default=0.0)
+    parser.add_argument("--check", action="store_true", help="해당 변환 모듈의 파서로 다시 읽어 정답과 비교")
+    args = parser.parse_args()
+
+    report = generate_report(
+        args.pdf, analyzer=args.analyzer, mode=args.mode, pages=args.pages, seed=args.seed,
+        tests_per_sample=tuple(args.tests), ise_rate=args.ise_rate, rerun_rate=args.rerun_rate,
+        alarm_rate=args.alarm_rate, diluent_rate=args.diluent_rate, coi_rate=args.coi_rate,
+        comma_rate=args.comma_rate, diluents=tuple(args.diluent or ["NACL"]),
+    )
+    print(f"{report['pdf_path']}: {report['pages']}페이지, 샘플 {report['samples']}개, "
+          f"정답 행 {report['rows']}개 ({report['seconds']:.1f}s)")
+    print(f"정답 행 파일: {report['truth_path']}")
+
+    if args.check:
+        module_name = CONVERTER_MODULES[(args.analyzer, args.mode)]
+        with open(report["truth_path"], encoding="utf-8") as f:
+            truth = json.load(f)
+        started = time.perf_counter()
+        rows = extract_rows(module_name, args.pdf)
+        result = compare_rows(truth, rows)
+        print(f"{module_name}: 추출 {result['actual']}행 / 정답 {result['expected']}행, "
+              f"일치 {result['matched']}행 ({time.perf_counter() - started:.1f}s)")
+        for index, field, want, got in result["mismatches"]:
+            print(f"  행 {index + 1} {field}: 정답 {want!r} / 추출 {got!r}")
+        if result["mismatches"] or result["actual"] != result["expected"]:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 저장소 최상위 모듈(linearity_eval 등)을 불러오기 위해 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,47 @@
+"""
+수식 엔진 검증용 입력 워크북 생성
+
+실제 Linearity_ED2 템플릿에 CSV 한 열 분량의 입력(채우기 매핑 linearity_ed2_fill.json 기준)을
+채워 저장합니다. 레벨 1~4는 허용 오차(ATE 15%) 안, 레벨 5는 밖이므로 Linearity!D29:H29에
+Pass와 Fail이 함께 나옵니다. 캐시 값은 넣지 않습니다 - 이 스크립트는 입력만 만듭니다.
+
+고정 데이터(fixture) 만드는 순서:
+    1. python tests/fixtures/build_linearity_inputs.py Linearity_ED2_WB.xlsm
+    2. 만들어진 linearity_ed2_inputs.xlsm을 Excel에서 열고 (열 때 전체 다시 계산됨) 그대로 저장
+    3. 저장한 파일을 tests/fixtures에 넣으면 tests/test_linearity_eval.py가 캐시 값과 비교
+"""
+import argparse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(HERE)))
+
+import linearity_csv
+import linearity_workbook
+
+ATE_PCT = 15.0
+REPLICATE1 = [10.4, 19.6, 30.9, 41.2, 60.0]
+REPLICATE2 = [9.8, 20.6, 29.5, 39.4, 62.0]
+
+def build_record(plan):
+    """Pass 4개 / Fail 1개가 나오는 분석 항목 레코드 (CSV 한 열과 같은 형식)"""
+    record = linearity_csv.blank_record(plan)
+    record.update(
+        Analyte="FIXTURE", Units="mg/dL", Instrument="c503 #1", Analyst="fixture", Date="2024-01-01",
+        ATEPct=ATE_PCT, Replicate1=list(REPLICATE1), Replicate2=list(REPLICATE2),
+    )
+    return record
+
+def build(template_path, output_path):
+    template = linearity_workbook.LinearityTemplate.from_path(template_path)
+    template.save_filled(output_path, template.fill_cells(build_record(template.fill_plan)))
+    return output_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Linearity_ED2 템플릿에 검증용 입력 채우기 (캐시 값 없음)")
+    parser.add_argument("template", help="Linearity_ED2 템플릿 파일 (.xlsx/.xlsm)")
+    parser.add_argument("output", nargs="?", help="저장 경로 (기본: linearity_ed2_inputs + 템플릿 확장자)")
+    args = parser.parse_args()
+    output = args.output or "linearity_ed2_inputs" + os.path.splitext(args.template)[1]
+    print(build(args.template, output))
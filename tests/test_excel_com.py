@@ -0,0 +1,214 @@
+"""
+Excel COM 호출 흐름 테스트 (FakeExcelBackend)
+
+가짜 백엔드가 기록한 호출 순서로, 파일 하나를 Excel에서 한 번만 열어 계산 → 판정 셀 읽기 →
+(Pass인 경우) 첫 3개 시트 PDF 변환 → 닫기를 하는지 확인합니다.
+"""
+import os
+import threading
+
+import openpyxl
+import pytest
+
+import excel_com
+
+SHEETS = ["Instructions", "Data Entry", "Linearity", "Summary"]
+TARGETS = [10.0, 20.0, 30.0, 40.0, 50.0]
+
+def build_workbook(path, means):
+    """Linearity_ED2와 같은 판정 수식(Linearity!D29:H29)을 가진 워크북 (Linearity는 3번째 시트)"""
+    wb = openpyxl.Workbook()
+    wb.active.title = SHEETS[0]
+    for name in SHEETS[1:]:
+        wb.create_sheet(name)
+    data_entry, linearity = wb["Data Entry"], wb["Linearity"]
+    data_entry["F11"] = 15.0
+    for i, col in enumerate("EFGHI"):
+        report_col = chr(ord(col) - 1)
+        data_entry[f"{col}19"] = means[i]
+        data_entry[f"{col}20"] = TARGETS[i]
+        data_entry[f"{col}32"] = means[i]
+        linearity[f"{report_col}28"] = f"=ABS('Data Entry'!{col}19-'Data Entry'!{col}20)/'Data Entry'!{col}20*100"
+        linearity[f"{report_col}29"] = (
+            f"=IF(ISBLANK('Data Entry'!{col}32),\"\",IF({report_col}28<='Data Entry'!$F$11,\"Pass\",\"Fail\"))"
+        )
+    wb.save(path)
+    return str(path)
+
+@pytest.fixture
+def pass_workbook(tmp_path):
+    return build_workbook(tmp_path / "pass.xlsx", [10.1, 19.8, 30.6, 40.4, 51.0])
+
+@pytest.fixture
+def fail_workbook(tmp_path):
+    return build_workbook(tmp_path / "fail.xlsx", [10.1, 19.8, 30.6, 40.4, 61.0])
+
+@pytest.fixture
+def backend():
+    backend = excel_com.FakeExcelBackend()
+    excel_com.set_thread_backend(backend)
+    yield backend
+    excel_com.cleanup_excel_app()
+    excel_com.set_thread_backend(None)
+
+def workbook_calls(backend):
+    """Dispatch / 속성 설정을 뺀 워크북 단위 호출 순서"""
+    return [call for call in backend.calls if call[0] in ("Open", "Calculate", "Range", "ExportAsFixedFormat", "Close")]
+
+def expected_reads():
+    return [("Range", "Linearity", cell) for cell in excel_com.RESULT_CELLS]
+
+def test_pass_session_opens_once_and_exports_first_three_sheets(backend, pass_workbook, tmp_path):
+    pdf_path = str(tmp_path / "pass_P.pdf")
+    result = excel_com.run_linearity_session(pass_workbook, lambda suffix: pdf_path)
+
+    assert result == (True, "_P", pdf_path)
+    assert os.path.exists(pdf_path)
+    calls = workbook_calls(backend)
+    assert calls[0][:2] == ("Open", os.path.abspath(pass_workbook))
+    assert calls[0][2]["ReadOnly"] is True
+    assert calls[1] == ("Calculate",)
+    assert calls[2:7] == expected_reads()
+    assert calls[7] == ("ExportAsFixedFormat", os.path.abspath(pdf_path), SHEETS[:3])
+    assert calls[8] == ("Close", os.path.abspath(pass_workbook), False)
+    assert len(calls) == 9
+
+def test_fail_session_skips_pdf_export(backend, fail_workbook, tmp_path):
+    requested = []
+    result = excel_com.run_linearity_session(
+        fail_workbook, lambda suffix: requested.append(suffix) or str(tmp_path / "fail.pdf")
+    )
+
+    assert result == (False, "_F", None)
+    assert requested == []
+    calls = workbook_calls(backend)
+    assert calls == (
+        [("Open", os.path.abspath(fail_workbook), calls[0][2]), ("Calculate",)]
+        + expected_reads()
+        + [("Close", os.path.abspath(fail_workbook), False)]
+    )
+    assert backend.calls_named("ExportAsFixedFormat") == []
+
+def test_application_is_reused_across_files(backend, pass_workbook, fail_workbook, tmp_path):
+    for path in (pass_workbook, fail_workbook, pass_workbook):
+        excel_com.run_linearity_session(path, lambda suffix: str(tmp_path / f"out{suffix}.pdf"))
+
+    assert len(backend.calls_named("Dispatch")) == 1
+    assert len(backend.apps) == 1
+    assert backend.calls_named("Quit") == []
+    assert len(backend.calls_named("Open")) == 3
+    assert len(backend.calls_named("Close")) == 3
+    assert len(backend.calls_named("ExportAsFixedFormat")) == 2
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ExcelPool
+# ─────────────────────────────────────────────────────────────────────────────
+def current_app():
+    """작업자 스레드에서 실행: 그 작업자의 Excel 인스턴스"""
+    return excel_com.get_excel_app()
+
+def assert_pool_closed(pool, backend):
+    """종료 후 작업자 스레드가 남지 않고, 만든 인스턴스와 COM 초기화가 모두 정리되었는지 확인"""
+    assert not any(thread.is_alive() for thread in pool._threads)
+    assert not [t for t in threading.enumerate() if t.name.startswith("excel-worker-")]
+    assert len(backend.calls_named("Quit")) == len(backend.calls_named("Dispatch"))
+    assert len(backend.calls_named("CoUninitialize")) == len(backend.calls_named("CoInitialize")) == pool.size
+
+def test_pool_dispatches_queued_jobs_to_workers():
+    backend = excel_com.FakeExcelBackend()
+    pool = excel_com.ExcelPool(size=2, max_jobs_per_app=0, backend=backend)
+    futures = [pool.submit(lambda: threading.current_thread().name) for _ in range(6)]
+    names = [future.result(timeout=10) for future in futures]
+    pool.shutdown()
+
+    assert all(name.startswith("excel-worker-") for name in names)
+    stats = pool.stats()
+    assert stats["jobs"] == 6
+    assert stats["failed"] == stats["recycled"] == stats["unhealthy"] == 0
+    assert stats["queued"] == 0
+    assert stats["apps_created"] == len(backend.calls_named("Dispatch")) <= 2
+    assert_pool_closed(pool, backend)
+
+def test_pool_recycles_unresponsive_app():
+    backend = excel_com.FakeExcelBackend()
+    pool = excel_com.ExcelPool(size=1, max_jobs_per_app=0, backend=backend)
+    first = pool.submit(current_app).result(timeout=10)
+    # Version 읽기가 실패하면 다음 작업 전에 상태 확인에서 걸러짐
+    object.__delattr__(first, "Version")
+    second = pool.submit(current_app).result(timeout=10)
+    pool.shutdown()
+
+    assert second is not first
+    assert first.quit
+    stats = pool.stats()
+    assert stats["unhealthy"] == 1
+    assert stats["recycled"] == 0
+    assert stats["apps_created"] == 2
+    assert_pool_closed(pool, backend)
+
+def test_pool_recycles_after_max_jobs_per_app():
+    backend = excel_com.FakeExcelBackend()
+    pool = excel_com.ExcelPool(size=1, max_jobs_per_app=2, backend=backend)
+    apps = [pool.submit(current_app).result(timeout=10) for _ in range(5)]
+    pool.shutdown()
+
+    assert apps[0] is apps[1]
+    assert apps[2] is apps[3] and apps[2] is not apps[1]
+    assert apps[4] is not apps[3]
+    stats = pool.stats()
+    assert stats["jobs"] == 5
+    assert stats["recycled"] == 2
+    assert stats["apps_created"] == 3
+    assert_pool_closed(pool, backend)
+
+def test_pool_recycles_after_handled_com_error(pass_workbook, tmp_path):
+    backend = excel_com.FakeExcelBackend()
+    pool = excel_com.ExcelPool(size=1, max_jobs_per_app=0, backend=backend)
+    # 없는 파일: Open이 실패하고 run_linearity_session이 오류를 잡아 (False, "_F", None)을 돌려줌
+    broken = pool.submit(excel_com.run_linearity_session, str(tmp_path / "missing.xlsx")).result(timeout=10)
+    after = pool.submit(excel_com.run_linearity_session, pass_workbook).result(timeout=10)
+    pool.shutdown()
+
+    assert broken == (False, "_F", None)
+    assert after == (True, "_P", None)
+    stats = pool.stats()
+    assert stats["failed"] == 1
+    assert stats["jobs"] == 1
+    assert stats["recycled"] == 1
+    assert stats["apps_created"] == 2
+    assert backend.apps[0].quit
+    assert_pool_closed(pool, backend)
+
+def test_pool_recycles_after_job_exception():
+    backend = excel_com.FakeExcelBackend()
+    pool = excel_com.ExcelPool(size=1, max_jobs_per_app=0, backend=backend)
+
+    def broken():
+        current_app()
+        raise ValueError("job failed")
+
+    future = pool.submit(broken)
+    with pytest.raises(ValueError):
+        future.result(timeout=10)
+    after = pool.submit(current_app).result(timeout=10)
+    pool.shutdown()
+
+    assert after is backend.apps[1]
+    stats = pool.stats()
+    assert stats["failed"] == 1
+    assert stats["recycled"] == 1
+    assert stats["apps_created"] == 2
+    assert_pool_closed(pool, backend)
+
+def test_pool_shutdown_releases_apps_and_threads():
+    backend = excel_com.FakeExcelBackend()
+    pool = excel_com.ExcelPool(size=3, max_jobs_per_app=0, backend=backend)
+    for future in [pool.submit(current_app) for _ in range(6)]:
+        future.result(timeout=10)
+    pool.shutdown()
+    pool.shutdown()  # 두 번 호출해도 안전
+
+    assert all(app.quit for app in backend.apps)
+    assert_pool_closed(pool, backend)
+    with pytest.raises(RuntimeError):
+        pool.submit(current_app)
@@ -0,0 +1,60 @@
+"""
+수식 엔진(linearity_eval)을 Excel 캐시 값과 비교하는 테스트
+
+tests/fixtures의 .xlsx/.xlsm 워크북마다 모든 수식 셀을 엔진으로 계산하여, 워크북에 저장된
+캐시 값과 같은지 확인합니다. 워크북은 실제 Linearity_ED2 템플릿에 입력을 채운 뒤
+(tests/fixtures/build_linearity_inputs.py) Excel에서 다시 계산하고 저장한 것이어야 합니다.
+아직 Excel에서 저장하지 않은 워크북(fullCalcOnLoad 표시가 남아 있음)은 건너뜁니다.
+"""
+import glob
+import os
+import re
+import zipfile
+
+import openpyxl
+import pytest
+
+import linearity_eval
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+WORKBOOKS = sorted(glob.glob(os.path.join(FIXTURES, "*.xlsx")) + glob.glob(os.path.join(FIXTURES, "*.xlsm")))
+
+def formula_cells(path):
+    """워크북의 모든 수식 셀 [(시트, 셀), ...]"""
+    wb = openpyxl.load_workbook(path)
+    try:
+        return [
+            (ws.title, cell.coordinate)
+            for ws in wb.worksheets
+            for row in ws.iter_rows()
+            for cell in row
+            if isinstance(cell.value, str) and cell.value.startswith("=")
+        ]
+    finally:
+        wb.close()
+
+def require_excel_saved(path):
+    """Excel이 다시 계산하고 저장한 워크북이 아니면 건너뜀 (채우기 직후 파일은 캐시 값이 없음)"""
+    with zipfile.ZipFile(path) as zf:
+        workbook_xml = zf.read("xl/workbook.xml").decode("utf-8")
+    if re.search(r'<calcPr\b[^>]*fullCalcOnLoad="(1|true)"', workbook_xml):
+        pytest.skip(f"{os.path.basename(path)}: Excel에서 다시 계산하여 저장한 워크북이 아닙니다.")
+
+@pytest.mark.parametrize("path", WORKBOOKS, ids=os.path.basename)
+def test_engine_matches_cached_values(path):
+    require_excel_saved(path)
+    targets = formula_cells(path)
+    assert targets
+    assert linearity_eval.compare_with_cached_values(path, tolerance=1e-9, targets=targets) == []
+
+@pytest.mark.parametrize("path", WORKBOOKS, ids=os.path.basename)
+def test_verdict_cells_match_cached_values(path):
+    require_excel_saved(path)
+    wb = openpyxl.load_workbook(path, data_only=True)
+    try:
+        verdicts = {cell.value for row in wb["Linearity"]["D29:H29"] for cell in row}
+    finally:
+        wb.close()
+    # 고정 데이터는 Pass와 Fail 분기를 모두 거쳐야 함
+    assert {"Pass", "Fail"} <= verdicts
+    assert linearity_eval.compare_with_cached_values(path) == []
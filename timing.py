@@ -0,0 +1,238 @@
+"""
+단계별 시간 측정 모듈 (span/timer)
+
+변환 단계(PDF 열기, 페이지별 텍스트 추출, 파싱, 워크북 작성, 저장 등)를 span으로 감싸
+어디에 시간이 드는지 기록합니다.
+    timer = timing.Timer("report.pdf")
+    with timer.span("parse"):
+        ...
+    text = timer.extract_page(page_num, page)   # 페이지별 추출 시간 + 글자 수
+측정하지 않을 때는 NULL_TIMER를 넘기면 span이 빈 컨텍스트가 되어 비용이 거의 없습니다.
+
+결과는 변환마다 JSON 한 줄로 서버 로그(표준 출력)에 남기고 (REAF_TIMING_LOG를 지정하면
+그 파일에도 추가), Streamlit 요약 표와 엑셀 "Timing" 시트로도 볼 수 있습니다.
+"""
+import contextlib
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+
+# 중앙값의 몇 배를 넘으면 느린 페이지로 표시할지
+SLOW_PAGE_FACTOR = 3.0
+
+# 느린 페이지로 표시할 최소 시간 (초) - 아주 짧은 페이지끼리의 차이는 무시
+SLOW_PAGE_MIN_SECONDS = 0.05
+
+class Timer:
+    """
+    단계별 시간 기록기
+
+    Args:
+        label (str): 측정 대상 이름 (예: PDF 파일명)
+        sheet (bool): 엑셀 결과에 "Timing" 시트를 추가할지 여부
+    """
+    enabled = True
+
+    def __init__(self, label="", sheet=False):
+        self.label = label
+        self.sheet = sheet
+        self.stages = {}   # {단계: [초, 횟수]} (처음 기록된 순서)
+        self.pages = []    # [(페이지 번호, 초, 글자 수), ...]
+        self.started = time.perf_counter()
+        self.total = None
+
+    @contextlib.contextmanager
+    def span(self, name):
+        """with 블록의 시간을 name 단계에 더함 (같은 단계는 누적)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds, count=1):
+        """이미 잰 시간을 단계에 더함"""
+        stage = self.stages.get(name)
+        if stage is None:
+            self.stages[name] = [seconds, count]
+        else:
+            stage[0] += seconds
+            stage[1] += count
+
+    def totals(self):
+        """{단계: 초} (다른 프로세스로 넘길 때 사용)"""
+        return {name: seconds for name, (seconds, _) in self.stages.items()}
+
+    def merge(self, timings):
+        """다른 곳(작업자 프로세스 등)에서 잰 {단계: 초}를 더함"""
+        for name, seconds in (timings or {}).items():
+            self.add(name, seconds)
+
+    def extract_page(self, page_num, page):
+        """
+        페이지 텍스트 추출 ("extract" 단계) - 페이지별 시간과 글자 수도 기록
+
+        Args:
+            page_num (int): 페이지 번호 (1부터)
+            page: pdfplumber 페이지
+
+        Returns:
+            str: page.extract_text() 결과
+        """
+        start = time.perf_counter()
+        text = page.extract_text()
+        seconds = time.perf_counter() - start
+        self.add("extract", seconds)
+        self.pages.append((page_num, seconds, len(text or "")))
+        return text
+
+    def finish(self):
+        """전체 시간 확정 (여러 번 호출하면 마지막 호출 기준)"""
+        self.total = time.perf_counter() - self.started
+        return self.total
+
+    def slow_pages(self, factor=SLOW_PAGE_FACTOR, limit=5):
+        """
+        추출 시간이 중앙값의 factor배를 넘는 페이지 (느린 순)
+
+        Returns:
+            list: [(페이지 번호, 초, 글자 수), ...]
+        """
+        if len(self.pages) < 3:
+            return []
+        threshold = max(statistics.median(seconds for _, seconds, _ in self.pages) * factor, SLOW_PAGE_MIN_SECONDS)
+        slow = [page for page in self.pages if page[1] > threshold]
+        return sorted(slow, key=lambda page: -page[1])[:limit]
+
+    def summary_rows(self):
+        """
+        단계별 요약 (표 표시용)
+
+        Returns:
+            list: [{"stage", "seconds", "count", "share"}, ...] - share는 전체 시간 대비 비율
+        """
+        total = self.total if self.total is not None else time.perf_counter() - self.started
+        return [
+            {
+                "stage": name,
+                "seconds": round(seconds, 4),
+                "count": count,
+                "share": round(seconds / total, 3) if total else 0.0,
+            }
+            for name, (seconds, count) in self.stages.items()
+        ]
+
+    def to_record(self, **extra):
+        """
+        JSON으로 남길 측정 기록
+
+        Args:
+            **extra: 함께 남길 값 (모듈명, 행 수 등)
+
+        Returns:
+            dict
+        """
+        total = self.total if self.total is not None else self.finish()
+        record = {
+            "label": self.label,
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "total": round(total, 4),
+            "stages": {name: round(seconds, 4) for name, (seconds, _) in self.stages.items()},
+        }
+        if self.pages:
+            page_times = [seconds for _, seconds, _ in self.pages]
+            record["pages"] = {
+                "count": len(self.pages),
+                "min": round(min(page_times), 4),
+                "median": round(statistics.median(page_times), 4),
+                "max": round(max(page_times), 4),
+                "chars": sum(chars for _, _, chars in self.pages),
+            }
+            record["slow_pages"] = [
+                {"page": page, "seconds": round(seconds, 4), "chars": chars}
+                for page, seconds, chars in self.slow_pages()
+            ]
+        record.update(extra)
+        return record
+
+class _NullTimer:
+    """측정하지 않을 때 사용하는 Timer (모든 기록을 무시)"""
+    enabled = False
+    sheet = False
+    label = ""
+    _context = contextlib.nullcontext()
+
+    def span(self, name):
+        return self._context
+
+    def add(self, name, seconds, count=1):
+        pass
+
+    def merge(self, timings):
+        pass
+
+    def extract_page(self, page_num, page):
+        return page.extract_text()
+
+    def finish(self):
+        return None
+
+NULL_TIMER = _NullTimer()
+
+def log_record(record, path=None):
+    """
+    측정 기록을 JSON 한 줄로 출력 (path 또는 REAF_TIMING_LOG가 있으면 그 파일에도 추가)
+    """
+    line = json.dumps(record, ensure_ascii=False)
+    print(f"[timing] {line}")
+    path = path or os.environ.get("REAF_TIMING_LOG")
+    if path:
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print(f"측정 기록 저장 실패: {e}")
+
+def add_timing_sheet(wb, timer):
+    """
+    워크북에 "Timing" 시트 추가 (단계별 시간, 느린 페이지, 페이지별 추출 시간)
+    워크북 저장 시간은 시트를 쓴 뒤에 측정되므로 시트에는 들어가지 않습니다.
+
+    Args:
+        wb (Workbook): openpyxl 워크북
+        timer (Timer): 측정 기록
+    """
+    from openpyxl.styles import Font
+
+    ws = wb.create_sheet(title="Timing")
+    bold = Font(bold=True)
+
+    ws.append(["Stage (단계)", "Seconds (초)", "Count (횟수)", "Share (비율)"])
+    for row in timer.summary_rows():
+        ws.append([row["stage"], row["seconds"], row["count"], row["share"]])
+    for cell in ws[1]:
+        cell.font = bold
+
+    slow = timer.slow_pages()
+    if slow:
+        ws.append([])
+        ws.append(["Slow pages (느린 페이지)", "Seconds (초)", "Chars (글자 수)"])
+        for cell in ws[ws.max_row]:
+            cell.font = bold
+        for page, seconds, chars in slow:
+            ws.append([page, round(seconds, 4), chars])
+
+    if timer.pages:
+        ws.append([])
+        ws.append(["Page (페이지)", "Extract seconds (추출 초)", "Chars (글자 수)"])
+        for cell in ws[ws.max_row]:
+            cell.font = bold
+        for page, seconds, chars in timer.pages:
+            ws.append([page, round(seconds, 4), chars])
+
+    ws.column_dimensions['A'].width = 24
+    ws.column_dimensions['B'].width = 22
+    ws.column_dimensions['C'].width = 16
+    ws.column_dimensions['D'].width = 12